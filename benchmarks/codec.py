@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+"""
+Micro-benchmarks of the frame codec and the command interpretation. Each
+frame benchmark is run with payload lengths from 0 to 255 bytes, once without
+any byte to stuff ("none") and once with all payload bytes stuffed ("worst").
+The results can be written to a JSON file and compared against a previous
+run to detect regressions.
+
+Usage::
+
+    python benchmarks/codec.py --output results.json
+    python benchmarks/codec.py --compare results.json --threshold 0.1
+
+With ``--compare``, the exit code is 1 if any benchmark got slower by more
+than the threshold (relative).
+"""
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.command import ShdlcCommand
+from sensirion_shdlc_driver.commands.device_version import ShdlcCmdGetVersion
+from sensirion_shdlc_driver.commands.error_state import ShdlcCmdGetErrorState
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder, ShdlcSerialMisoFrameBuilder, \
+    ShdlcSerialMisoFrameDecoder
+from sensirion_shdlc_driver.version import version
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+
+PAYLOAD_LENGTHS = (0, 1, 16, 64, 128, 255)
+PAYLOAD_BYTES = {
+    "none": 0x55,
+    "worst": 0x7E,
+}
+
+
+def _payload(length, stuffing):
+    return bytes([PAYLOAD_BYTES[stuffing]]) * length
+
+
+def _filled_builder(raw):
+    builder = ShdlcSerialMisoFrameBuilder()
+    builder.add_data(raw)
+    return builder
+
+
+def _frame_benchmarks(length, stuffing):
+    """
+    Get the frame codec benchmarks for a payload.
+
+    :return: List of tuples ``(name, function)``.
+    """
+    payload = _payload(length, stuffing)
+    raw = ShdlcSerialMisoFrameBuilder.encode(0x00, 0xD1, 0x00, payload)
+    buffer = bytearray(ShdlcSerialMosiFrameBuilder._MAX_RAW_FRAME_LENGTH)
+    builder = _filled_builder(raw)
+
+    def decoder_add_data():
+        decoder = ShdlcSerialMisoFrameDecoder()
+        decoder.add_data(raw)
+        return decoder.interpret_data()
+
+    return [
+        ("mosi_to_bytes", lambda: ShdlcSerialMosiFrameBuilder(
+            0x00, 0xD1, payload).to_bytes()),
+        ("mosi_encode_into", lambda: ShdlcSerialMosiFrameBuilder.encode_into(
+            buffer, 0x00, 0xD1, payload)),
+        ("miso_add_data", lambda: ShdlcSerialMisoFrameBuilder().add_data(raw)),
+        ("miso_interpret_data", builder.interpret_data),
+        ("miso_decoder", decoder_add_data),
+    ]
+
+
+def _command_benchmarks():
+    """
+    Get the command interpretation benchmarks.
+
+    :return: List of tuples ``(name, payload_length, function)``.
+    """
+    benchmarks = []
+    for length in PAYLOAD_LENGTHS:
+        cmd = ShdlcCommand(0xD1, [], 0.05)
+        benchmarks.append(("command_interpret_response", length,
+                           lambda cmd=cmd, data=bytes(length):
+                               cmd.interpret_response(data)))
+    for cmd, length in [(ShdlcCmdGetVersion(), 7),
+                        (ShdlcCmdGetErrorState(clear=False), 5)]:
+        name = "{}_interpret_response".format(type(cmd).__name__)
+        benchmarks.append((name, length,
+                           lambda cmd=cmd, data=bytes(length):
+                               cmd.interpret_response(data)))
+    return benchmarks
+
+
+def _measure(function, repeat):
+    """
+    Measure the best time per call of a function.
+
+    :param callable function: The function to measure.
+    :param int repeat: Number of measurement repetitions.
+    :return: Best time per call in seconds.
+    :rtype: float
+    """
+    timer = timeit.Timer(function)
+    count, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=count)) / count
+
+
+def run(repeat=5):
+    """
+    Run all benchmarks.
+
+    :param int repeat: Number of measurement repetitions per benchmark.
+    :return: List of result dicts with the keys ``name``,
+             ``payload_length``, ``stuffing`` and ``seconds``.
+    :rtype: list
+    """
+    results = []
+    for stuffing in sorted(PAYLOAD_BYTES):
+        for length in PAYLOAD_LENGTHS:
+            for name, function in _frame_benchmarks(length, stuffing):
+                results.append(dict(name=name, payload_length=length,
+                                    stuffing=stuffing,
+                                    seconds=_measure(function, repeat)))
+    for name, length, function in _command_benchmarks():
+        results.append(dict(name=name, payload_length=length, stuffing=None,
+                            seconds=_measure(function, repeat)))
+    return results
+
+
+def _key(result):
+    return result["name"], result["payload_length"], result["stuffing"]
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    :param list results: Results of :py:func:`run`.
+    :param list baseline: Results of a previous run.
+    :param float threshold: Relative slowdown which counts as regression.
+    :return: List of tuples ``(result, change)`` of all regressions, where
+             change is the relative slowdown.
+    :rtype: list
+    """
+    baseline = {_key(result): result["seconds"] for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline.get(_key(result))
+        if reference:
+            change = result["seconds"] / reference - 1.0
+            if change > threshold:
+                regressions.append((result, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the SHDLC codec micro-benchmarks.")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown counted as regression")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="measurement repetitions per benchmark")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    print("{:<40} {:>7} {:>8} {:>12}".format(
+        "benchmark", "payload", "stuffing", "time [ns]"))
+    for result in results:
+        print("{:<40} {:>7} {:>8} {:>12.1f}".format(
+            result["name"], result["payload_length"],
+            result["stuffing"] or "-", result["seconds"] * 1e9))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(
+                timestamp=datetime.datetime.now().isoformat(),
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                machine=platform.machine(),
+                version=version,
+                results=results,
+            ), f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for result, change in regressions:
+            print("Regression: {} (payload {}, stuffing {}): {:+.1%}".format(
+                result["name"], result["payload_length"],
+                result["stuffing"] or "-", change))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
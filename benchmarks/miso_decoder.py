@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+"""
+Benchmark for decoding MISO frames which are received byte by byte (as it is
+done by ``ShdlcSerialPort``). Prints the processing time per received byte
+(ns/B) of a small, a medium and a maximum-length frame, for both
+``ShdlcSerialMisoFrameBuilder`` and ``ShdlcSerialMisoFrameDecoder``, received
+byte by byte and in one chunk. All bytes of the frames are stuffed, so the
+maximum-length frame has 521 raw bytes (the 522 bytes of
+``_MAX_RAW_FRAME_LENGTH`` would need a stuffed length byte, which can't be
+255). The last line shows the cost per byte of the maximum-length frame
+relative to the small frame, which stays around 1.0 if the cost per byte is
+constant.
+
+Usage::
+
+    python benchmarks/miso_decoder.py
+"""
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMisoFrameBuilder, ShdlcSerialMisoFrameDecoder
+import timeit
+
+#: Frames to decode, as tuples ``(name, raw frame)``. Address, command ID and
+#: state are stuffed, the payload of the maximum-length frame is chosen to get
+#: a stuffed checksum too.
+FRAMES = [
+    ("small", ShdlcSerialMisoFrameBuilder.encode(0x7D, 0x11, 0x13, b"")),
+    ("medium", ShdlcSerialMisoFrameBuilder.encode(
+        0x7D, 0x11, 0x13, b"\x7e" * 64)),
+    ("max", ShdlcSerialMisoFrameBuilder.encode(
+        0x7D, 0x11, 0x13, b"\x7e" * 203 + b"\x7d" * 52)),
+]
+
+#: Decoders to compare, as tuples ``(name, class, byte_by_byte)``.
+DECODERS = [
+    ("builder 1B", ShdlcSerialMisoFrameBuilder, True),
+    ("decoder 1B", ShdlcSerialMisoFrameDecoder, True),
+    ("builder chunk", ShdlcSerialMisoFrameBuilder, False),
+    ("decoder chunk", ShdlcSerialMisoFrameDecoder, False),
+]
+
+
+def _decode(cls, chunks):
+    decoder = cls()
+    for chunk in chunks:
+        if decoder.add_data(chunk):
+            return decoder.interpret_data()
+
+
+def measure(cls, raw, byte_by_byte):
+    """
+    Measure the decoding time of a frame.
+
+    :param type cls: The decoder class.
+    :param bytes raw: The raw frame.
+    :param bool byte_by_byte: Whether to add the frame byte by byte or in one
+                              chunk.
+    :return: Best processing time per raw byte in nanoseconds.
+    :rtype: float
+    """
+    if byte_by_byte:
+        chunks = [raw[i:i + 1] for i in range(len(raw))]
+    else:
+        chunks = [raw]
+    timer = timeit.Timer(lambda: _decode(cls, chunks))
+    count, _ = timer.autorange()
+    best = min(timer.repeat(repeat=7, number=count)) / count
+    return best * 1e9 / len(raw)
+
+
+def main():
+    print(("{:<8} {:>9}" + " {:>14}" * len(DECODERS)).format(
+        "frame", "raw bytes", *[name + " ns/B" for name, _, _ in DECODERS]))
+    results = []
+    for name, raw in FRAMES:
+        results.append([measure(cls, raw, byte_by_byte)
+                        for _, cls, byte_by_byte in DECODERS])
+        print(("{:<8} {:>9}" + " {:>14.1f}" * len(DECODERS)).format(
+            name, len(raw), *results[-1]))
+    print(("{:<18}" + " {:>14.2f}" * len(DECODERS)).format(
+        "max / small", *[m / s for s, m in zip(results[0], results[-1])]))
+
+
+if __name__ == "__main__":
+    main()
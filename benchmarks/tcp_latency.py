@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+"""
+Latency benchmark of ``ShdlcTcpPort`` against a local loopback gateway
+stand-in, comparing the socket options of the port.
+
+The stand-in answers every request frame immediately. It keeps Nagle's
+algorithm enabled and, like gateways which forward bytes as they arrive from
+the UART, can send each response in two segments (``--split``). The second
+segment is then held back until the first one is acknowledged, so without
+``quickack`` the round trip includes the delayed ACK timeout of the client
+(e.g. 40ms on Linux).
+
+Usage::
+
+    python benchmarks/tcp_latency.py --split --output results.json
+"""
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.port import ShdlcTcpPort
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder, ShdlcSerialMisoFrameBuilder
+from sensirion_shdlc_driver.version import version
+import argparse
+import datetime
+import json
+import platform
+import select
+import socket
+import sys
+import threading
+import time
+
+#: Port configurations to compare, as tuples ``(name, kwargs)``.
+CONFIGURATIONS = [
+    ("baseline", dict(nodelay=False, quickack=False)),
+    ("nodelay", dict(nodelay=True, quickack=False)),
+    ("nodelay_quickack", dict(nodelay=True, quickack=True)),
+]
+
+
+class GatewayStandIn(object):
+    """
+    Loopback SHDLC TCP gateway stand-in which answers every request with a
+    4 byte payload, optionally split into two segments.
+    """
+
+    def __init__(self, split=False):
+        super(GatewayStandIn, self).__init__()
+        self._split = split
+        self._stop = False
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(1)
+        self.ip, self.port = self._socket.getsockname()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop = True
+        self._thread.join(2.0)
+        self._socket.close()
+
+    def _run(self):
+        while not self._stop:
+            ready, _, _ = select.select([self._socket], [], [], 0.05)
+            if ready:
+                sock, _ = self._socket.accept()
+                self._serve(sock)
+                sock.close()
+
+    def _serve(self, sock):
+        buffer = b""
+        while not self._stop:
+            ready, _, _ = select.select([sock], [], [], 0.05)
+            if not ready:
+                continue
+            data = sock.recv(4096)
+            if len(data) == 0:
+                return
+            buffer += data
+            while buffer.count(b"\x7e") >= 2:
+                end = buffer.index(b"\x7e", 1) + 1
+                address, command_id, _ = \
+                    ShdlcSerialMosiFrameBuilder.decode(buffer[:end])
+                buffer = buffer[end:]
+                response = ShdlcSerialMisoFrameBuilder.encode(
+                    address, command_id, 0x00, b"\x00\x00\x00\x2a")
+                if self._split:
+                    sock.sendall(response[:5])
+                    sock.sendall(response[5:])
+                else:
+                    sock.sendall(response)
+
+
+def measure(gateway, kwargs, iterations):
+    """
+    Measure the round-trip latencies of ``transceive()``.
+
+    :param GatewayStandIn gateway: The gateway to connect to.
+    :param dict kwargs: Keyword arguments for ``ShdlcTcpPort``.
+    :param int iterations: Number of measured round trips.
+    :return: Sorted latencies in seconds.
+    :rtype: list
+    """
+    latencies = []
+    with ShdlcTcpPort(gateway.ip, gateway.port, **kwargs) as port:
+        for _ in range(5):  # Warm up
+            port.transceive(0x00, 0x93, b"", 1.0)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            port.transceive(0x00, 0x93, b"", 1.0)
+            latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def run(split=False, iterations=100):
+    """
+    Run the benchmark for all configurations.
+
+    :param bool split: Whether the gateway splits the responses.
+    :param int iterations: Number of measured round trips per configuration.
+    :return: List of result dicts with the keys ``name``, ``split``,
+             ``median`` and ``p99`` (seconds).
+    :rtype: list
+    """
+    gateway = GatewayStandIn(split)
+    try:
+        results = []
+        for name, kwargs in CONFIGURATIONS:
+            latencies = measure(gateway, kwargs, iterations)
+            results.append(dict(
+                name=name, split=split,
+                median=latencies[len(latencies) // 2],
+                p99=latencies[min(int(len(latencies) * 0.99),
+                                  len(latencies) - 1)]))
+        return results
+    finally:
+        gateway.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure the ShdlcTcpPort round-trip latency against a "
+                    "loopback gateway stand-in.")
+    parser.add_argument("--split", action="store_true",
+                        help="send each response in two segments")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="round trips per configuration")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.split, args.iterations)
+    print("{:<20} {:>5} {:>12} {:>12}".format(
+        "configuration", "split", "median [us]", "p99 [us]"))
+    for result in results:
+        print("{:<20} {:>5} {:>12.1f} {:>12.1f}".format(
+            result["name"], "yes" if result["split"] else "no",
+            result["median"] * 1e6, result["p99"] * 1e6))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(
+                timestamp=datetime.datetime.now().isoformat(),
+                python=platform.python_version(),
+                implementation=platform.python_implementation(),
+                machine=platform.machine(),
+                version=version,
+                results=results,
+            ), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
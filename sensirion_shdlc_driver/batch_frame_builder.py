@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .serial_frame_builder import ShdlcSerialFrameBuilder, \
+    ShdlcSerialMosiFrameBuilder
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, fall back to the pure Python path
+    np = None
+
+import logging
+log = logging.getLogger(__name__)
+
+if np is not None:
+    # Lookup table to find all bytes which need to be escaped.
+    _ESCAPE_LOOKUP_TABLE = np.zeros(256, bool)
+    _ESCAPE_LOOKUP_TABLE[ShdlcSerialFrameBuilder._CHARS_TO_ESCAPE] = True
+
+
+class ShdlcSerialMosiBatchFrameBuilder(ShdlcSerialFrameBuilder):
+    """
+    Serial MOSI (master out, slave in) batch frame builder.
+
+    This class converts a whole sequence of requests (e.g. all requests of a
+    bus-wide polling cycle) into one contiguous buffer of raw bytes. The
+    offsets of the frames within the buffer allow to slice out each frame.
+
+    If `NumPy <https://numpy.org/>`_ is installed, all frames are checksummed
+    and byte-stuffed by vectorized operations at once. Otherwise the frames
+    are encoded one after another directly into the buffer. The result is
+    computed only once, so for a fixed request set it's recommended to create
+    the builder once and reuse it in every cycle.
+    """
+
+    def __init__(self, frames, use_numpy=None):
+        """
+        Constructor.
+
+        :param list frames: Sequence of ``(slave_address, command_id, data)``
+            tuples, where ``data`` is the (bytes-like) payload of the frame.
+        :param bool use_numpy: Whether to use NumPy for encoding or not. If
+            ``None`` (default), NumPy is used if it is installed.
+        """
+        super(ShdlcSerialMosiBatchFrameBuilder, self).__init__()
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise ImportError("NumPy is required for use_numpy=True.")
+        self._use_numpy = bool(use_numpy)
+        self._frames = [self._check_frame(int(slave_address), int(command_id),
+                                          bytes(bytearray(data)))
+                        for slave_address, command_id, data in frames]
+        self._raw = None
+        self._offsets = None
+
+    @property
+    def offsets(self):
+        """
+        Get the offsets of the frames within the raw data returned by
+        :py:meth:`~sensirion_shdlc_driver.batch_frame_builder.ShdlcSerialMosiBatchFrameBuilder.to_bytes`.
+        The list contains one element more than frames, so frame ``i`` is
+        located at ``raw[offsets[i]:offsets[i + 1]]``.
+
+        :return: The frame offsets.
+        :rtype: list
+        """
+        self._encode()
+        return self._offsets
+
+    def to_bytes(self):
+        """
+        Convert all frames from the constructor to raw bytes.
+
+        :return: The raw data of all frames, which can be sent to the serial
+                 port at once.
+        :rtype: bytes
+        """
+        self._encode()
+        return self._raw
+
+    @staticmethod
+    def _check_frame(slave_address, command_id, data):
+        """
+        Check if a frame fits into the SHDLC frame format. This is done once
+        for all frames, independent of the encoding path, because NumPy would
+        silently wrap out-of-range values.
+
+        :param int slave_address: Slave address.
+        :param int command_id: Command ID.
+        :param bytes data: Payload.
+        :return: The unchanged frame.
+        :rtype: tuple
+        :raise ValueError: If a value is out of range.
+        """
+        if not 0 <= slave_address <= 0xFF:
+            raise ValueError("Slave address {} out of range [0..255]."
+                             .format(slave_address))
+        if not 0 <= command_id <= 0xFF:
+            raise ValueError("Command ID {} out of range [0..255]."
+                             .format(command_id))
+        if len(data) > 0xFF:
+            raise ValueError("Payload of {} bytes is too long (max. 255)."
+                             .format(len(data)))
+        return slave_address, command_id, data
+
+    def _encode(self):
+        """
+        Encode all frames, if not done yet.
+        """
+        if self._raw is not None:
+            return
+        if len(self._frames) == 0:
+            self._raw, self._offsets = b"", [0]
+        elif self._use_numpy:
+            self._raw, self._offsets = self._encode_numpy(self._frames)
+        else:
+            self._raw, self._offsets = self._encode_python(self._frames)
+
+    @staticmethod
+    def _encode_python(frames):
+        """
+        Encode frames one by one and join them.
+
+        :param list frames: List of ``(slave_address, command_id, data)``.
+        :return: The raw data and the frame offsets.
+        :rtype: bytes, list
+        """
+        raw_frames = [ShdlcSerialMosiFrameBuilder(*frame).to_bytes()
+                      for frame in frames]
+        offsets = [0]
+        for raw_frame in raw_frames:
+            offsets.append(offsets[-1] + len(raw_frame))
+        return b"".join(raw_frames), offsets
+
+    @staticmethod
+    def _encode_numpy(frames):
+        """
+        Encode all frames at once with vectorized NumPy operations.
+
+        :param list frames: List of ``(slave_address, command_id, data)``.
+        :return: The raw data and the frame offsets.
+        :rtype: bytes, list
+        """
+        count = len(frames)
+        addresses, command_ids, payloads = zip(*frames)
+        lengths = np.fromiter((len(d) for d in payloads), np.int64, count)
+        sizes = lengths + 4  # address, command ID, length and checksum
+        starts = np.zeros(count, np.int64)
+        np.cumsum(sizes[:-1], out=starts[1:])
+
+        # Unstuffed frame content of all frames, with checksums set to zero.
+        content = np.zeros(int(sizes.sum()), np.uint8)
+        content[starts] = addresses
+        content[starts + 1] = command_ids
+        content[starts + 2] = lengths
+        data_positions = np.repeat(starts + 3 - np.cumsum(lengths) + lengths,
+                                   lengths) + np.arange(int(lengths.sum()))
+        content[data_positions] = np.frombuffer(b"".join(payloads), np.uint8)
+        sums = np.add.reduceat(content, starts, dtype=np.int64)
+        content[starts + sizes - 1] = ~sums & 0xFF
+
+        # Byte-stuffing: each escaped byte is moved behind an escape byte, and
+        # each frame is surrounded by start and stop bytes.
+        escaped = _ESCAPE_LOOKUP_TABLE[content]
+        escapes_before = np.cumsum(escaped) - escaped
+        escapes_per_frame = np.add.reduceat(escaped, starts, dtype=np.int64)
+        offsets = np.zeros(count + 1, np.int64)
+        np.cumsum(sizes + escapes_per_frame + 2, out=offsets[1:])
+        frame_base = offsets[:-1] + 1 - starts - escapes_before[starts]
+        positions = np.repeat(frame_base, sizes) + \
+            np.arange(len(content)) + escapes_before + escaped
+        raw = np.empty(int(offsets[-1]), np.uint8)
+        raw[offsets[:-1]] = ShdlcSerialFrameBuilder._START_STOP_BYTE
+        raw[offsets[1:] - 1] = ShdlcSerialFrameBuilder._START_STOP_BYTE
+        raw[positions] = content ^ (escaped * np.uint8(
+            ShdlcSerialFrameBuilder._ESCAPE_XOR))
+        raw[positions[escaped] - 1] = ShdlcSerialFrameBuilder._ESCAPE_BYTE
+        return raw.tobytes(), offsets.tolist()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .device import ShdlcDevice
+from .errors import ShdlcError, ShdlcDeviceError
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ShdlcBusBitrate(object):
+    """
+    Helper class to detect the bitrate of an SHDLC bus and to move all slaves
+    of the bus to a faster bitrate.
+
+    Since the bitrate applies to the whole bus, all slaves need to be changed
+    consecutively while the port still uses the old bitrate, then the port is
+    switched. If any slave rejects the new bitrate or does not respond
+    afterwards, all slaves are moved back to the old bitrate.
+
+    .. note:: The bitrate is stored in non-volatile memory of the devices and
+              thus persists after a device reset.
+    """
+
+    #: Bitrates probed by
+    #: :py:meth:`~sensirion_shdlc_driver.bitrate.ShdlcBusBitrate.detect` and
+    #: tried by
+    #: :py:meth:`~sensirion_shdlc_driver.bitrate.ShdlcBusBitrate.upgrade`
+    #: by default. Detection starts with the factory default 115200.
+    COMMON_BITRATES = (115200, 1000000, 921600, 460800, 230400, 57600, 38400,
+                       19200, 9600)
+
+    def __init__(self, connection, slave_addresses):
+        """
+        Constructor.
+
+        .. note:: This constructor does not communicate with the devices.
+
+        :param ~sensirion_shdlc_driver.connection.ShdlcConnection connection:
+            The connection of the bus. Its port must support changing the
+            bitrate.
+        :param list slave_addresses: Addresses of all slaves on the bus.
+        """
+        super(ShdlcBusBitrate, self).__init__()
+        self._connection = connection
+        self._devices = [ShdlcDevice(connection, address)
+                         for address in slave_addresses]
+
+    @property
+    def port(self):
+        """
+        Get the port of the bus.
+
+        :return: The port.
+        :rtype: ~sensirion_shdlc_driver.port.ShdlcPort
+        """
+        return self._connection.port
+
+    def detect(self, bitrates=None):
+        """
+        Detect the current bitrate of the bus by probing the given bitrates
+        until any slave responds. The port is left at the detected bitrate.
+
+        :param list bitrates: Bitrates to probe, in this order. Defaults to
+            :py:attr:`~sensirion_shdlc_driver.bitrate.ShdlcBusBitrate.COMMON_BITRATES`.
+        :return: The detected bitrate.
+        :rtype: int
+        :raise ~sensirion_shdlc_driver.errors.ShdlcError:
+            If no slave responds at any of the bitrates (the port is set back
+            to its previous bitrate).
+        """
+        if bitrates is None:
+            bitrates = self.COMMON_BITRATES
+        with self.port.lock:
+            previous = self.port.bitrate
+            for bitrate in bitrates:
+                self.port.bitrate = bitrate
+                for device in self._devices:
+                    if self._is_responding(device):
+                        log.info("Detected bitrate {} bit/s on '{}'."
+                                 .format(bitrate, self.port.description))
+                        return bitrate
+            self.port.bitrate = previous
+        raise ShdlcError("No slave responds at any of the bitrates {}."
+                         .format(", ".join(str(b) for b in bitrates)))
+
+    def upgrade(self, bitrates=None):
+        """
+        Move all slaves to the fastest bitrate they all support.
+
+        Starting with the fastest one, each bitrate above the current bitrate
+        of the port is tried: The new bitrate is set in all slaves, then the
+        port is switched and each slave is confirmed by reading back its
+        bitrate. If this fails, all slaves are moved back to the current
+        bitrate and the next slower bitrate is tried.
+
+        .. note:: The port must already use the current bitrate of the bus,
+                  e.g. as found by
+                  :py:meth:`~sensirion_shdlc_driver.bitrate.ShdlcBusBitrate.detect`.
+
+        :param list bitrates: Bitrates to try. Defaults to
+            :py:attr:`~sensirion_shdlc_driver.bitrate.ShdlcBusBitrate.COMMON_BITRATES`.
+        :return: The new bitrate of the bus (unchanged if no faster bitrate is
+                 supported by all slaves).
+        :rtype: int
+        :raise ~sensirion_shdlc_driver.errors.ShdlcError:
+            If the rollback failed, i.e. some slaves are not responding at the
+            previous bitrate.
+        """
+        if bitrates is None:
+            bitrates = self.COMMON_BITRATES
+        with self.port.lock:
+            current = self.port.bitrate
+            for bitrate in sorted(set(bitrates), reverse=True):
+                if bitrate <= current:
+                    break
+                if self._switch(current, bitrate):
+                    log.info("Upgraded bitrate of '{}' from {} to {} bit/s."
+                             .format(self.port.description, current, bitrate))
+                    return bitrate
+            return current
+
+    def _switch(self, current, bitrate):
+        """
+        Try to move all slaves from the current to a new bitrate, and roll
+        back on failure.
+
+        The port is checked to support the new bitrate before any slave is
+        touched, so a bitrate rejected by the port (e.g. by the serial
+        driver) never leaves the slaves behind.
+
+        :param int current: The current bitrate.
+        :param int bitrate: The new bitrate.
+        :return: Whether all slaves were moved to the new bitrate.
+        :rtype: bool
+        """
+        if not self._port_supports(current, bitrate):
+            return False
+        changed = []  # Slaves which may already use the new bitrate
+        try:
+            for device in self._devices:
+                try:
+                    device.set_baudrate(bitrate, update_driver=False)
+                except ShdlcDeviceError:
+                    raise  # Rejected, so the bitrate of this slave is unchanged
+                except ShdlcError:
+                    changed.append(device)  # Response lost, maybe applied
+                    raise
+                changed.append(device)
+            self.port.bitrate = bitrate
+            for device in self._devices:
+                if device.get_baudrate() != bitrate:
+                    raise ShdlcError("Slave {} did not apply bitrate {}."
+                                     .format(device.slave_address, bitrate))
+            return True
+        except Exception as e:
+            # Any exception (also of the port) requires a rollback, since
+            # some slaves may already use the new bitrate.
+            log.info("Switching to bitrate {} failed: {}".format(bitrate, e))
+        self._rollback(changed, current, bitrate)
+        return False
+
+    def _port_supports(self, current, bitrate):
+        """
+        Check if the port accepts a bitrate by setting it and restoring the
+        current bitrate.
+
+        :param int current: The current bitrate.
+        :param int bitrate: The bitrate to check.
+        :return: Whether the port accepted the bitrate.
+        :rtype: bool
+        """
+        try:
+            self.port.bitrate = bitrate
+            return True
+        except Exception as e:
+            log.info("Port '{}' does not support bitrate {}: {}"
+                     .format(self.port.description, bitrate, e))
+            return False
+        finally:
+            self.port.bitrate = current
+
+    def _rollback(self, changed, current, bitrate):
+        """
+        Move slaves back from a new bitrate to the current bitrate and check
+        if all slaves respond.
+
+        :param list changed: Devices which may use the new bitrate.
+        :param int current: The bitrate to restore.
+        :param int bitrate: The new bitrate.
+        :raise ~sensirion_shdlc_driver.errors.ShdlcError:
+            If a slave doesn't respond at the restored bitrate.
+        """
+        if len(changed):
+            # Only switch the port if there are slaves to talk to at the new
+            # bitrate, since the port may have rejected it.
+            try:
+                self.port.bitrate = bitrate
+            except Exception as e:
+                log.warning("Port '{}' can't switch to bitrate {} to roll "
+                            "back the slaves: {}".format(
+                                self.port.description, bitrate, e))
+                changed = []
+        for device in changed:
+            try:
+                device.set_baudrate(current, update_driver=False)
+            except ShdlcError as e:
+                # Maybe the bitrate was not changed at all.
+                log.debug("Slave {} did not respond at bitrate {}: {}"
+                          .format(device.slave_address, bitrate, e))
+        self.port.bitrate = current
+        lost = [device.slave_address for device in self._devices
+                if not self._is_responding(device)]
+        if len(lost):
+            raise ShdlcError("Rollback to bitrate {} failed, slaves {} are "
+                             "not responding.".format(current, lost))
+
+    @staticmethod
+    def _is_responding(device):
+        """
+        Check if a device responds at the current bitrate of the port.
+
+        :param ~sensirion_shdlc_driver.device.ShdlcDevice device: The device.
+        :return: Whether the device responded.
+        :rtype: bool
+        """
+        try:
+            device.get_baudrate()
+            return True
+        except ShdlcError:
+            return False
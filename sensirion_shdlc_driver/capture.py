@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .serial_frame_builder import ShdlcSerialMosiFrameBuilder, \
+    ShdlcSerialMisoFrameDecoder
+from .errors import ShdlcError
+from .wire_trace import ShdlcWireTrace
+from collections import deque, OrderedDict
+from threading import Event, Lock, Thread
+import argparse
+import struct
+import sys
+import weakref
+
+import logging
+log = logging.getLogger(__name__)
+
+_FILE_HEADER = b"SHDLCCAP\x01"
+_RECORD_HEADER = struct.Struct("<HdBB")
+_PORT_RECORD = 0xFF
+_MAX_PORTS = 256
+
+
+class ShdlcCaptureWriter(ShdlcWireTrace):
+    """
+    Wire trace subscriber which writes all frames into a binary capture file.
+
+    A capture file starts with the 9 bytes header ``SHDLCCAP\\x01`` (magic
+    and format version), followed by any number of records. Each record
+    consists of a 12 bytes little-endian record header and the record data:
+
+    - ``uint16``: Length of the record data
+    - ``float64``: Monotonic timestamp in seconds
+    - ``uint8``: Direction (0 = MOSI, 1 = MISO, 255 = port description)
+    - ``uint8``: Port ID
+
+    A port description record (containing the UTF-8 encoded description of
+    the port) is written before the first frame of each port. Frame records
+    contain the raw frame. Each port gets its own ID (IDs are not reused
+    when ports are deleted), so one writer captures at most 256 ports and
+    drops the frames of further ports. Captures can be analyzed on the
+    command line with ``python -m sensirion_shdlc_driver.capture <file>``.
+
+    Frames are only queued in memory while transceiving, and a background
+    thread appends them periodically to the file. So writing the capture never
+    blocks the communication. If the background thread can't keep up, frames
+    are dropped and counted by
+    :py:attr:`~sensirion_shdlc_driver.capture.ShdlcCaptureWriter.dropped_frames`.
+
+    .. note:: This class can be used in a "with"-statement, and it's
+              recommended to do so as it automatically closes the file.
+    """
+
+    def __init__(self, path, flush_interval=1.0, max_queued_frames=100000):
+        """
+        Open the capture file (new frames are appended if it already exists)
+        and start the background thread.
+
+        :param string path: Path to the capture file.
+        :param float flush_interval: Interval in seconds at which queued
+                                     frames are written to the file.
+        :param int max_queued_frames: Maximum number of frames queued in
+                                      memory. Further frames are dropped.
+        """
+        super(ShdlcCaptureWriter, self).__init__()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_FILE_HEADER)
+        self._flush_interval = float(flush_interval)
+        self._max_queued_frames = int(max_queued_frames)
+        # (port ID, description if not written yet, direction, data,
+        # timestamp)
+        self._queue = deque()
+        self._dropped_frames = 0
+        self._lock = Lock()
+        self._port_ids = weakref.WeakKeyDictionary()
+        self._next_port_id = 0
+        self._stop = Event()
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def dropped_frames(self):
+        """
+        Get the number of frames which were dropped because the queue was
+        full, or because already 256 ports were captured.
+
+        :return: Number of dropped frames.
+        :rtype: int
+        """
+        return self._dropped_frames
+
+    def on_frame(self, port, direction, data, timestamp):
+        """
+        Queue a frame to be written to the file. See
+        :py:meth:`~sensirion_shdlc_driver.wire_trace.ShdlcWireTrace.on_frame`.
+        """
+        with self._lock:
+            if len(self._queue) >= self._max_queued_frames:
+                self._dropped_frames += 1
+                return
+            port_id = self._port_ids.get(port)
+            description = None
+            if port_id is None:
+                port_id = self._register_port(port)
+                if port_id is None:
+                    self._dropped_frames += 1
+                    return
+                description = port.description.encode('utf-8')
+            self._queue.append((port_id, description, direction, bytes(data),
+                                timestamp))
+
+    def close(self):
+        """
+        Write all queued frames and close the file. Does nothing if the file
+        is already closed.
+        """
+        if not self._file.closed:
+            self._stop.set()
+            self._thread.join()
+            self._write_queued_frames()
+            self._file.close()
+
+    def _register_port(self, port):
+        """
+        Assign an ID to a port seen for the first time. The port is referenced
+        weakly, so its ID can't be mixed up with a port created later at the
+        same memory address.
+
+        :param ~sensirion_shdlc_driver.port.ShdlcPort port: The port.
+        :return: The port ID, or ``None`` if no ID is left.
+        :rtype: int
+        """
+        if self._next_port_id >= _MAX_PORTS:
+            if self._next_port_id == _MAX_PORTS:
+                log.warning("ShdlcCaptureWriter captures already {} ports, "
+                            "frames of further ports are dropped."
+                            .format(_MAX_PORTS))
+                self._next_port_id += 1  # Warn only once
+            return None
+        port_id = self._next_port_id
+        self._next_port_id += 1
+        self._port_ids[port] = port_id
+        return port_id
+
+    def _run(self):
+        """
+        Background thread which periodically writes the queued frames.
+        """
+        while not self._stop.wait(self._flush_interval):
+            self._write_queued_frames()
+
+    def _write_queued_frames(self):
+        """
+        Write all queued frames to the file.
+        """
+        records = []
+        while len(self._queue):
+            port_id, description, direction, data, timestamp = \
+                self._queue.popleft()
+            if description is not None:
+                records.append(_RECORD_HEADER.pack(
+                    len(description), timestamp, _PORT_RECORD, port_id))
+                records.append(description)
+            records.append(_RECORD_HEADER.pack(
+                len(data), timestamp, direction, port_id))
+            records.append(data)
+        if len(records):
+            self._file.write(b"".join(records))
+            self._file.flush()
+
+
+class ShdlcCaptureReader(object):
+    """
+    Reader for capture files written by
+    :py:class:`~sensirion_shdlc_driver.capture.ShdlcCaptureWriter`.
+
+    Iterating over the reader yields ``(timestamp, port, direction, data)``
+    tuples for all frames in the file, where ``port`` is the description of
+    the port.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor.
+
+        :param string path: Path to the capture file.
+        """
+        super(ShdlcCaptureReader, self).__init__()
+        self._path = path
+
+    def __iter__(self):
+        ports = dict()
+        with open(self._path, 'rb') as f:
+            if f.read(len(_FILE_HEADER)) != _FILE_HEADER:
+                raise ShdlcError("'{}' is not an SHDLC capture file."
+                                 .format(self._path))
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break  # End of file (or truncated record)
+                length, timestamp, direction, port_id = \
+                    _RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length:
+                    break  # Truncated record
+                if direction == _PORT_RECORD:
+                    # Don't fail on corrupt descriptions, the frames are
+                    # still useful.
+                    ports[port_id] = data.decode('utf-8', errors='replace')
+                else:
+                    yield timestamp, ports.get(port_id, str(port_id)), \
+                        direction, data
+
+
+def decode_mosi_frame(data):
+    """
+    Decode the slave address and command ID of a raw MOSI frame.
+
+    :param bytes data: The raw frame.
+    :return: Slave address and command ID, or ``None`` if the frame is
+             invalid.
+    :rtype: tuple
+    """
+    frame = ShdlcSerialMosiFrameBuilder.decode(data)
+    return frame[:2] if frame is not None else None
+
+
+def decode_miso_frame(data):
+    """
+    Decode a raw MISO frame.
+
+    :param bytes data: The raw frame.
+    :return: Received address, command_id, state, and payload, or ``None`` if
+             the frame is invalid.
+    :rtype: tuple
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    if decoder.add_data(data) and decoder.error is None:
+        return decoder.interpret_data()
+    return None
+
+
+class ShdlcLatencyStatistics(object):
+    """
+    Per-command response latency statistics of a capture.
+
+    Each MOSI frame is paired with the next MISO frame of the same port. If
+    another MOSI frame is sent first, or the response doesn't match the
+    request, the request is counted as lost.
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        super(ShdlcLatencyStatistics, self).__init__()
+        self._pending = dict()  # Port -> (timestamp, address, command)
+        self._latencies = OrderedDict()  # (port, address, command) -> list
+        self._lost = dict()  # (port, address, command) -> count
+
+    def add_frame(self, timestamp, port, direction, data):
+        """
+        Add a frame, e.g. as read by
+        :py:class:`~sensirion_shdlc_driver.capture.ShdlcCaptureReader`.
+
+        :param float timestamp: Monotonic timestamp in seconds.
+        :param string port: Description of the port.
+        :param int direction: Direction of the frame.
+        :param bytes data: The raw frame.
+        """
+        if direction == ShdlcWireTrace.MOSI:
+            self._finish_request(port, None)
+            request = decode_mosi_frame(data)
+            if request is not None:
+                self._pending[port] = (timestamp,) + tuple(request)
+        else:
+            self._finish_request(port, (timestamp, decode_miso_frame(data)))
+
+    def _finish_request(self, port, response):
+        """
+        Finish the pending request of a port.
+
+        :param string port: Description of the port.
+        :param tuple response: Timestamp and decoded response, or ``None`` if
+                               no response was received.
+        """
+        request = self._pending.pop(port, None)
+        if request is None:
+            return
+        start, address, command = request
+        key = (port, address, command)
+        latencies = self._latencies.setdefault(key, [])
+        if response is not None and response[1] is not None and \
+                response[1][0] == address and response[1][1] == command:
+            latencies.append(response[0] - start)
+        else:
+            self._lost[key] = self._lost.get(key, 0) + 1
+
+    def rows(self):
+        """
+        Get the statistics per port, slave address and command ID.
+
+        :return: List of tuples ``(port, address, command, count, lost,
+                 min, mean, p95, max)`` with latencies in seconds (``None``
+                 if no response was received at all).
+        :rtype: list
+        """
+        rows = []
+        for key, latencies in self._latencies.items():
+            lost = self._lost.get(key, 0)
+            if len(latencies):
+                values = sorted(latencies)
+                p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+                stats = (values[0], sum(values) / len(values), p95,
+                         values[-1])
+            else:
+                stats = (None, None, None, None)
+            rows.append(key + (len(latencies) + lost, lost) + stats)
+        return rows
+
+    def format(self):
+        """
+        Format the statistics as a text table.
+
+        :return: The formatted table.
+        :rtype: string
+        """
+        def ms(value):
+            return "-" if value is None else "{:.2f}".format(value * 1000.0)
+        lines = ["{:<24} {:>7} {:>7} {:>7} {:>5} {:>9} {:>9} {:>9} {:>9}"
+                 .format("Port", "Address", "Command", "Count", "Lost",
+                         "Min [ms]", "Mean [ms]", "P95 [ms]", "Max [ms]")]
+        for row in self.rows():
+            lines.append(
+                "{:<24} {:>7} {:>7} {:>7} {:>5} {:>9} {:>9} {:>9} {:>9}"
+                .format(row[0], row[1], "0x{:02X}".format(row[2]), row[3],
+                        row[4], *[ms(value) for value in row[5:]]))
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Command line interface to print per-command latency tables of capture
+    files.
+
+    :param list argv: Command line arguments (defaults to ``sys.argv``).
+    :return: Exit code.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        description="Print per-command latency tables of SHDLC captures.")
+    parser.add_argument("files", nargs="+", help="capture files")
+    parser.add_argument("--frames", action="store_true",
+                        help="print all decoded frames")
+    args = parser.parse_args(argv)
+    exit_code = 0
+    for path in args.files:
+        statistics = ShdlcLatencyStatistics()
+        print("{}:".format(path))
+        try:
+            for timestamp, port, direction, data in ShdlcCaptureReader(path):
+                statistics.add_frame(timestamp, port, direction, data)
+                if args.frames:
+                    print("{:.6f} {} {}: [{}]".format(
+                        timestamp, port,
+                        "MISO" if direction == ShdlcWireTrace.MISO else "MOSI",
+                        ", ".join(["0x%.2X" % i for i in bytearray(data)])))
+        except (IOError, ShdlcError) as e:
+            print("Error: {}".format(e), file=sys.stderr)
+            exit_code = 1
+            continue
+        print(statistics.format())
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import, division, print_function
 from .errors import ShdlcResponseError
+from struct import Struct
 
 import logging
 log = logging.getLogger(__name__)
@@ -67,6 +68,26 @@ class ShdlcCommand(object):
         """
         return self._max_response_time
 
+    @property
+    def min_response_length(self):
+        """
+        Get the minimum expected response length of this command.
+
+        :return: Minimum response length in bytes.
+        :rtype: byte
+        """
+        return self._min_rx_len
+
+    @property
+    def max_response_length(self):
+        """
+        Get the maximum expected response length of this command.
+
+        :return: Maximum response length in bytes.
+        :rtype: byte
+        """
+        return self._max_rx_len
+
     @property
     def post_processing_time(self):
         """
@@ -106,3 +127,114 @@ class ShdlcCommand(object):
                  actual command implementation for details.
         """
         return data if len(data) > 0 else None
+
+
+_STRUCT_CACHE = dict()  # Format string -> struct.Struct
+
+
+def _compile_struct(fmt):
+    """
+    Get the compiled :py:class:`struct.Struct` of a format string. Commands
+    with the same layout share the same object.
+
+    :param str fmt: Format string as accepted by :py:mod:`struct`.
+    :return: The compiled struct.
+    :rtype: struct.Struct
+    """
+    compiled = _STRUCT_CACHE.get(fmt)
+    if compiled is None:
+        compiled = _STRUCT_CACHE.setdefault(fmt, Struct(fmt))
+    return compiled
+
+
+class ShdlcStructCommand(ShdlcCommand):
+    """
+    Base class for SHDLC commands with fixed-size request and response data,
+    defined declaratively by class attributes:
+
+    - ``ID``: Command ID (0..255), may also be inherited from another base
+      class.
+    - ``REQUEST_FORMAT``: :py:mod:`struct` format of the request data
+      (default: no data).
+    - ``REQUEST_FIELDS``: Names of the request data fields. The constructor
+      takes one (positional or keyword) argument per field.
+    - ``RESPONSE_FORMAT``: :py:mod:`struct` format of the response data
+      (default: no data). The response length limits are derived from it.
+    - ``MAX_RESPONSE_TIME``: Maximum response time in seconds.
+    - ``POST_PROCESSING_TIME``: Post processing time in seconds (default 0).
+
+    The formats are compiled once per class into :py:class:`struct.Struct`
+    objects. Unless overridden, :py:meth:`interpret_response` returns the
+    single value of the response, a tuple if the response contains multiple
+    fields, or None if there is no response data. Example:
+
+    .. sourcecode:: python
+
+        class ShdlcCmdGetBaudrate(ShdlcStructCommand):
+            ID = 0x91
+            RESPONSE_FORMAT = ">I"
+            MAX_RESPONSE_TIME = 0.05
+    """
+
+    REQUEST_FORMAT = ">"
+    REQUEST_FIELDS = ()
+    RESPONSE_FORMAT = ">"
+    POST_PROCESSING_TIME = 0.0
+
+    def __init_subclass__(cls, **kwargs):
+        super(ShdlcStructCommand, cls).__init_subclass__(**kwargs)
+        cls._request_struct = _compile_struct(cls.REQUEST_FORMAT)
+        if len(cls._request_struct.unpack(bytes(cls._request_struct.size))) \
+                != len(cls.REQUEST_FIELDS):
+            raise ValueError("REQUEST_FIELDS of {} do not match "
+                             "REQUEST_FORMAT.".format(cls.__name__))
+        cls._response_struct = _compile_struct(cls.RESPONSE_FORMAT)
+        if 'interpret_response' not in cls.__dict__:
+            cls.interpret_response = cls._generate_interpret_response(
+                cls._response_struct)
+
+    def __init__(self, *values, **kwargs):
+        """
+        Constructor.
+
+        :param values: The values of the request data fields, as specified
+                       by ``REQUEST_FIELDS`` and ``REQUEST_FORMAT``.
+        """
+        if kwargs:
+            values = values + tuple(kwargs.pop(name) for name
+                                    in self.REQUEST_FIELDS[len(values):]
+                                    if name in kwargs)
+            if kwargs:
+                raise TypeError("{}() got unexpected keyword arguments: {}"
+                                .format(type(self).__name__,
+                                        ", ".join(sorted(kwargs))))
+        # Call the base implementation directly to bypass constructors of
+        # other base classes which would pass the command ID once again.
+        ShdlcCommand.__init__(
+            self, self.ID, self._request_struct.pack(*values),
+            max_response_time=self.MAX_RESPONSE_TIME,
+            min_response_length=self._response_struct.size,
+            max_response_length=self._response_struct.size,
+            post_processing_time=self.POST_PROCESSING_TIME)
+
+    @staticmethod
+    def _generate_interpret_response(response_struct):
+        """
+        Generate the interpret_response() method for a response layout.
+
+        :param struct.Struct response_struct: The response layout.
+        :return: The generated method.
+        """
+        unpack = response_struct.unpack
+        field_count = len(unpack(bytes(response_struct.size)))
+        if field_count == 0:
+            def interpret_response(self, data):
+                return None
+        elif field_count == 1:
+            def interpret_response(self, data):
+                return unpack(data)[0]
+        else:
+            def interpret_response(self, data):
+                return unpack(data)
+        interpret_response.__doc__ = ShdlcCommand.interpret_response.__doc__
+        return interpret_response
@@ -2,8 +2,7 @@
 # (c) Copyright 2019 Sensirion AG, Switzerland
 
 from __future__ import absolute_import, division, print_function
-from ..command import ShdlcCommand
-from struct import pack, unpack
+from ..command import ShdlcCommand, ShdlcStructCommand
 
 import logging
 log = logging.getLogger(__name__)
@@ -14,27 +13,24 @@ class ShdlcCmdBaudrateBase(ShdlcCommand):
     SHDLC command 0x91: "Get/Set Baudrate".
     """
 
+    ID = 0x91
+
     def __init__(self, *args, **kwargs):
         super(ShdlcCmdBaudrateBase, self).__init__(0x91, *args, **kwargs)
 
 
-class ShdlcCmdSetBaudrate(ShdlcCmdBaudrateBase):
-    def __init__(self, baudrate):
-        super(ShdlcCmdSetBaudrate, self).__init__(
-            data=pack(">I", baudrate), max_response_time=0.05,
-            min_response_length=0, max_response_length=0
-        )
-
+class ShdlcCmdSetBaudrate(ShdlcStructCommand, ShdlcCmdBaudrateBase):
+    """
+    Arguments: Baudrate [bit/s].
+    """
+    REQUEST_FORMAT = ">I"
+    REQUEST_FIELDS = ("baudrate",)
+    MAX_RESPONSE_TIME = 0.05
 
-class ShdlcCmdGetBaudrate(ShdlcCmdBaudrateBase):
-    def __init__(self):
-        super(ShdlcCmdGetBaudrate, self).__init__(
-            data=[], max_response_time=0.05,
-            min_response_length=4, max_response_length=4
-        )
 
-    def interpret_response(self, data):
-        """
-        :return int: Baudrate [bit/s].
-        """
-        return int(unpack(">I", data)[0])
+class ShdlcCmdGetBaudrate(ShdlcStructCommand, ShdlcCmdBaudrateBase):
+    """
+    Response: Baudrate [bit/s] as int.
+    """
+    RESPONSE_FORMAT = ">I"
+    MAX_RESPONSE_TIME = 0.05
@@ -2,7 +2,7 @@
 # (c) Copyright 2019 Sensirion AG, Switzerland
 
 from __future__ import absolute_import, division, print_function
-from ..command import ShdlcCommand
+from ..command import ShdlcCommand, ShdlcStructCommand
 from ..types import FirmwareVersion, HardwareVersion, ProtocolVersion, Version
 
 import logging
@@ -14,31 +14,31 @@ class ShdlcCmdDeviceVersionBase(ShdlcCommand):
     SHDLC command 0xD1: "Get Version".
     """
 
+    ID = 0xD1
+
     def __init__(self, *args, **kwargs):
         super(ShdlcCmdDeviceVersionBase, self).__init__(0xD1, *args, **kwargs)
 
 
-class ShdlcCmdGetVersion(ShdlcCmdDeviceVersionBase):
-    def __init__(self):
-        super(ShdlcCmdGetVersion, self).__init__(
-            data=[], max_response_time=0.5,
-            min_response_length=7, max_response_length=7
-        )
+class ShdlcCmdGetVersion(ShdlcStructCommand, ShdlcCmdDeviceVersionBase):
+    RESPONSE_FORMAT = ">BB?BBBB"
+    MAX_RESPONSE_TIME = 0.5
 
     def interpret_response(self, data):
-        data_bytes = bytearray(data)  # Make the [] operator returning a byte
+        fw_major, fw_minor, fw_debug, hw_major, hw_minor, protocol_major, \
+            protocol_minor = self._response_struct.unpack(data)
         return Version(
             firmware=FirmwareVersion(
-                major=data_bytes[0],
-                minor=data_bytes[1],
-                debug=bool(data_bytes[2])
+                major=fw_major,
+                minor=fw_minor,
+                debug=fw_debug
             ),
             hardware=HardwareVersion(
-                major=data_bytes[3],
-                minor=data_bytes[4]
+                major=hw_major,
+                minor=hw_minor
             ),
             protocol=ProtocolVersion(
-                major=data_bytes[5],
-                minor=data_bytes[6]
+                major=protocol_major,
+                minor=protocol_minor
             )
         )
@@ -2,8 +2,7 @@
 # (c) Copyright 2019 Sensirion AG, Switzerland
 
 from __future__ import absolute_import, division, print_function
-from ..command import ShdlcCommand
-from struct import unpack
+from ..command import ShdlcCommand, ShdlcStructCommand
 
 import logging
 log = logging.getLogger(__name__)
@@ -14,19 +13,15 @@ class ShdlcCmdSystemUpTimeBase(ShdlcCommand):
     SHDLC command 0x93: "System Up Time".
     """
 
+    ID = 0x93
+
     def __init__(self, *args, **kwargs):
         super(ShdlcCmdSystemUpTimeBase, self).__init__(0x93, *args, **kwargs)
 
 
-class ShdlcCmdGetSystemUpTime(ShdlcCmdSystemUpTimeBase):
-    def __init__(self):
-        super(ShdlcCmdGetSystemUpTime, self).__init__(
-            data=[], max_response_time=0.05,
-            min_response_length=4, max_response_length=4
-        )
-
-    def interpret_response(self, data):
-        """
-        :return int: System up time [s].
-        """
-        return unpack('>I', data)[0]
+class ShdlcCmdGetSystemUpTime(ShdlcStructCommand, ShdlcCmdSystemUpTimeBase):
+    """
+    Response: System up time [s] as int.
+    """
+    RESPONSE_FORMAT = ">I"
+    MAX_RESPONSE_TIME = 0.05
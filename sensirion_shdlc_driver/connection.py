@@ -2,7 +2,8 @@
 # (c) Copyright 2019 Sensirion AG, Switzerland
 
 from __future__ import absolute_import, division, print_function
-from .errors import ShdlcResponseError, ShdlcDeviceError
+from .errors import ShdlcError, ShdlcResponseError, ShdlcDeviceError
+from .port import _transceive
 import time
 
 import logging
@@ -66,7 +67,8 @@ class ShdlcConnection(object):
         :rtype: object, bool
         """
         data, error = self.transceive(slave_address, command.id, command.data,
-                                      command.max_response_time)
+                                      command.max_response_time,
+                                      command.max_response_length)
         if wait_post_process and command.post_processing_time > 0.0:
             # Wait for post processing in the device (to be sure the device is
             # ready for receiving the next command).
@@ -74,7 +76,8 @@ class ShdlcConnection(object):
         command.check_response_length(data)  # Raises if length was wrong
         return command.interpret_response(data), error
 
-    def transceive(self, slave_address, command_id, data, response_timeout):
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
         """
         Send a raw SHDLC command and return the received raw response.
 
@@ -83,11 +86,71 @@ class ShdlcConnection(object):
         :param bytes-like data: Payload (may be empty).
         :param float response_timeout: Response timeout in seconds (maximum
                                        time until the first byte is received).
+        :param byte max_response_length: Maximum expected response payload
+                                         length (``None`` if unknown).
+        :return: Received response payload and error state flag.
+        :rtype: bytes, bool
+        """
+        rx_addr, rx_cmd, rx_state, rx_data = _transceive(
+            self._port, slave_address, command_id, data, response_timeout,
+            max_response_length)
+        return self._check_response(slave_address, command_id, rx_addr,
+                                    rx_cmd, rx_state, rx_data)
+
+    def execute_pipelined(self, requests):
+        """
+        Execute multiple ShdlcCommands and return their interpreted responses.
+        Ports which support it (e.g.
+        :py:class:`~sensirion_shdlc_driver.port.ShdlcTcpPort`) send the
+        requests without waiting for the previous responses, which avoids a
+        full round trip per command on high latency links.
+
+        .. note:: Post processing times of the commands are not waited for
+                  between the commands, so commands which need post
+                  processing should not be pipelined.
+
+        :param list requests: Sequence of ``(slave_address, command)``
+            tuples.
+        :return: For each request either the received response
+            (interpreted) and error state flag, or the
+            :py:class:`~sensirion_shdlc_driver.errors.ShdlcError` which
+            occurred, so a failed request doesn't discard the responses of
+            the other requests.
+        :rtype: list
+        """
+        requests = list(requests)
+        frames = self._port.transceive_pipelined(
+            [(slave_address, command.id, command.data,
+              command.max_response_time, command.max_response_length)
+             for slave_address, command in requests])
+        results = []
+        for (slave_address, command), frame in zip(requests, frames):
+            try:
+                if isinstance(frame, Exception):
+                    raise frame
+                data, error = self._check_response(
+                    slave_address, command.id, *frame)
+                command.check_response_length(data)
+                results.append((command.interpret_response(data), error))
+            except ShdlcError as e:
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _check_response(slave_address, command_id, rx_addr, rx_cmd,
+                        rx_state, rx_data):
+        """
+        Check a received response frame.
+
+        :param byte slave_address: Slave address of the request.
+        :param byte command_id: SHDLC command ID of the request.
+        :param byte rx_addr: Received slave address.
+        :param byte rx_cmd: Received command ID.
+        :param byte rx_state: Received state.
+        :param bytes rx_data: Received payload.
         :return: Received response payload and error state flag.
         :rtype: bytes, bool
         """
-        rx_addr, rx_cmd, rx_state, rx_data = self._port.transceive(
-            slave_address, command_id, data, response_timeout)
         if rx_addr != slave_address:
             raise ShdlcResponseError("Received slave address {} instead of {}."
                                      .format(rx_addr, slave_address))
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import, division, print_function
 from .device_base import ShdlcDeviceBase
+from .errors import ShdlcError
 from .commands.device_info import ShdlcCmdGetProductType, \
     ShdlcCmdGetProductName, ShdlcCmdGetArticleCode, ShdlcCmdGetSerialNumber, \
     ShdlcCmdGetProductSubType
@@ -254,7 +255,7 @@ class ShdlcDevice(ShdlcDeviceBase):
         """
         return self.execute(ShdlcCmdGetReplyDelay())
 
-    def set_reply_delay(self, reply_delay):
+    def set_reply_delay(self, reply_delay, update_driver=True):
         """
         Set the SHDLC reply delay of the device.
 
@@ -267,8 +268,103 @@ class ShdlcDevice(ShdlcDeviceBase):
         delay of all slaves to avoid this issue.
 
         :param byte reply_delay: The new reply delay [μs].
+        :param bool update_driver:
+            If true, the reply delay is also passed to
+            :py:meth:`~sensirion_shdlc_driver.port.ShdlcPort.set_reply_delay`
+            of the underlying port, which may use it to calculate the
+            response timeout.
         """
         self.execute(ShdlcCmdSetReplyDelay(reply_delay))
+        if update_driver:
+            self._connection.port.set_reply_delay(self._slave_address,
+                                                  reply_delay)
+
+    def find_min_reply_delay(self, max_reply_delay=10000, resolution=10,
+                             samples=20):
+        """
+        Search the smallest reply delay which still allows error-free
+        communication, e.g. to get the maximum throughput on an RS485 bus
+        with a slow master (see
+        :py:meth:`~sensirion_shdlc_driver.device.ShdlcDevice.set_reply_delay()`).
+
+        The reply delay is determined by bisection. For each candidate, the
+        reply delay is set and ``samples`` "Get Version" commands are sent.
+        A candidate is accepted only if all of them succeed. Since the device
+        may apply a too small reply delay even if its response got lost, the
+        reply delay is always set again with the next candidate. At the end,
+        the found reply delay is set (also in the port) and returned.
+
+        .. note:: The reply delay is stored in non-volatile memory of the
+                  device. Keep in mind that the result is only valid for the
+                  current master, bitrate and bus.
+
+        :param int max_reply_delay: Upper bound of the search [μs], which
+            must allow error-free communication.
+        :param int resolution: Resolution of the search [μs].
+        :param int samples: Number of commands sent per candidate.
+        :return: The smallest error-free reply delay [μs].
+        :rtype: int
+        :raise ~sensirion_shdlc_driver.errors.ShdlcError:
+            If the communication fails even with ``max_reply_delay``.
+        """
+        if not self._test_reply_delay(max_reply_delay, samples):
+            self._force_reply_delay(max_reply_delay)
+            raise ShdlcError("Communication fails even with a reply delay of "
+                             "{} μs.".format(max_reply_delay))
+        good, bad = max_reply_delay, None
+        if self._test_reply_delay(0, samples):
+            good = 0
+        else:
+            bad = 0
+        while bad is not None and good - bad > resolution:
+            candidate = (good + bad) // 2
+            if self._test_reply_delay(candidate, samples):
+                good = candidate
+            else:
+                bad = candidate
+        self._force_reply_delay(good)
+        log.info("Found minimum reply delay of {} μs for slave {}."
+                 .format(good, self._slave_address))
+        return good
+
+    def _force_reply_delay(self, reply_delay):
+        """
+        Set the reply delay, ignoring a lost response (the device may have
+        applied it anyway), and verify it with a "Get Version" command.
+
+        :param int reply_delay: The reply delay [μs].
+        """
+        for _ in range(3):
+            try:
+                self.set_reply_delay(reply_delay)
+                self.execute(ShdlcCmdGetVersion())
+                return
+            except ShdlcError as e:
+                log.debug("Failed to set reply delay {} μs: {}"
+                          .format(reply_delay, e))
+        raise ShdlcError("Failed to set reply delay of {} μs."
+                         .format(reply_delay))
+
+    def _test_reply_delay(self, reply_delay, samples):
+        """
+        Set a reply delay and check if the communication is error-free.
+
+        :param int reply_delay: The reply delay to test [μs].
+        :param int samples: Number of commands to send.
+        :return: Whether all commands succeeded.
+        :rtype: bool
+        """
+        try:
+            self.set_reply_delay(reply_delay)
+        except ShdlcError:
+            pass  # Response lost, but the device may have applied it
+        try:
+            for _ in range(samples):
+                self.execute(ShdlcCmdGetVersion())
+            return True
+        except ShdlcError as e:
+            log.debug("Reply delay of {} μs failed: {}".format(reply_delay, e))
+            return False
 
     def get_system_up_time(self):
         """
@@ -58,6 +58,36 @@ class ShdlcTimeoutError(ShdlcError):
         )
 
 
+class ShdlcConnectionLostError(ShdlcTimeoutError):
+    """
+    SHDLC connection lost exception (the connection to the port, e.g. to a
+    TCP gateway, was lost or is not established). Derived from
+    :py:class:`~sensirion_shdlc_driver.errors.ShdlcTimeoutError` since the
+    device could not respond either, but allows to tell a dead connection
+    apart from a device which did not respond in time.
+    """
+    def __init__(self, reason):
+        """
+        Constructor.
+
+        :param string reason: Description of the reason.
+        """
+        # Skip the constructor of ShdlcTimeoutError to replace its message.
+        super(ShdlcTimeoutError, self).__init__(
+            "Connection lost: {}".format(reason))
+        self._reason = str(reason)
+
+    @property
+    def reason(self):
+        """
+        Get the reason passed to the constructor.
+
+        :return: Description of the reason.
+        :rtype: string
+        """
+        return self._reason
+
+
 class ShdlcResponseError(ShdlcError):
     """
     SHDLC response error (slave response contains invalid data)
@@ -72,12 +102,26 @@ class ShdlcResponseError(ShdlcError):
         super(ShdlcResponseError, self).__init__(
             "Invalid data received from the SHDLC device: " + message
         )
+        self._error_message = str(message)
         self._received_data = received_data
         if self._received_data is not None:
             received_data_bytearray = bytearray(self._received_data)
             self._received_data = bytes(received_data_bytearray)
-            log.debug("Invalid SHDLC response raw data: [{}]".format(
-                ", ".join(["0x%.2X" % i for i in received_data_bytearray])))
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Invalid SHDLC response raw data: [{}]".format(
+                    ", ".join(["0x%.2X" % i
+                               for i in received_data_bytearray])))
+
+    @property
+    def error_message(self):
+        """
+        Get the error message passed to the constructor, i.e. without the
+        generic prefix.
+
+        :return: Error message.
+        :rtype: string
+        """
+        return self._error_message
 
     @property
     def received_data(self):
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .serial_frame_builder import ShdlcSerialMosiFrameBuilder
+from collections import OrderedDict
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ShdlcFrameCache(object):
+    """
+    Bounded LRU cache of encoded MOSI frames.
+
+    Many commands (e.g. "Get Version" or "Get System Up Time") always produce
+    the same raw bytes for a given slave address. This cache stores the
+    encoded frames keyed by slave address, command ID and payload, so they
+    don't need to be stuffed and checksummed again on every transmission.
+    If the cache is full, the least recently used frame is evicted.
+
+    Frames without payload are always cached since they are constant. Frames
+    with payload are only cached for the command IDs passed as
+    ``command_ids`` (e.g. commands which always send the same payload), and
+    only if the payload is short. Other payloads (e.g. setpoints of setter
+    commands or firmware update data) are typically unique and would just
+    evict useful entries.
+
+    .. note:: This class is not thread-safe. The ports only access it while
+              holding their lock.
+    """
+
+    def __init__(self, max_size=64, max_payload_length=8, command_ids=()):
+        """
+        Constructor.
+
+        :param int max_size: Maximum number of cached frames.
+        :param int max_payload_length: Maximum payload length of frames to be
+            cached. Frames with longer payload are not cached.
+        :param iterable command_ids: IDs of the commands whose frames are
+            cached even if they have a payload.
+        """
+        super(ShdlcFrameCache, self).__init__()
+        self._max_size = int(max_size)
+        self._max_payload_length = int(max_payload_length)
+        self._command_ids = frozenset(int(i) for i in command_ids)
+        self._frames = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def max_size(self):
+        """
+        Get the maximum number of cached frames.
+
+        :return: Maximum number of cached frames.
+        :rtype: int
+        """
+        return self._max_size
+
+    @property
+    def max_payload_length(self):
+        """
+        Get the maximum payload length of frames to be cached.
+
+        :return: Maximum payload length.
+        :rtype: int
+        """
+        return self._max_payload_length
+
+    @property
+    def command_ids(self):
+        """
+        Get the IDs of the commands whose frames are cached even if they have
+        a payload.
+
+        :return: The command IDs.
+        :rtype: frozenset
+        """
+        return self._command_ids
+
+    @property
+    def size(self):
+        """
+        Get the number of currently cached frames.
+
+        :return: Number of cached frames.
+        :rtype: int
+        """
+        return len(self._frames)
+
+    @property
+    def hits(self):
+        """
+        Get the number of lookups which returned a cached frame.
+
+        :return: Number of cache hits.
+        :rtype: int
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        Get the number of lookups which needed to encode the frame.
+
+        :return: Number of cache misses.
+        :rtype: int
+        """
+        return self._misses
+
+    def get(self, slave_address, command_id, data):
+        """
+        Get the encoded frame, either from the cache or by encoding it (and
+        storing it in the cache).
+
+        :param byte slave_address: Slave address.
+        :param byte command_id: Command ID.
+        :param bytes-like data: Payload (can be empty).
+        :return: The raw frame, or ``None`` if the frame is not cached (the
+                 command didn't opt in, or the payload is too long).
+        :rtype: bytes
+        """
+        if not isinstance(data, bytes):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        if len(data) and (command_id not in self._command_ids or
+                          len(data) > self._max_payload_length):
+            return None
+        key = (slave_address, command_id, data)
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._hits += 1
+            self._frames.move_to_end(key)
+            return frame
+        self._misses += 1
+        frame = ShdlcSerialMosiFrameBuilder(
+            slave_address, command_id, data).to_bytes()
+        self._frames[key] = frame
+        if len(self._frames) > self._max_size:
+            self._frames.popitem(last=False)
+        return frame
+
+    def clear(self):
+        """
+        Remove all cached frames and reset the hit and miss counters.
+        """
+        self._frames.clear()
+        self._hits = 0
+        self._misses = 0
@@ -0,0 +1,546 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .port import ShdlcSerialPort
+from .serial_frame_builder import ShdlcSerialMosiFrameBuilder, \
+    ShdlcSerialMisoFrameBuilder
+from .errors import ShdlcError, ShdlcResponseError, ShdlcTimeoutError
+from collections import deque
+from threading import Condition, Event, Lock, Thread
+import argparse
+import selectors
+import socket
+import sys
+
+import logging
+log = logging.getLogger(__name__)
+
+_START_STOP = 0x7E
+_BROADCAST_ADDRESS = 0xFF
+_READ_CHUNK_SIZE = 4096
+
+
+class _Bus(object):
+    """
+    A port served by the gateway, with its listening socket and scheduler.
+    """
+
+    def __init__(self, port, server, response_timeout):
+        super(_Bus, self).__init__()
+        self.port = port
+        self.server = server
+        self.address = server.getsockname()[:2]
+        self.response_timeout = response_timeout
+        self.condition = Condition()
+        self.ready = deque()  # Clients with queued requests (round-robin)
+        self.clients = set()
+        self.thread = None
+
+
+class _Client(object):
+    """
+    A client connected to a bus of the gateway.
+    """
+
+    def __init__(self, bus, connection):
+        super(_Client, self).__init__()
+        self.bus = bus
+        self.connection = connection
+        self.rx = bytearray()
+        self.tx = bytearray()
+        self.requests = deque()
+        self.paused = False
+        self.closed = False
+
+
+class ShdlcTcpGateway(object):
+    """
+    SHDLC-over-TCP gateway server which exposes ports (e.g.
+    :py:class:`~sensirion_shdlc_driver.port.ShdlcSerialPort`) to TCP clients
+    like :py:class:`~sensirion_shdlc_driver.port.ShdlcTcpPort`, i.e. a
+    software replacement for serial-to-Ethernet gateway hardware.
+
+    Clients send raw SHDLC request frames and receive the raw response frames
+    as they were received from the device. Requests to devices which don't
+    respond in time or with an invalid frame are not answered, so the client
+    runs into its timeout as with a real gateway.
+
+    Any number of ports can be added, each listening on its own TCP port, and
+    each accepting any number of clients. One thread handles the network
+    traffic of all ports with :py:mod:`selectors`, while each port gets a
+    worker thread which executes the requests. The worker serves the clients
+    round-robin, one request per client at a time, so a client sending many
+    requests at once can't starve the others. The requests of a client are
+    executed in order. If a client has ``max_pending`` requests queued, no
+    more data is read from it until the worker has caught up.
+
+    Broadcast frames (slave address 255) are sent without waiting for a
+    response.
+
+    The gateway can also be started on the command line with
+    ``shdlc-gateway``.
+
+    .. note:: This class can be used in a "with"-statement, and it's
+              recommended to do so as it automatically stops the gateway.
+              The ports are not closed when stopping.
+    """
+
+    def __init__(self, max_pending=64):
+        """
+        Start the network thread. Ports are added with
+        :py:meth:`~sensirion_shdlc_driver.gateway.ShdlcTcpGateway.add_port`.
+
+        :param int max_pending: Maximum number of queued requests per client.
+        """
+        super(ShdlcTcpGateway, self).__init__()
+        self._max_pending = int(max_pending)
+        self._buses = []
+        self._selector = selectors.DefaultSelector()
+        self._calls = deque()  # Functions to call in the network thread
+        self._calls_lock = Lock()
+        self._stopped = Event()
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self._selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+        self._thread = Thread(target=self._network_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def addresses(self):
+        """
+        Get the addresses the ports are served on, in the order they were
+        added.
+
+        :return: List of ``(host, tcp_port)`` tuples.
+        :rtype: list
+        """
+        return [bus.address for bus in self._buses]
+
+    @property
+    def client_count(self):
+        """
+        Get the number of connected clients of all ports.
+
+        :return: Number of clients.
+        :rtype: int
+        """
+        return sum(len(bus.clients) for bus in self._buses)
+
+    @property
+    def queue_length(self):
+        """
+        Get the number of requests of all ports waiting to be executed.
+
+        :return: Number of queued requests.
+        :rtype: int
+        """
+        length = 0
+        for bus in self._buses:
+            with bus.condition:
+                length += sum(len(client.requests) for client in bus.ready)
+        return length
+
+    def add_port(self, port, host='localhost', tcp_port=0,
+                 response_timeout=1.0, backlog=128):
+        """
+        Serve a port on a TCP port.
+
+        :param ~sensirion_shdlc_driver.port.ShdlcPort port: The port to
+            serve. It must be open.
+        :param string host: Host name or IP address to listen on, e.g.
+            ``'0.0.0.0'`` for all interfaces.
+        :param int tcp_port: TCP port to listen on, or 0 to choose a free one.
+        :param float response_timeout: Response timeout in seconds passed to
+            the port. Since the gateway doesn't know the executed commands, it
+            must cover the slowest command.
+        :param int backlog: Maximum number of pending connections. The
+            default is large enough that the connections of many clients
+            connecting at once (e.g. from a
+            :py:class:`~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEngine`)
+            are not dropped.
+        :return: The address the port is served on.
+        :rtype: tuple
+        """
+        if self._stopped.is_set():
+            raise ShdlcError("ShdlcTcpGateway is stopped.")
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((host, tcp_port))
+            server.listen(backlog)
+            server.setblocking(False)
+        except Exception:
+            server.close()
+            raise
+        bus = _Bus(port, server, float(response_timeout))
+        bus.thread = Thread(target=self._worker_loop, args=(bus,))
+        bus.thread.daemon = True
+        bus.thread.start()
+        self._buses.append(bus)
+        self._call_soon(self._selector.register, server,
+                        selectors.EVENT_READ, bus)
+        log.info("ShdlcTcpGateway serves '{}' on {}:{}."
+                 .format(port.description, *bus.address))
+        return bus.address
+
+    def serve_forever(self):
+        """
+        Block until the gateway is stopped (e.g. by another thread).
+        """
+        while not self._stopped.wait(1.0):
+            pass
+
+    def stop(self):
+        """
+        Disconnect all clients and stop the threads. Does nothing if the
+        gateway is already stopped.
+        """
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup()
+        self._thread.join()
+        for bus in self._buses:
+            with bus.condition:
+                bus.condition.notify_all()
+            bus.thread.join()
+        self._selector.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def _call_soon(self, function, *args):
+        """
+        Call a function in the network thread.
+
+        :param callable function: The function.
+        :param args: Its arguments.
+        """
+        with self._calls_lock:
+            self._calls.append((function, args))
+        self._wakeup()
+
+    def _wakeup(self):
+        """
+        Wake up the network thread.
+        """
+        try:
+            self._wakeup_sender.send(b"\x00")
+        except (BlockingIOError, InterruptedError):
+            pass  # Already woken up
+
+    def _network_loop(self):
+        """
+        Thread handling all sockets.
+        """
+        while not self._stopped.is_set():
+            for key, events in self._selector.select():
+                if key.fileobj is self._wakeup_receiver:
+                    self._handle_wakeup()
+                elif isinstance(key.data, _Bus):
+                    self._accept(key.data)
+                else:
+                    if events & selectors.EVENT_READ:
+                        self._read(key.data)
+                    if events & selectors.EVENT_WRITE:
+                        self._flush(key.data)
+        for bus in self._buses:
+            for client in list(bus.clients):
+                self._close_client(client)
+            bus.server.close()
+
+    def _handle_wakeup(self):
+        """
+        Run all functions passed to
+        :py:meth:`~sensirion_shdlc_driver.gateway.ShdlcTcpGateway._call_soon`.
+        """
+        try:
+            while self._wakeup_receiver.recv(_READ_CHUNK_SIZE):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._calls_lock:
+            calls = list(self._calls)
+            self._calls.clear()
+        for function, args in calls:
+            function(*args)
+
+    def _accept(self, bus):
+        """
+        Accept a new client connection.
+
+        :param _Bus bus: The bus whose server socket is readable.
+        """
+        try:
+            connection, address = bus.server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        connection.setblocking(False)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = _Client(bus, connection)
+        bus.clients.add(client)
+        self._selector.register(connection, selectors.EVENT_READ, client)
+        log.debug("ShdlcTcpGateway accepted client {}:{} on {}:{}."
+                  .format(address[0], address[1], *bus.address))
+
+    def _read(self, client):
+        """
+        Receive data from a client and queue the contained request frames.
+
+        :param _Client client: The client.
+        """
+        try:
+            data = client.connection.recv(_READ_CHUNK_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except (socket.error, OSError) as e:
+            log.debug("ShdlcTcpGateway client connection failed: {}"
+                      .format(e))
+            data = b""
+        if len(data) == 0:
+            self._close_client(client)
+            return
+        client.rx += data
+        requests = self._extract_requests(client)
+        if len(requests) == 0:
+            return
+        bus = client.bus
+        with bus.condition:
+            if len(client.requests) == 0:
+                bus.ready.append(client)
+            client.requests.extend(requests)
+            client.paused = len(client.requests) >= self._max_pending
+            bus.condition.notify()
+        if client.paused:
+            self._update_events(client)
+
+    def _extract_requests(self, client):
+        """
+        Remove all complete frames from the receive buffer of a client.
+        Invalid frames and data outside of frames are discarded. The stop byte
+        of an invalid frame is kept as start byte of the next frame, so a
+        request following rubbish which contains a start/stop byte is not
+        lost.
+
+        :param _Client client: The client.
+        :return: List of ``(slave_address, command_id, data)`` tuples.
+        :rtype: list
+        """
+        requests = []
+        rx = client.rx
+        while True:
+            start = rx.find(_START_STOP)
+            if start < 0:
+                del rx[:]
+                break
+            end = rx.find(_START_STOP, start + 1)
+            if end < 0:
+                del rx[:start]
+                if len(rx) > \
+                        ShdlcSerialMosiFrameBuilder._MAX_RAW_FRAME_LENGTH:
+                    del rx[:]  # No frame can be that long
+                break
+            if end == start + 1:
+                del rx[:end]  # Consecutive start/stop bytes
+                continue
+            request = ShdlcSerialMosiFrameBuilder.decode(rx[start:end + 1])
+            if request is None:
+                log.debug("ShdlcTcpGateway discards invalid frame.")
+                del rx[:end]  # Stop byte may be the start of the next frame
+            else:
+                requests.append(request)
+                del rx[:end + 1]
+        return requests
+
+    def _send(self, client, frame):
+        """
+        Send a response frame to a client.
+
+        :param _Client client: The client.
+        :param bytes frame: The raw frame.
+        """
+        if client.closed:
+            return
+        client.tx += frame
+        self._flush(client)
+
+    def _flush(self, client):
+        """
+        Send as much buffered data to a client as possible without blocking.
+
+        :param _Client client: The client.
+        """
+        if client.closed:
+            return
+        try:
+            sent = client.connection.send(client.tx)
+            del client.tx[:sent]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except (socket.error, OSError) as e:
+            log.debug("ShdlcTcpGateway failed to send response: {}"
+                      .format(e))
+            self._close_client(client)
+            return
+        self._update_events(client)
+
+    def _resume(self, client):
+        """
+        Read from a client again after its queue was drained.
+
+        :param _Client client: The client.
+        """
+        with client.bus.condition:
+            client.paused = len(client.requests) >= self._max_pending
+        self._update_events(client)
+
+    def _update_events(self, client):
+        """
+        Select the events to wait for on a client connection.
+
+        :param _Client client: The client.
+        """
+        if client.closed:
+            return
+        events = 0 if client.paused else selectors.EVENT_READ
+        if len(client.tx):
+            events |= selectors.EVENT_WRITE
+        if events == 0:
+            try:
+                self._selector.unregister(client.connection)
+            except KeyError:
+                pass  # Already unregistered
+            return
+        try:
+            self._selector.modify(client.connection, events, client)
+        except KeyError:
+            self._selector.register(client.connection, events, client)
+
+    def _close_client(self, client):
+        """
+        Close the connection to a client. Its queued requests are skipped.
+
+        :param _Client client: The client.
+        """
+        if client.closed:
+            return
+        bus = client.bus
+        with bus.condition:
+            client.closed = True
+            client.requests.clear()
+            if client in bus.ready:
+                bus.ready.remove(client)
+        bus.clients.discard(client)
+        try:
+            self._selector.unregister(client.connection)
+        except KeyError:
+            pass  # Paused without pending data
+        client.connection.close()
+
+    def _worker_loop(self, bus):
+        """
+        Thread executing the requests of the clients of a bus round-robin.
+
+        :param _Bus bus: The bus.
+        """
+        while True:
+            with bus.condition:
+                while len(bus.ready) == 0 and not self._stopped.is_set():
+                    bus.condition.wait()
+                if self._stopped.is_set():
+                    return
+                client = bus.ready.popleft()
+                request = client.requests.popleft()
+                if len(client.requests):
+                    bus.ready.append(client)  # Next turn after the others
+                resume = client.paused and \
+                    len(client.requests) < self._max_pending
+            if resume:
+                self._call_soon(self._resume, client)
+            response = self._execute(bus, request)
+            if response is not None:
+                self._call_soon(self._send, client, response)
+
+    @staticmethod
+    def _execute(bus, request):
+        """
+        Execute a request on the port of a bus.
+
+        :param _Bus bus: The bus.
+        :param tuple request: Slave address, command ID and data.
+        :return: The raw response frame, or ``None`` if there is no response.
+        :rtype: bytes
+        """
+        slave_address, command_id, data = request
+        try:
+            if slave_address == _BROADCAST_ADDRESS:
+                bus.port.send_frames([request])
+                return None
+            address, command, state, payload = bus.port.transceive(
+                slave_address, command_id, data, bus.response_timeout)
+        except ShdlcTimeoutError:
+            log.debug("ShdlcTcpGateway got no response from slave {} for "
+                      "command 0x{:02X}.".format(slave_address, command_id))
+            return None
+        except ShdlcResponseError as e:
+            log.debug("ShdlcTcpGateway got invalid response: {}".format(e))
+            return None
+        except Exception as e:
+            log.warning("ShdlcTcpGateway request failed: {}".format(e))
+            return None
+        return ShdlcSerialMisoFrameBuilder.encode(address, command, state,
+                                                  payload)
+
+
+def main(argv=None):
+    """
+    Command line interface to serve serial ports through a gateway.
+
+    :param list argv: Command line arguments (defaults to ``sys.argv``).
+    :return: Exit code.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve SHDLC serial ports over TCP.")
+    parser.add_argument("ports", nargs="+", metavar="PORT:TCP_PORT",
+                        help="serial port and TCP port, e.g. "
+                             "/dev/ttyUSB0:10001")
+    parser.add_argument("--host", default="0.0.0.0",
+                        help="address to listen on")
+    parser.add_argument("--baudrate", type=int, default=115200,
+                        help="bitrate of the serial ports")
+    parser.add_argument("--response-timeout", type=float, default=1.0,
+                        help="response timeout in seconds")
+    args = parser.parse_args(argv)
+    ports = []
+    try:
+        with ShdlcTcpGateway() as gateway:
+            for spec in args.ports:
+                device, _, tcp_port = spec.rpartition(":")
+                if not device or not tcp_port.isdigit():
+                    parser.error("invalid port '{}'".format(spec))
+                ports.append(ShdlcSerialPort(device, args.baudrate))
+                gateway.add_port(ports[-1], args.host, int(tcp_port),
+                                 args.response_timeout)
+            gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (IOError, OSError, ShdlcError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+    finally:
+        for port in ports:
+            port.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
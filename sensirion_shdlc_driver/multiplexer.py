@@ -0,0 +1,714 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .port import ShdlcPort, ShdlcSerialPort, _transceive
+from .errors import ShdlcConnectionLostError, ShdlcError, \
+    ShdlcResponseError, ShdlcTimeoutError
+from itertools import count
+from queue import PriorityQueue
+from threading import Event, Lock, RLock, Thread
+import argparse
+import os
+import socket
+import stat
+import struct
+import sys
+
+import logging
+log = logging.getLogger(__name__)
+
+# Request: kind, request ID, priority, slave address, command ID, maximum
+# response length (0xFFFF = unknown), response timeout, data length.
+_REQUEST_HEADER = struct.Struct("<BIbBBHdH")
+# Response: request ID, status, address, command ID, state, data length.
+_RESPONSE_HEADER = struct.Struct("<IBBBBH")
+_BITRATE = struct.Struct("<I")
+
+_KIND_TRANSCEIVE = 0
+_KIND_GET_INFO = 1
+_KIND_SET_BITRATE = 2
+_KIND_SEND_FRAMES = 3
+
+_STATUS_OK = 0
+_STATUS_TIMEOUT = 1
+_STATUS_RESPONSE_ERROR = 2
+_STATUS_ERROR = 3
+_STATUS_CONNECTION_LOST = 4
+
+_UNKNOWN_LENGTH = 0xFFFF
+_MAX_DATA_LENGTH = 0xFFFF
+
+
+def _encode_frames(frames):
+    """
+    Encode frames for a "send frames" request.
+
+    :param list frames: Sequence of ``(slave_address, command_id, data)``
+                        tuples.
+    :return: The encoded frames.
+    :rtype: bytes
+    :raise ValueError: If a value is out of range, or the frames are too
+                       long for one request.
+    """
+    encoded = bytearray()
+    for slave_address, command_id, data in frames:
+        data = bytes(bytearray(data))
+        encoded += bytearray([slave_address, command_id, len(data)]) + data
+    if len(encoded) > _MAX_DATA_LENGTH:
+        raise ValueError("Frames too long for one multiplexer request ({} "
+                         "bytes).".format(len(encoded)))
+    return bytes(encoded)
+
+
+def _decode_frames(data):
+    """
+    Decode the frames of a "send frames" request.
+
+    :param bytes data: The encoded frames.
+    :return: List of ``(slave_address, command_id, data)`` tuples.
+    :rtype: list
+    :raise ValueError: If the data is truncated.
+    """
+    data = bytearray(data)
+    frames = []
+    offset = 0
+    while offset < len(data):
+        if offset + 3 > len(data) or offset + 3 + data[offset + 2] > len(data):
+            raise ValueError("Truncated frame at offset {}.".format(offset))
+        end = offset + 3 + data[offset + 2]
+        frames.append((data[offset], data[offset + 1],
+                       bytes(data[offset + 3:end])))
+        offset = end
+    return frames
+
+
+def _recv_exactly(sock, length):
+    """
+    Receive an exact number of bytes from a socket.
+
+    :param socket.socket sock: The socket.
+    :param int length: Number of bytes to receive.
+    :return: The received bytes, or ``None`` if the connection was closed.
+    :rtype: bytes
+    """
+    data = bytearray()
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if len(chunk) == 0:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+class _Client(object):
+    """
+    A client connected to the multiplexer.
+    """
+
+    def __init__(self, connection):
+        super(_Client, self).__init__()
+        self.connection = connection
+        self.closed = False
+
+
+class ShdlcMultiplexer(object):
+    """
+    Broker which owns an SHDLC port and shares it with other processes
+    through a Unix domain socket.
+
+    Clients connect with
+    :py:class:`~sensirion_shdlc_driver.multiplexer.ShdlcMultiplexerPort`. All
+    requests of all clients are put into one priority queue and executed one
+    after the other by a single worker thread, so the port is kept open and
+    the bus is used back-to-back without collisions. Requests with a higher
+    priority are executed first, requests with the same priority in the
+    order they were received.
+
+    The wire protocol consists of length-prefixed little-endian messages.
+    A request starts with a 20 bytes header:
+
+    - ``uint8``: Kind (0 = transceive, 1 = get info, 2 = set bitrate,
+      3 = send frames)
+    - ``uint32``: Request ID (echoed in the response)
+    - ``int8``: Priority
+    - ``uint8``: Slave address
+    - ``uint8``: Command ID
+    - ``uint16``: Maximum response length (0xFFFF = unknown)
+    - ``float64``: Response timeout in seconds
+    - ``uint16``: Length of the following data
+
+    The data of a "send frames" request consists of the frames to send, each
+    encoded as slave address, command ID, payload length and payload.
+
+    A response starts with a 10 bytes header:
+
+    - ``uint32``: Request ID
+    - ``uint8``: Status (0 = OK, 1 = timeout, 2 = response error, 3 = error,
+      4 = connection lost)
+    - ``uint8``: Slave address
+    - ``uint8``: Command ID
+    - ``uint8``: Device state
+    - ``uint16``: Length of the following data (payload or error message)
+
+    The multiplexer can also be started on the command line with
+    ``shdlc-multiplexer``.
+
+    .. note:: This class can be used in a "with"-statement, and it's
+              recommended to do so as it automatically stops the
+              multiplexer. The port is not closed when stopping.
+    """
+
+    def __init__(self, port, path, backlog=8):
+        """
+        Create the Unix domain socket and start the threads. A stale socket
+        file left over by a previous multiplexer is removed.
+
+        :param ~sensirion_shdlc_driver.port.ShdlcPort port: The port to share.
+        :param string path: Path of the Unix domain socket.
+        :param int backlog: Maximum number of pending connections.
+        """
+        super(ShdlcMultiplexer, self).__init__()
+        self._port = port
+        self._path = str(path)
+        self._queue = PriorityQueue()
+        self._sequence = count()
+        self._clients = set()
+        self._clients_lock = Lock()
+        self._stopped = Event()
+        if os.path.exists(self._path) and \
+                stat.S_ISSOCK(os.stat(self._path).st_mode):
+            os.unlink(self._path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self._path)
+        self._server.listen(backlog)
+        self._server.settimeout(0.1)  # To check for stop periodically
+        self._threads = [Thread(target=self._accept_loop),
+                         Thread(target=self._worker_loop)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+        log.info("ShdlcMultiplexer shares '{}' on '{}'."
+                 .format(port.description, self._path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def port(self):
+        """
+        Get the shared port.
+
+        :return: The port.
+        :rtype: ~sensirion_shdlc_driver.port.ShdlcPort
+        """
+        return self._port
+
+    @property
+    def path(self):
+        """
+        Get the path of the Unix domain socket.
+
+        :return: The path.
+        :rtype: string
+        """
+        return self._path
+
+    @property
+    def client_count(self):
+        """
+        Get the number of connected clients.
+
+        :return: Number of clients.
+        :rtype: int
+        """
+        with self._clients_lock:
+            return len(self._clients)
+
+    @property
+    def queue_length(self):
+        """
+        Get the number of requests waiting to be executed.
+
+        :return: Number of queued requests.
+        :rtype: int
+        """
+        return self._queue.qsize()
+
+    def serve_forever(self):
+        """
+        Block until the multiplexer is stopped (e.g. by another thread).
+        """
+        while not self._stopped.wait(1.0):
+            pass
+
+    def stop(self):
+        """
+        Disconnect all clients, stop the threads and remove the socket file.
+        Does nothing if the multiplexer is already stopped.
+        """
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._queue.put((float('-inf'), next(self._sequence), None))
+        for thread in self._threads:
+            thread.join()
+        self._server.close()
+        with self._clients_lock:
+            clients = list(self._clients)
+        for client in clients:
+            self._close_client(client)
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def _accept_loop(self):
+        """
+        Thread accepting new client connections.
+        """
+        while not self._stopped.is_set():
+            try:
+                connection, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            connection.settimeout(None)
+            client = _Client(connection)
+            with self._clients_lock:
+                self._clients.add(client)
+            thread = Thread(target=self._client_loop, args=(client,))
+            thread.daemon = True
+            thread.start()
+
+    def _client_loop(self, client):
+        """
+        Thread receiving the requests of a client and putting them into the
+        queue.
+
+        :param _Client client: The client.
+        """
+        try:
+            while True:
+                header = _recv_exactly(client.connection, _REQUEST_HEADER.size)
+                if header is None:
+                    break
+                request = _REQUEST_HEADER.unpack(header)
+                data = _recv_exactly(client.connection, request[-1])
+                if data is None:
+                    break
+                priority = request[2]
+                self._queue.put((-priority, next(self._sequence),
+                                 (client, request, data)))
+        except (socket.error, OSError) as e:
+            log.debug("ShdlcMultiplexer client connection failed: {}"
+                      .format(e))
+        finally:
+            self._close_client(client)
+
+    def _close_client(self, client):
+        """
+        Close the connection to a client. Its queued requests are skipped.
+
+        :param _Client client: The client.
+        """
+        with self._clients_lock:
+            self._clients.discard(client)
+            if client.closed:
+                return
+            client.closed = True
+        try:
+            client.connection.shutdown(socket.SHUT_RDWR)
+        except (socket.error, OSError):
+            pass
+        client.connection.close()
+
+    def _worker_loop(self):
+        """
+        Thread executing the queued requests one after the other.
+        """
+        while True:
+            _, _, item = self._queue.get()
+            if item is None:
+                break
+            client, request, data = item
+            if client.closed:
+                continue
+            response = self._execute(request, data)
+            try:
+                client.connection.sendall(response)
+            except (socket.error, OSError) as e:
+                log.debug("ShdlcMultiplexer failed to send response: {}"
+                          .format(e))
+                self._close_client(client)
+
+    def _execute(self, request, data):
+        """
+        Execute a request on the port.
+
+        :param tuple request: The unpacked request header.
+        :param bytes data: The request data.
+        :return: The response message.
+        :rtype: bytes
+        """
+        kind, request_id, _, slave_address, command_id, max_response_length, \
+            response_timeout, _ = request
+        address, command, state, payload = slave_address, command_id, 0, b""
+        status = _STATUS_OK
+        try:
+            if kind == _KIND_TRANSCEIVE:
+                if max_response_length == _UNKNOWN_LENGTH:
+                    max_response_length = None
+                address, command, state, payload = _transceive(
+                    self._port, slave_address, command_id, data,
+                    response_timeout, max_response_length)
+            elif kind == _KIND_GET_INFO:
+                with self._port.lock:
+                    payload = _BITRATE.pack(self._port.bitrate) + \
+                        self._port.description.encode('utf-8')
+            elif kind == _KIND_SET_BITRATE:
+                self._port.bitrate = _BITRATE.unpack(data)[0]
+            elif kind == _KIND_SEND_FRAMES:
+                self._port.send_frames(_decode_frames(data))
+            else:
+                raise ShdlcError("Unknown multiplexer request kind {}."
+                                 .format(kind))
+        except ShdlcConnectionLostError as e:
+            status = _STATUS_CONNECTION_LOST
+            payload = e.reason.encode('utf-8')
+        except ShdlcTimeoutError:
+            status = _STATUS_TIMEOUT
+        except ShdlcResponseError as e:
+            status = _STATUS_RESPONSE_ERROR
+            payload = e.error_message.encode('utf-8')
+        except Exception as e:
+            log.warning("ShdlcMultiplexer request failed: {}".format(e))
+            status = _STATUS_ERROR
+            payload = (str(e) or type(e).__name__).encode('utf-8')
+        payload = bytes(payload)
+        return _RESPONSE_HEADER.pack(request_id, status, address, command,
+                                     state, len(payload)) + payload
+
+
+class ShdlcMultiplexerPort(ShdlcPort):
+    """
+    SHDLC port which sends all frames through a
+    :py:class:`~sensirion_shdlc_driver.multiplexer.ShdlcMultiplexer`, i.e. it
+    shares the port of the multiplexer with other processes.
+
+    .. note:: The lock of this port only serializes the threads of this
+              process. Sequences of commands which need exclusive access to
+              the bus (e.g. a firmware update) can still be interleaved with
+              requests of other clients.
+
+    .. note:: This class can be used in a "with"-statement, and it's
+              recommended to do so as it automatically closes the port after
+              using it.
+    """
+
+    def __init__(self, path, priority=0, socket_timeout=5.0, do_open=True):
+        """
+        Create and optionally connect to the multiplexer.
+
+        :param string path: Path of the Unix domain socket of the multiplexer.
+        :param int priority: Priority of the requests (-128..127). Requests
+            with a higher priority are executed first.
+        :param float socket_timeout: Base timeout in seconds for waiting for
+            a response of the multiplexer. It must cover the time the request
+            waits in the queue of the multiplexer. The actual timeout is
+            increased with the parameter ``response_timeout`` of
+            :py:meth:`~sensirion_shdlc_driver.multiplexer.ShdlcMultiplexerPort.transceive`.
+        :param bool do_open:
+            Whether the port should be opened immediately or not. If ``False``,
+            you will have to call
+            :py:meth:`~sensirion_shdlc_driver.multiplexer.ShdlcMultiplexerPort.open`
+            manually before using this object. Defaults to ``True``.
+        :raise ValueError: If the priority is out of range.
+        """
+        super(ShdlcMultiplexerPort, self).__init__()
+        self._path = str(path)
+        self._priority = self._check_priority(priority)
+        self._socket_timeout = float(socket_timeout)
+        self._lock = RLock()
+        self._socket = None
+        self._request_id = 0
+        if do_open:
+            self.open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def description(self):
+        """
+        Get the description of the shared port and the multiplexer socket.
+
+        :return: Description string.
+        :rtype: string
+        """
+        with self._lock:
+            _, description = self._get_info()
+            return '{} via {}'.format(description, self._path)
+
+    @property
+    def bitrate(self):
+        """
+        The current bitrate of the shared port in bit/s. Note that changing
+        the bitrate affects all clients of the multiplexer.
+
+        :type: int
+        """
+        with self._lock:
+            bitrate, _ = self._get_info()
+            return bitrate
+
+    @bitrate.setter
+    def bitrate(self, bitrate):
+        with self._lock:
+            self._request(_KIND_SET_BITRATE, 0, 0, _BITRATE.pack(bitrate), 0.0,
+                          None)
+
+    @property
+    def priority(self):
+        """
+        The priority of the requests (-128..127). Requests with a higher
+        priority are executed first.
+
+        :type: int
+        """
+        with self._lock:
+            return self._priority
+
+    @priority.setter
+    def priority(self, priority):
+        with self._lock:
+            self._priority = self._check_priority(priority)
+
+    @property
+    def socket_timeout(self):
+        """
+        The base timeout in seconds for waiting for a response of the
+        multiplexer. The actual timeout is increased with the parameter
+        ``response_timeout`` of
+        :py:meth:`~sensirion_shdlc_driver.multiplexer.ShdlcMultiplexerPort.transceive`.
+
+        :type: float
+        """
+        with self._lock:
+            return self._socket_timeout
+
+    @socket_timeout.setter
+    def socket_timeout(self, socket_timeout):
+        with self._lock:
+            self._socket_timeout = float(socket_timeout)
+
+    @property
+    def lock(self):
+        """
+        Get the lock object of the port to allow locking it, i.e. to get
+        exclusive access across multiple method calls.
+
+        :return: The lock object.
+        :rtype: threading.RLock
+        """
+        return self._lock
+
+    @property
+    def is_open(self):
+        """
+        Indicates whether the port is open.
+
+        :return: If ``True`` the port is open, if ``False`` the port is closed.
+        :rtype: bool
+        """
+        return self._socket is not None
+
+    @staticmethod
+    def _check_priority(priority):
+        """
+        Check if a priority is valid.
+
+        :param int priority: The value to check.
+        :return: The value.
+        :rtype: int
+        :raise ValueError: If the value is out of range.
+        """
+        priority = int(priority)
+        if not -128 <= priority <= 127:
+            raise ValueError("Priority must be in range -128..127, not {}."
+                             .format(priority))
+        return priority
+
+    def open(self):
+        """
+        Connect to the multiplexer. Does nothing if already connected.
+        """
+        with self._lock:
+            if self._socket is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self._path)
+                except Exception:
+                    sock.close()
+                    raise
+                self._socket = sock
+
+    def close(self):
+        """
+        Disconnect from the multiplexer. Does nothing if already closed.
+        """
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        """
+        Send SHDLC frame through the multiplexer and return received response
+        frame.
+
+        :param byte slave_address: Slave address.
+        :param byte command_id: SHDLC command ID.
+        :param bytes-like data: Payload.
+        :param float response_timeout: Response timeout in seconds (maximum
+                                       time until the first byte is received).
+        :param byte max_response_length: Maximum expected response payload
+            length, passed to the shared port.
+        :return: Received address, command_id, state, and payload.
+        :rtype: byte, byte, byte, bytes
+        :raise ~sensirion_shdlc_driver.errors.ShdlcTimeoutError:
+            If no response received within timeout.
+        :raise ~sensirion_shdlc_driver.errors.ShdlcConnectionLostError:
+            If the connection to the multiplexer (or of the shared port) was
+            lost.
+        :raise ~sensirion_shdlc_driver.errors.ShdlcResponseError:
+            If the received response is invalid.
+        """
+        with self._lock:
+            return self._request(_KIND_TRANSCEIVE, slave_address, command_id,
+                                 data, response_timeout, max_response_length)
+
+    def send_frames(self, frames):
+        """
+        Send multiple SHDLC frames at once without waiting for responses, e.g.
+        broadcast frames or frames to devices which do not respond. The frames
+        are passed in one request to the shared port, so they are not
+        interleaved with requests of other clients. Returns after the shared
+        port has sent them.
+
+        :param list frames: Sequence of ``(slave_address, command_id, data)``
+                            tuples.
+        :raise ValueError: If a frame is invalid, or the frames don't fit into
+                           one request (64 kB).
+        """
+        data = _encode_frames(frames)
+        with self._lock:
+            self._request(_KIND_SEND_FRAMES, 0, 0, data, 0.0, None)
+
+    def _connection_lost(self, reason):
+        """
+        Close the socket after the connection to the multiplexer was lost.
+
+        :param reason: The reason (e.g. the exception which occurred).
+        :return: The exception to raise.
+        :rtype: ~sensirion_shdlc_driver.errors.ShdlcConnectionLostError
+        """
+        log.warning("ShdlcMultiplexerPort lost connection to '{}': {}"
+                    .format(self._path, reason))
+        self.close()
+        return ShdlcConnectionLostError("{} ('{}')".format(reason,
+                                                           self._path))
+
+    def _get_info(self):
+        """
+        Get the bitrate and the description of the shared port.
+
+        :return: Bitrate and description.
+        :rtype: int, string
+        """
+        _, _, _, payload = self._request(_KIND_GET_INFO, 0, 0, b"", 0.0, None)
+        return _BITRATE.unpack(payload[:_BITRATE.size])[0], \
+            payload[_BITRATE.size:].decode('utf-8')
+
+    def _request(self, kind, slave_address, command_id, data, response_timeout,
+                 max_response_length):
+        """
+        Send a request to the multiplexer and wait for its response.
+        Responses of previous requests which timed out are discarded.
+
+        :return: Received address, command_id, state, and payload.
+        :rtype: byte, byte, byte, bytes
+        """
+        if self._socket is None:
+            raise ShdlcError("ShdlcMultiplexerPort is not open.")
+        self._request_id = (self._request_id + 1) & 0xFFFFFFFF
+        data = bytes(data)
+        if max_response_length is None:
+            max_response_length = _UNKNOWN_LENGTH
+        self._socket.settimeout(self._socket_timeout + response_timeout)
+        try:
+            self._socket.sendall(_REQUEST_HEADER.pack(
+                kind, self._request_id, self._priority, slave_address,
+                command_id, max_response_length, response_timeout,
+                len(data)) + data)
+            while True:
+                header = _recv_exactly(self._socket, _RESPONSE_HEADER.size)
+                if header is None:
+                    raise self._connection_lost("closed by the multiplexer")
+                request_id, status, address, command, state, length = \
+                    _RESPONSE_HEADER.unpack(header)
+                payload = _recv_exactly(self._socket, length)
+                if payload is None:
+                    raise self._connection_lost("closed by the multiplexer")
+                if request_id == self._request_id:
+                    break
+                log.debug("ShdlcMultiplexerPort discards response of request "
+                          "{}.".format(request_id))
+        except socket.timeout:
+            raise ShdlcTimeoutError()
+        except (socket.error, OSError) as e:
+            raise self._connection_lost(e)
+        if status == _STATUS_TIMEOUT:
+            raise ShdlcTimeoutError()
+        elif status == _STATUS_CONNECTION_LOST:
+            raise ShdlcConnectionLostError(payload.decode('utf-8'))
+        elif status == _STATUS_RESPONSE_ERROR:
+            raise ShdlcResponseError(payload.decode('utf-8'))
+        elif status != _STATUS_OK:
+            raise ShdlcError(payload.decode('utf-8'))
+        return address, command, state, payload
+
+
+def main(argv=None):
+    """
+    Command line interface to share a serial port through a multiplexer.
+
+    :param list argv: Command line arguments (defaults to ``sys.argv``).
+    :return: Exit code.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        description="Share an SHDLC serial port with multiple processes.")
+    parser.add_argument("port", help="serial port, e.g. /dev/ttyUSB0")
+    parser.add_argument("socket", help="path of the Unix domain socket")
+    parser.add_argument("--baudrate", type=int, default=115200,
+                        help="bitrate of the serial port")
+    args = parser.parse_args(argv)
+    try:
+        with ShdlcSerialPort(args.port, args.baudrate) as port:
+            with ShdlcMultiplexer(port, args.socket) as multiplexer:
+                multiplexer.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (IOError, OSError, ShdlcError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,21 @@
 # (c) Copyright 2019 Sensirion AG, Switzerland
 
 from __future__ import absolute_import, division, print_function
-from .errors import ShdlcTimeoutError
+from .batch_frame_builder import ShdlcSerialMosiBatchFrameBuilder
+from .commands.system_up_time import ShdlcCmdGetSystemUpTime
+from .errors import ShdlcConnectionLostError, ShdlcResponseError, \
+    ShdlcTimeoutError
+from .frame_cache import ShdlcFrameCache
+from .wire_trace import ShdlcWireTrace
 from .serial_frame_builder import ShdlcSerialMosiFrameBuilder, \
-    ShdlcSerialMisoFrameBuilder
+    ShdlcSerialMisoFrameDecoder, ShdlcSerialMisoFrameStream
+from collections import deque
 from threading import RLock
+import errno
+import inspect
+import math
+import os
+import select
 import serial
 import socket
 import time
@@ -13,6 +24,55 @@ import time
 import logging
 log = logging.getLogger(__name__)
 
+# Size of the transmit buffer, i.e. the maximum raw frame length.
+_TX_BUFFER_SIZE = ShdlcSerialMosiFrameBuilder._MAX_RAW_FRAME_LENGTH
+
+# Whether a transceive() implementation accepts max_response_length, per
+# function.
+_MAX_RESPONSE_LENGTH_SUPPORT = {}
+
+
+def _accepts_max_response_length(transceive):
+    """
+    Check if a transceive() method accepts the keyword argument
+    ``max_response_length``, which was added after the interface was
+    published.
+
+    :param callable transceive: The (bound) method.
+    :return: Whether the keyword argument is accepted.
+    :rtype: bool
+    """
+    key = getattr(transceive, '__func__', transceive)
+    supported = _MAX_RESPONSE_LENGTH_SUPPORT.get(key)
+    if supported is None:
+        try:
+            parameters = inspect.signature(transceive).parameters.values()
+        except (TypeError, ValueError):
+            parameters = []
+        supported = any(p.name == 'max_response_length' or
+                        p.kind == p.VAR_KEYWORD for p in parameters)
+        _MAX_RESPONSE_LENGTH_SUPPORT[key] = supported
+    return supported
+
+
+def _transceive(port, slave_address, command_id, data, response_timeout,
+                max_response_length=None):
+    """
+    Call :py:meth:`~sensirion_shdlc_driver.port.ShdlcPort.transceive` of a
+    port, passing ``max_response_length`` only if it is known and the port
+    accepts it, so custom ports implementing the original signature keep
+    working.
+
+    :return: Received address, command_id, state, and payload.
+    :rtype: byte, byte, byte, bytes
+    """
+    if max_response_length is not None and \
+            _accepts_max_response_length(port.transceive):
+        return port.transceive(slave_address, command_id, data,
+                               response_timeout,
+                               max_response_length=max_response_length)
+    return port.transceive(slave_address, command_id, data, response_timeout)
+
 
 class ShdlcPort(object):
     """
@@ -23,6 +83,10 @@ class ShdlcPort(object):
     i.e. allowing them to be called from multiple threads at the same time.
     """
 
+    # Registered wire trace subscribers. Replaced (never modified) on changes,
+    # so the ports only need a single truth test to check if tracing is on.
+    _wire_traces = ()
+
     @property
     def description(self):
         """
@@ -67,6 +131,39 @@ class ShdlcPort(object):
         """
         raise NotImplementedError()
 
+    @property
+    def wire_traces(self):
+        """
+        Get the registered wire trace subscribers.
+
+        :return: The registered subscribers.
+        :rtype: tuple
+        """
+        return self._wire_traces
+
+    def add_wire_trace(self, wire_trace):
+        """
+        Register a wire trace subscriber which gets notified about every raw
+        frame sent or received by this port.
+
+        :param ~sensirion_shdlc_driver.wire_trace.ShdlcWireTrace wire_trace:
+            The subscriber to register.
+        """
+        with self.lock:
+            self._wire_traces = self._wire_traces + (wire_trace,)
+
+    def remove_wire_trace(self, wire_trace):
+        """
+        Unregister a wire trace subscriber. Does nothing if the subscriber is
+        not registered.
+
+        :param ~sensirion_shdlc_driver.wire_trace.ShdlcWireTrace wire_trace:
+            The subscriber to unregister.
+        """
+        with self.lock:
+            self._wire_traces = tuple(t for t in self._wire_traces
+                                      if t is not wire_trace)
+
     def open(self):
         """
         Open the port. Only needs to be called if the port is not already
@@ -81,7 +178,8 @@ class ShdlcPort(object):
         """
         raise NotImplementedError()
 
-    def transceive(self, slave_address, command_id, data, response_timeout):
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
         """
         Send SHDLC frame to port and return received response frame.
 
@@ -98,6 +196,10 @@ class ShdlcPort(object):
         :param bytes-like data: Payload.
         :param float response_timeout: Response timeout in seconds (maximum
                                        time until the first byte is received).
+        :param byte max_response_length: Maximum expected response payload
+            length, allowing implementations to limit the time budget for
+            receiving the response. ``None`` (default) means unknown, i.e.
+            up to 255 bytes.
         :return: Received address, command_id, state, and payload.
         :rtype: byte, byte, byte, bytes
         :raise ~sensirion_shdlc_driver.errors.ShdlcTimeoutError:
@@ -107,6 +209,86 @@ class ShdlcPort(object):
         """
         raise NotImplementedError()
 
+    def send_frames(self, frames):
+        """
+        Send multiple SHDLC frames at once without waiting for responses, e.g.
+        broadcast frames or frames to devices which do not respond.
+
+        :param list frames: Sequence of ``(slave_address, command_id, data)``
+                            tuples.
+        """
+        raise NotImplementedError()
+
+    def set_reply_delay(self, slave_address, reply_delay):
+        """
+        Notify the port about the reply delay configured in a slave (see
+        :py:meth:`~sensirion_shdlc_driver.device.ShdlcDevice.set_reply_delay`).
+        Ports which can't make use of it ignore it.
+
+        :param byte slave_address: Slave address.
+        :param int reply_delay: The reply delay of the slave [μs].
+        """
+        pass
+
+    def transceive_pipelined(self, requests):
+        """
+        Send multiple SHDLC frames and return the received response frames.
+
+        Implementations may send the frames without waiting for the previous
+        responses (see
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.transceive_pipelined`),
+        this default implementation just calls
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcPort.transceive` for each
+        request.
+
+        :param list requests: Sequence of ``(slave_address, command_id, data,
+            response_timeout, max_response_length)`` tuples, with the same
+            meaning as the parameters of
+            :py:meth:`~sensirion_shdlc_driver.port.ShdlcPort.transceive`.
+        :return: For each request either the received address, command_id,
+            state, and payload, or the
+            :py:class:`~sensirion_shdlc_driver.errors.ShdlcTimeoutError` or
+            :py:class:`~sensirion_shdlc_driver.errors.ShdlcResponseError`
+            which occurred.
+        :rtype: list
+        """
+        results = []
+        with self.lock:
+            for slave_address, command_id, data, response_timeout, \
+                    max_response_length in requests:
+                try:
+                    results.append(_transceive(
+                        self, slave_address, command_id, data,
+                        response_timeout, max_response_length))
+                except (ShdlcTimeoutError, ShdlcResponseError) as e:
+                    results.append(e)
+        return results
+
+    def _trace_frames(self, batch):
+        """
+        Notify all registered wire trace subscribers about the frames of a
+        batch.
+
+        :param ~sensirion_shdlc_driver.batch_frame_builder.ShdlcSerialMosiBatchFrameBuilder batch:
+            The sent frames.
+        """
+        raw = batch.to_bytes()
+        offsets = batch.offsets
+        for i in range(len(offsets) - 1):
+            self._trace(ShdlcWireTrace.MOSI, raw[offsets[i]:offsets[i + 1]])
+
+    def _trace(self, direction, data):
+        """
+        Notify all registered wire trace subscribers about a raw frame. Should
+        only be called if there are subscribers registered.
+
+        :param int direction: Direction of the frame.
+        :param bytes-like data: The raw frame.
+        """
+        timestamp = time.monotonic()
+        for wire_trace in self._wire_traces:
+            wire_trace.on_frame(self, direction, data, timestamp)
+
 
 class ShdlcSerialPort(ShdlcPort):
     """
@@ -119,8 +301,45 @@ class ShdlcSerialPort(ShdlcPort):
               using it.
     """
 
-    def __init__(self, port, baudrate, additional_response_time=0.1,
-                 do_open=True):
+    #: Receive mode which polls the serial port with a read timeout of 10ms.
+    RECEIVE_MODE_POLLING = 'polling'
+
+    #: Receive mode which waits on the file descriptor of the serial port
+    #: with ``select()`` until data arrives (POSIX only).
+    RECEIVE_MODE_SELECT = 'select'
+
+    #: Default value of
+    #: :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.frame_time_factor`.
+    DEFAULT_FRAME_TIME_FACTOR = 1.5
+
+    #: Default value of
+    #: :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.frame_time_margin`.
+    DEFAULT_FRAME_TIME_MARGIN = 0.05
+
+    #: Default value of
+    #: :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.additional_response_time`
+    #: if the port was not calibrated.
+    DEFAULT_ADDITIONAL_RESPONSE_TIME = 0.1
+
+    #: Low latency feature: The ``ASYNC_LOW_LATENCY`` flag of the serial
+    #: driver was set (Linux only, e.g. reduces the latency timer of FTDI
+    #: USB-UART converters from 16ms to 1ms).
+    LOW_LATENCY_ASYNC_FLAG = 'async_low_latency'
+
+    # Maximum number of bytes read at once in select receive mode.
+    _READ_CHUNK_SIZE = 1024
+
+    # Only responses to commands with a response timeout up to this value
+    # (i.e. commands which are executed immediately) are used to re-tune the
+    # additional response time.
+    _AUTO_TUNE_MAX_RESPONSE_TIMEOUT = 0.05
+
+    # Calibrated additional response times, per port description.
+    _calibrated_response_times = dict()
+
+    def __init__(self, port, baudrate, additional_response_time=None,
+                 do_open=True, receive_mode=RECEIVE_MODE_POLLING,
+                 resync_mode=False, low_latency=False, rs485_mode=None):
         """
         Create and optionally open a serial port. Throws an exception if the
         port cannot be opened.
@@ -130,25 +349,73 @@ class ShdlcSerialPort(ShdlcPort):
         :param float additional_response_time: Additional response time (in
             Seconds) used when receiving frames. See property
             :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.additional_response_time`
-            for details. Defaults to 0.1 (i.e. 100ms) which should be enough
-            in most cases.
+            for details. If ``None`` (default), the value determined by
+            :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.calibrate_additional_response_time`
+            is used if this port (name and bitrate) was already calibrated,
+            otherwise 0.1 (i.e. 100ms) which should be enough in most cases.
         :param bool do_open:
             Whether the serial port should be opened immediately or not.
             If ``False``, you will have to call
             :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.open`
             manually before using this object. Defaults to ``True``.
+        :param string receive_mode:
+            How to wait for received data, see property
+            :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.receive_mode`
+            for details. Defaults to
+            :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.RECEIVE_MODE_POLLING`.
+        :param bool resync_mode:
+            Whether to drop stale received data by matching the responses
+            instead of flushing the input buffer before every command, see
+            property
+            :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.resync_mode`
+            for details. Defaults to ``False``.
+        :param bool low_latency:
+            Whether to tune the serial port for low latency when opening it,
+            see property
+            :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.low_latency_features`
+            for details. Defaults to ``False``.
+        :param serial.rs485.RS485Settings rs485_mode:
+            RS485 settings to let the serial driver switch the transmitter of
+            a half-duplex RS485 bus, see property
+            :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.rs485_mode`
+            for details. Defaults to ``None`` (RS485 mode disabled).
         """
         super(ShdlcSerialPort, self).__init__()
         log.debug("Open ShdlcSerialPort on '{}' with {} bit/s."
                   .format(port, baudrate))
-        self._additional_response_time = float(additional_response_time)
+        self._receive_mode = self._check_receive_mode(receive_mode)
+        self._resync_mode = bool(resync_mode)
+        self._low_latency = bool(low_latency)
+        self._low_latency_features = ()
+        self._fd = None  # File descriptor for direct writes, if supported
+        self._stream = ShdlcSerialMisoFrameStream()  # Used in resync mode
+        self._stale_frame_bytes = 0
+        self._reply_delays = dict()  # Slave address -> reply delay [μs]
+        self._rs485_loopback = False  # Whether sent data is echoed
+        self._frame_time_factor = self.DEFAULT_FRAME_TIME_FACTOR
+        self._frame_time_margin = self.DEFAULT_FRAME_TIME_MARGIN
+        self._last_timeout_budget = None
+        self._last_response_overhead = None
+        self._auto_tune = None  # Parameters of auto-tuning, if enabled
+        self._auto_tune_samples = deque()
+        self._auto_tune_fallback = None
+        self._auto_tune_responders = set()  # Slave addresses which responded
         self._lock = RLock()
+        self._tx_buffer = bytearray(_TX_BUFFER_SIZE)  # Reused for every frame
+        self._tx_view = memoryview(self._tx_buffer)
+        self._frame_cache = ShdlcFrameCache()
         self._serial = serial.Serial(port=None, baudrate=baudrate,
                                      bytesize=serial.EIGHTBITS,
                                      parity=serial.PARITY_NONE,
                                      stopbits=serial.STOPBITS_ONE,
                                      timeout=0.01, xonxoff=False)
         self._serial.port = port
+        if rs485_mode is not None:
+            self.rs485_mode = rs485_mode
+        if additional_response_time is None:
+            additional_response_time = self._calibrated_response_times.get(
+                self.description, self.DEFAULT_ADDITIONAL_RESPONSE_TIME)
+        self._additional_response_time = float(additional_response_time)
         if do_open:
             self.open()
 
@@ -208,6 +475,347 @@ class ShdlcSerialPort(ShdlcPort):
         with self._lock:
             self._additional_response_time = float(additional_response_time)
 
+    @property
+    def auto_tune_enabled(self):
+        """
+        Whether the additional response time is re-tuned from the latencies
+        observed during operation. See
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.enable_auto_tune`.
+
+        :type: bool
+        """
+        with self._lock:
+            return self._auto_tune is not None
+
+    def enable_auto_tune(self, window=100, percentile=0.99, margin=0.005):
+        """
+        Enable re-tuning the additional response time from the latencies
+        observed during operation. Each time ``window`` samples were
+        collected, the additional response time is set to the given
+        percentile of them plus ``margin`` (same as
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.calibrate_additional_response_time`).
+        Only responses to commands with a response timeout up to 50ms are
+        used as samples, since the latency of slower commands is dominated
+        by the execution time in the device.
+
+        Since only received responses are sampled, a timeout of such a
+        command resets the additional response time to the value it had when
+        auto-tuning was enabled (at least
+        :py:attr:`DEFAULT_ADDITIONAL_RESPONSE_TIME`) and discards the
+        collected samples, so a too short value can't stick. This is only
+        done for slave addresses which already responded since auto-tuning
+        was enabled, so polling absent slaves (e.g. when scanning a bus)
+        doesn't reset it.
+
+        :param int window: Number of samples per re-tuning (at least 1).
+        :param float percentile: Percentile (0.0..1.0) of the samples to use.
+        :param float margin: Extra time in Seconds added to the percentile.
+        :raise ValueError: If ``window`` is less than 1.
+        """
+        if int(window) < 1:
+            raise ValueError("Auto-tune window must be at least 1.")
+        with self._lock:
+            self._auto_tune = (int(window), float(percentile), float(margin))
+            self._auto_tune_samples = deque(maxlen=int(window))
+            self._auto_tune_fallback = max(self._additional_response_time,
+                                           self.DEFAULT_ADDITIONAL_RESPONSE_TIME)
+            self._auto_tune_responders = set()
+
+    def disable_auto_tune(self):
+        """
+        Disable re-tuning the additional response time during operation.
+        """
+        with self._lock:
+            self._auto_tune = None
+            self._auto_tune_samples = deque()
+            self._auto_tune_responders = set()
+
+    def calibrate_additional_response_time(self, slave_address, samples=50,
+                                           percentile=0.99, margin=0.005,
+                                           command=None):
+        """
+        Determine the additional response time by measuring the round-trip
+        latency of a cheap command sent to a responsive device. The overhead
+        of each sample is its round-trip time minus the theoretical
+        transmission time of request and response, i.e. it contains the
+        delays of drivers and USB-UART converters. The given percentile of the
+        overheads plus ``margin`` is set as
+        :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.additional_response_time`
+        and remembered for this port description (name and bitrate), so ports
+        created later for the same description use it by default.
+
+        .. note:: The device must respond to all samples, otherwise the
+                  calibration is aborted with an exception and the additional
+                  response time is not changed.
+
+        :param byte slave_address: Slave address of the device to use.
+        :param int samples: Number of round-trips to measure (at least 1).
+        :param float percentile: Percentile (0.0..1.0) of the overheads to
+                                 use.
+        :param float margin: Extra time in Seconds added to the percentile.
+        :param ~sensirion_shdlc_driver.command.ShdlcCommand command:
+            The command to send. Defaults to
+            :py:class:`~sensirion_shdlc_driver.commands.system_up_time.ShdlcCmdGetSystemUpTime`.
+        :return: The calibrated additional response time in Seconds.
+        :rtype: float
+        :raise ValueError: If ``samples`` is less than 1.
+        """
+        if samples < 1:
+            raise ValueError("At least one sample is required.")
+        if command is None:
+            command = ShdlcCmdGetSystemUpTime()
+        with self._lock:
+            previous = self._additional_response_time
+            self._additional_response_time = max(
+                previous, self.DEFAULT_ADDITIONAL_RESPONSE_TIME)
+            overheads = []
+            try:
+                for i in range(samples):
+                    self.transceive(slave_address, command.id, command.data,
+                                    command.max_response_time,
+                                    command.max_response_length)
+                    overheads.append(self._last_response_overhead)
+            finally:
+                self._additional_response_time = previous
+            self._set_calibrated_response_time(
+                overheads, percentile, margin)
+            log.info("ShdlcSerialPort calibrated additional response time of "
+                     "'{}' to {:.1f} ms.".format(
+                         self.description,
+                         self._additional_response_time * 1000.0))
+            return self._additional_response_time
+
+    @property
+    def frame_time_factor(self):
+        """
+        Factor applied to the theoretical transmission time of the response
+        frame when calculating the time budget for receiving it, e.g. to allow
+        inter-byte spaces. See
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.calculate_frame_time_budget`.
+
+        :type: float
+        """
+        with self._lock:
+            return self._frame_time_factor
+
+    @frame_time_factor.setter
+    def frame_time_factor(self, frame_time_factor):
+        with self._lock:
+            self._frame_time_factor = float(frame_time_factor)
+
+    @property
+    def frame_time_margin(self):
+        """
+        Constant time (in Seconds) added to the time budget for receiving the
+        response frame, e.g. for buffering delays of USB-UART converters. See
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.calculate_frame_time_budget`.
+
+        :type: float
+        """
+        with self._lock:
+            return self._frame_time_margin
+
+    @frame_time_margin.setter
+    def frame_time_margin(self, frame_time_margin):
+        with self._lock:
+            self._frame_time_margin = float(frame_time_margin)
+
+    @property
+    def last_timeout_budget(self):
+        """
+        Get the total timeout (in Seconds) which applied to the last received
+        frame, i.e. the response timeout plus the additional response time
+        plus the frame time budget. Intended for instrumentation.
+
+        :return: The last timeout budget, or ``None`` if nothing was received
+                 yet.
+        :rtype: float
+        """
+        with self._lock:
+            return self._last_timeout_budget
+
+    @property
+    def low_latency(self):
+        """
+        Whether the serial port is tuned for low latency when opening it (set
+        with the parameter ``low_latency`` of
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.__init__`).
+
+        :return: Whether low latency tuning is enabled.
+        :rtype: bool
+        """
+        with self._lock:
+            return self._low_latency
+
+    @property
+    def low_latency_features(self):
+        """
+        Get the low latency optimizations which actually took effect when
+        opening the port. Each optimization is only applied if supported by
+        the platform and the driver, otherwise it is skipped silently:
+
+        - :py:attr:`LOW_LATENCY_ASYNC_FLAG`: The ``ASYNC_LOW_LATENCY`` flag
+          was set with the ``TIOCSSERIAL`` ioctl (Linux only, not supported
+          by e.g. pseudo terminals).
+
+        The termios parameters ``VMIN``/``VTIME`` are not touched since
+        pyserial opens the port with ``O_NONBLOCK`` and waits with
+        ``select()``, so they would have no effect.
+
+        :return: The names of the applied optimizations (empty if low latency
+                 tuning is disabled or the port is closed).
+        :rtype: tuple
+        """
+        with self._lock:
+            return self._low_latency_features
+
+    @property
+    def resync_mode(self):
+        """
+        Whether stale received data is dropped by matching the responses
+        instead of flushing the input buffer.
+
+        If ``False`` (default), the input buffer is flushed before sending a
+        command and the output buffer is drained after sending it, so any
+        received data which is not the response gets lost silently.
+
+        If ``True``, received data is decoded continuously and responses
+        whose slave address or command ID do not match the sent command
+        (e.g. late responses to previous commands) are discarded and counted
+        in
+        :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.stale_bytes`.
+        The input buffer is only flushed after an invalid response or a
+        timeout. This saves two system calls per command.
+
+        :type: bool
+        """
+        with self._lock:
+            return self._resync_mode
+
+    @resync_mode.setter
+    def resync_mode(self, resync_mode):
+        with self._lock:
+            if bool(resync_mode) != self._resync_mode:
+                self._resync_mode = bool(resync_mode)
+                self._stream.clear()
+
+    @property
+    def stale_bytes(self):
+        """
+        Get the total number of received bytes which were discarded in resync
+        mode because they were not part of the expected response (stale
+        responses and rubbish between frames).
+
+        :return: Number of discarded bytes.
+        :rtype: int
+        """
+        with self._lock:
+            return self._stale_frame_bytes + self._stream.discarded_bytes
+
+    @property
+    def rs485_mode(self):
+        """
+        The RS485 settings of the serial port, or ``None`` if RS485 mode is
+        disabled.
+
+        In RS485 mode, the serial driver enables the transmitter only while
+        sending (controlled by the RTS line, see
+        :py:class:`serial.rs485.RS485Settings` for the turnaround delays).
+        This is supported by the kernel driver on Linux only. If
+        ``loopback`` is enabled in the settings (i.e. the own transmission is
+        received as well), the echo of each sent frame is discarded before
+        receiving the response.
+
+        .. note:: The turnaround delay of the master (``delay_before_rx``)
+                  must be shorter than the reply delay of all slaves,
+                  otherwise the beginning of the responses collides with the
+                  master still driving the bus.
+
+        :type: serial.rs485.RS485Settings
+        """
+        with self._lock:
+            return self._serial.rs485_mode
+
+    @rs485_mode.setter
+    def rs485_mode(self, rs485_mode):
+        with self._lock:
+            self._serial.rs485_mode = rs485_mode
+            self._rs485_loopback = rs485_mode is not None and \
+                bool(rs485_mode.loopback)
+
+    @property
+    def reply_delays(self):
+        """
+        Get the known reply delays of the slaves, as set by
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.set_reply_delay`.
+
+        :return: Reply delays [μs] per slave address.
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._reply_delays)
+
+    def set_reply_delay(self, slave_address, reply_delay):
+        """
+        Notify the port about the reply delay configured in a slave (see
+        :py:meth:`~sensirion_shdlc_driver.device.ShdlcDevice.set_reply_delay`,
+        which calls this method automatically).
+
+        A slave doesn't start sending its response before the reply delay
+        elapsed, so the deadline for receiving the first byte of a response
+        is extended to at least the reply delay of the addressed slave.
+
+        :param byte slave_address: Slave address.
+        :param int reply_delay: The reply delay of the slave [μs].
+        """
+        with self._lock:
+            if reply_delay:
+                self._reply_delays[slave_address] = int(reply_delay)
+            else:
+                self._reply_delays.pop(slave_address, None)
+
+    @property
+    def receive_mode(self):
+        """
+        How to wait for received data.
+
+        - :py:attr:`RECEIVE_MODE_POLLING`: Read from the serial port with a
+          timeout of 10ms until the frame is complete. Works on all platforms,
+          but the detection of received data is delayed by up to 10ms.
+        - :py:attr:`RECEIVE_MODE_SELECT`: Wait on the file descriptor of the
+          serial port with ``select()`` until data arrives or the remaining
+          timeout elapsed, then read all available data at once. Reduces the
+          latency and the number of wakeups, but is available on POSIX
+          systems only.
+
+        :type: string
+        """
+        with self._lock:
+            return self._receive_mode
+
+    @receive_mode.setter
+    def receive_mode(self, receive_mode):
+        with self._lock:
+            self._receive_mode = self._check_receive_mode(receive_mode)
+
+    @property
+    def frame_cache(self):
+        """
+        The cache of encoded frames used when sending frames. By default,
+        each port has its own
+        :py:class:`~sensirion_shdlc_driver.frame_cache.ShdlcFrameCache` with
+        default size. Set to ``None`` to disable caching.
+
+        :type: ~sensirion_shdlc_driver.frame_cache.ShdlcFrameCache
+        """
+        with self._lock:
+            return self._frame_cache
+
+    @frame_cache.setter
+    def frame_cache(self, frame_cache):
+        with self._lock:
+            self._frame_cache = frame_cache
+
     @property
     def lock(self):
         """
@@ -229,6 +837,25 @@ class ShdlcSerialPort(ShdlcPort):
         """
         return self._serial.is_open
 
+    @classmethod
+    def _check_receive_mode(cls, receive_mode):
+        """
+        Check if a receive mode is valid and supported on this platform.
+
+        :param string receive_mode: The receive mode to check.
+        :return: The receive mode.
+        :rtype: string
+        :raise ValueError: If the receive mode is invalid or not supported.
+        """
+        if receive_mode == cls.RECEIVE_MODE_POLLING:
+            return receive_mode
+        elif receive_mode == cls.RECEIVE_MODE_SELECT:
+            if os.name != 'posix':
+                raise ValueError("Receive mode '{}' is only supported on "
+                                 "POSIX systems.".format(receive_mode))
+            return receive_mode
+        raise ValueError("Invalid receive mode: '{}'.".format(receive_mode))
+
     def open(self):
         """
         Open the serial port (only needs to be called if ``do_open`` in
@@ -237,6 +864,9 @@ class ShdlcSerialPort(ShdlcPort):
         """
         if self._serial.is_open is False:
             self._serial.open()
+            if self._low_latency:
+                self._apply_low_latency()
+            self._fd = self._get_write_fd()
 
     def close(self):
         """
@@ -245,8 +875,12 @@ class ShdlcSerialPort(ShdlcPort):
         """
         if self._serial.is_open is True:
             self._serial.close()
+            self._stream.clear()
+            self._low_latency_features = ()
+            self._fd = None
 
-    def transceive(self, slave_address, command_id, data, response_timeout):
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
         """
         Send SHDLC frame to port and return received response frame.
 
@@ -255,6 +889,9 @@ class ShdlcSerialPort(ShdlcPort):
         :param bytes-like data: Payload.
         :param float response_timeout: Response timeout in seconds (maximum
                                        time until the first byte is received).
+        :param byte max_response_length: Maximum expected response payload
+            length, used to calculate the time budget for receiving the
+            response frame. ``None`` (default) means up to 255 bytes.
         :return: Received address, command_id, state, and payload.
         :rtype: byte, byte, byte, bytes
         :raise ~sensirion_shdlc_driver.errors.ShdlcTimeoutError:
@@ -263,10 +900,55 @@ class ShdlcSerialPort(ShdlcPort):
             If the received response is invalid.
         """
         with self._lock:
-            self._serial.flushInput()
-            self._send_frame(slave_address, command_id, data)
-            self._serial.flush()
-            return self._receive_frame(response_timeout)
+            reply_delay = self._reply_delays.get(slave_address)
+            if reply_delay is not None:
+                response_timeout = max(response_timeout, reply_delay * 1e-6)
+            try:
+                if self._resync_mode:
+                    start_time = time.monotonic()
+                    # Without draining the output buffer, the request may
+                    # still be transmitted while the response timeout is
+                    # running.
+                    tx_time = (self._send_frame(
+                        slave_address, command_id, data) * 10.0) / \
+                        self._serial.baudrate
+                    result = self._receive_matching_frame(
+                        slave_address, command_id, response_timeout + tx_time,
+                        max_response_length)
+                elif self._fd is not None:
+                    # The frame is written with a single system call, and
+                    # instead of draining the output buffer with another one,
+                    # the transmission time is added to the response timeout.
+                    self._serial.flushInput()
+                    start_time = time.monotonic()
+                    tx_time = (self._send_frame(
+                        slave_address, command_id, data) * 10.0) / \
+                        self._serial.baudrate
+                    result = self._receive_frame(response_timeout + tx_time,
+                                                 max_response_length)
+                else:
+                    self._serial.flushInput()
+                    self._send_frame(slave_address, command_id, data)
+                    self._serial.flush()
+                    start_time = time.monotonic()
+                    tx_time = 0.0
+                    result = self._receive_frame(response_timeout,
+                                                 max_response_length)
+            except ShdlcTimeoutError:
+                if self._auto_tune is not None and response_timeout <= \
+                        self._AUTO_TUNE_MAX_RESPONSE_TIMEOUT and \
+                        slave_address in self._auto_tune_responders:
+                    self._reset_auto_tune()
+                raise
+            # Time exceeding the transmission of the response (assuming no
+            # stuffing), i.e. device processing plus driver/converter delays.
+            self._last_response_overhead = time.monotonic() - start_time - \
+                tx_time - ((7 + len(result[3])) * 10.0) / self._serial.baudrate
+            if self._auto_tune is not None:
+                self._auto_tune_responders.add(slave_address)
+                if response_timeout <= self._AUTO_TUNE_MAX_RESPONSE_TIMEOUT:
+                    self._add_auto_tune_sample(self._last_response_overhead)
+            return result
 
     def _send_frame(self, slave_address, command_id, data):
         """
@@ -275,64 +957,406 @@ class ShdlcSerialPort(ShdlcPort):
         :param byte slave_address: Slave address.
         :param byte command_id: SHDLC command ID.
         :param bytes-like data: Payload.
+        :return: Number of sent bytes.
+        :rtype: int
+        """
+        tx_data = self._encode_frame(slave_address, command_id, data)
+        if self._wire_traces:
+            self._trace(ShdlcWireTrace.MOSI, tx_data)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ShdlcSerialPort send raw: [{}]".format(
+                ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
+        self._write(tx_data)
+        return len(tx_data)
+
+    def send_frames(self, frames):
+        """
+        Send multiple SHDLC frames at once without waiting for responses, e.g.
+        broadcast frames or frames to devices which do not respond. All frames
+        are encoded into one buffer and written with a single system call if
+        possible.
+
+        :param list frames: Sequence of ``(slave_address, command_id, data)``
+                            tuples.
+        """
+        batch = ShdlcSerialMosiBatchFrameBuilder(frames)
+        tx_data = batch.to_bytes()
+        with self._lock:
+            if self._wire_traces:
+                self._trace_frames(batch)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("ShdlcSerialPort send raw: [{}]".format(
+                    ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
+            self._write(tx_data)
+            if self._fd is None:
+                self._serial.flush()
+
+    def _write(self, data):
+        """
+        Write data to the serial port. If the file descriptor is available,
+        the data is written with a single ``os.write()`` (without the
+        overhead of pyserial), and only the rest of partial writes is passed
+        to pyserial.
+
+        :param bytes-like data: The data to write.
+        """
+        if self._fd is None:
+            self._serial.write(data)
+        else:
+            try:
+                written = os.write(self._fd, data)
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK,
+                                   errno.EINTR):
+                    raise serial.SerialException("Write failed: {}".format(e))
+                written = 0
+            if written < len(data):
+                # Output buffer full, let pyserial wait until it's writable.
+                self._serial.write(data[written:])
+        if self._rs485_loopback:
+            self._discard_echo(data)
+
+    def _discard_echo(self, data):
+        """
+        Receive and discard the echo of sent data (RS485 mode with loopback).
+
+        :param bytes-like data: The sent data.
+        """
+        deadline = time.monotonic() + self._additional_response_time + \
+            (len(data) * 10.0) / self._serial.baudrate
+        echo = bytearray()
+        while len(echo) < len(data):
+            timeout = deadline - time.monotonic()
+            if timeout <= 0.0:
+                log.warning("ShdlcSerialPort received only {} of {} echo "
+                            "bytes.".format(len(echo), len(data)))
+                return
+            # Read exactly the missing bytes to not consume the response.
+            echo += self._serial.read(len(data) - len(echo))
+        if echo != data:
+            log.warning("ShdlcSerialPort received wrong echo (bus "
+                        "collision?).")
+
+    def _get_write_fd(self):
+        """
+        Get the file descriptor of the opened serial port for direct writes.
+
+        :return: The file descriptor, or ``None`` if not supported on this
+                 platform.
+        :rtype: int
         """
-        builder = ShdlcSerialMosiFrameBuilder(slave_address, command_id, data)
-        tx_data = builder.to_bytes()
-        log.debug("ShdlcSerialPort send raw: [{}]".format(
-                  ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
-        self._serial.write(tx_data)
+        if os.name != 'posix':
+            return None
+        try:
+            return self._serial.fileno()
+        except (AttributeError, NotImplementedError, OSError,
+                serial.SerialException):
+            return None
+
+    def _encode_frame(self, slave_address, command_id, data):
+        """
+        Encode a frame, either by taking it from the frame cache or by
+        encoding it into the transmit buffer.
 
-    def _receive_frame(self, response_timeout):
+        :param byte slave_address: Slave address.
+        :param byte command_id: SHDLC command ID.
+        :param bytes-like data: Payload.
+        :return: The raw frame, which is only valid until the next call.
+        :rtype: bytes-like
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        if self._frame_cache is not None:
+            tx_data = self._frame_cache.get(slave_address, command_id, data)
+            if tx_data is not None:
+                return tx_data
+        length = ShdlcSerialMosiFrameBuilder.encode_into(
+            self._tx_buffer, slave_address, command_id, data)
+        return self._tx_view[:length]
+
+    def _receive_frame(self, response_timeout, max_response_length=None):
         """
         Wait for the response frame and return it.
 
         :param float response_timeout: Response timeout in seconds (maximum
                                        time until the first byte is received).
+        :param byte max_response_length: Maximum expected response payload
+                                         length (``None`` for 255 bytes).
         :return: Received address, command_id, state, and payload.
         :rtype: byte, byte, byte, bytes
         """
         start_time = time.time()
         response_timeout += self._additional_response_time  # add extra time
-        total_timeout = response_timeout + self._calculate_maximum_frame_time()
-        builder = ShdlcSerialMisoFrameBuilder()
+        total_timeout = response_timeout + \
+            self.calculate_frame_time_budget(max_response_length)
+        self._last_timeout_budget = total_timeout
+        decoder = ShdlcSerialMisoFrameDecoder()
         while True:
-            # Fetch all received bytes at once (to get maximum performance) or
-            # wait for at least one byte (with timeout) if the buffer is empty.
-            new_data = self._serial.read(max(self._serial.inWaiting(), 1))
+            timeout = \
+                total_timeout if decoder.start_received else response_timeout
+            new_data = self._read(start_time + timeout - time.time(),
+                                  decoder.min_remaining_length)
 
             # Process received data and return if the frame is complete.
-            if builder.add_data(new_data):
-                log.debug("ShdlcSerialPort received raw: [{}]".format(
-                          ", ".join(["0x%.2X" % i for i in builder.data])))
-                return builder.interpret_data()
+            if decoder.add_data(new_data):
+                self._trace_received(decoder.data)
+                return decoder.interpret_data()
+
+            # Frame not (completely) received yet, check timeout conditions.
+            elapsed_time = time.time() - start_time
+            timeout = \
+                total_timeout if decoder.start_received else response_timeout
+            if elapsed_time > timeout:
+                log.warning("ShdlcSerialPort timed out while waiting for "
+                            "response after {:.0f} ms.".format(
+                                elapsed_time * 1000.0))
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("ShdlcSerialPort received raw until timeout: "
+                              "[{}]".format(", ".join(["0x%.2X" % i
+                                                      for i in decoder.data])))
+                raise ShdlcTimeoutError()
+
+    def _apply_low_latency(self):
+        """
+        Apply all supported low latency optimizations to the opened port and
+        record which of them took effect.
+        """
+        features = []
+        try:
+            self._serial.set_low_latency_mode(True)
+            features.append(self.LOW_LATENCY_ASYNC_FLAG)
+        except (AttributeError, NotImplementedError, ValueError) as e:
+            log.info("ShdlcSerialPort could not set ASYNC_LOW_LATENCY flag on "
+                     "'{}': {}".format(self._serial.name, e))
+        self._low_latency_features = tuple(features)
+
+    def _receive_matching_frame(self, slave_address, command_id,
+                                response_timeout, max_response_length=None):
+        """
+        Wait for the response frame matching the sent command and return it,
+        discarding stale frames (used in resync mode).
+
+        :param byte slave_address: Slave address of the sent command.
+        :param byte command_id: SHDLC command ID of the sent command.
+        :param float response_timeout: Response timeout in seconds (maximum
+                                       time until the first byte is received).
+        :param byte max_response_length: Maximum expected response payload
+                                         length (``None`` for 255 bytes).
+        :return: Received address, command_id, state, and payload.
+        :rtype: byte, byte, byte, bytes
+        """
+        start_time = time.time()
+        response_timeout += self._additional_response_time  # add extra time
+        total_timeout = response_timeout + \
+            self.calculate_frame_time_budget(max_response_length)
+        self._last_timeout_budget = total_timeout
+        stream = self._stream
+        while True:
+            # Process the frames received so far, including frames received
+            # after the response to the previous command.
+            while stream.available:
+                try:
+                    frame = stream.get_frame()
+                except ShdlcResponseError:
+                    self._trace_received(stream.last_raw_frame)
+                    self._flush_input()
+                    raise
+                self._trace_received(stream.last_raw_frame)
+                if frame[0] == slave_address and frame[1] == command_id:
+                    return frame
+                self._stale_frame_bytes += len(stream.last_raw_frame)
+                log.warning("ShdlcSerialPort discarded stale response from "
+                            "slave address {} with command ID 0x{:02X}."
+                            .format(frame[0], frame[1]))
 
             # Frame not (completely) received yet, check timeout conditions.
             elapsed_time = time.time() - start_time
             timeout = \
-                total_timeout if builder.start_received else response_timeout
+                total_timeout if stream.start_received else response_timeout
             if elapsed_time > timeout:
                 log.warning("ShdlcSerialPort timed out while waiting for "
                             "response after {:.0f} ms.".format(
                                 elapsed_time * 1000.0))
-                log.debug("ShdlcSerialPort received raw until timeout: [{}]"
-                          .format(", ".join(["0x%.2X" % i
-                                             for i in builder.data])))
+                self._flush_input()
                 raise ShdlcTimeoutError()
+            stream.add_data(self._read(start_time + timeout - time.time(),
+                                       stream.min_remaining_length))
+
+    def _trace_received(self, raw_frame):
+        """
+        Notify wire trace subscribers and the debug log about a received raw
+        frame.
 
-    def _calculate_maximum_frame_time(self):
+        :param bytes raw_frame: The received raw frame.
         """
-        Calculate the time required for receiving the longest possible frame,
-        respecting the used bitrate and with some extra time for inter-byte
-        spaces etc.
+        if self._wire_traces:
+            self._trace(ShdlcWireTrace.MISO, raw_frame)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ShdlcSerialPort received raw: [{}]".format(
+                ", ".join(["0x%.2X" % i for i in bytearray(raw_frame)])))
 
-        :return: Maximum frame time in Seconds
+    def _flush_input(self):
+        """
+        Discard all received data, i.e. the input buffer and the data of the
+        stream decoder (used in resync mode after errors).
+        """
+        self._serial.flushInput()
+        self._stream.clear()
+
+    def _read(self, timeout, expected_length):
+        """
+        Read received data according to the receive mode.
+
+        :param float timeout: Remaining time until the receive times out.
+        :param int expected_length: Minimum number of bytes expected.
+        :return: The received data (may be empty).
+        :rtype: bytes
+        """
+        if self._receive_mode == self.RECEIVE_MODE_SELECT:
+            # Sleep until data arrives or the timeout elapsed, then fetch all
+            # received bytes at once.
+            return self._read_available(timeout, expected_length)
+        # Fetch all received bytes at once (to get maximum performance) or
+        # wait (with timeout) until at least the bytes are received which are
+        # known to be missing. This is derived from the length byte once the
+        # header is received, so long frames are read with a few blocking
+        # reads instead of many polling turns.
+        return self._serial.read(max(self._serial.inWaiting(),
+                                     expected_length))
+
+    def _add_auto_tune_sample(self, overhead):
+        """
+        Add a latency sample for re-tuning the additional response time, and
+        re-tune it if enough samples were collected.
+
+        :param float overhead: The observed response overhead in Seconds.
+        """
+        window, percentile, margin = self._auto_tune
+        self._auto_tune_samples.append(overhead)
+        if len(self._auto_tune_samples) >= window:
+            self._set_calibrated_response_time(
+                self._auto_tune_samples, percentile, margin)
+            self._auto_tune_samples.clear()
+            log.debug("ShdlcSerialPort re-tuned additional response time to "
+                      "{:.1f} ms.".format(
+                          self._additional_response_time * 1000.0))
+
+    def _reset_auto_tune(self):
+        """
+        Reset the additional response time to the fallback value after a
+        timeout, since it may have been tuned too short.
+        """
+        self._auto_tune_samples.clear()
+        if self._additional_response_time < self._auto_tune_fallback:
+            self._additional_response_time = self._auto_tune_fallback
+            self._calibrated_response_times.pop(self.description, None)
+            log.info("ShdlcSerialPort reset additional response time to "
+                     "{:.1f} ms after a timeout.".format(
+                         self._additional_response_time * 1000.0))
+
+    def _set_calibrated_response_time(self, overheads, percentile, margin):
+        """
+        Set the additional response time from measured response overheads and
+        remember it for this port description.
+
+        :param iterable overheads: Measured response overheads in Seconds.
+        :param float percentile: Percentile (0.0..1.0) of the overheads to
+                                 use.
+        :param float margin: Extra time in Seconds added to the percentile.
+        """
+        # Overheads may be negative if the transmission is faster than the
+        # theoretical bitrate (e.g. on virtual ports).
+        self._additional_response_time = \
+            max(self._percentile(overheads, percentile), 0.0) + margin
+        self._calibrated_response_times[self.description] = \
+            self._additional_response_time
+
+    @staticmethod
+    def _percentile(values, percentile):
+        """
+        Calculate a percentile with the nearest-rank method.
+
+        :param iterable values: The values (must not be empty).
+        :param float percentile: The percentile (0.0..1.0).
+        :return: The percentile of the values.
         :rtype: float
         """
-        # Calculate theoretical transmission time of longest possible frame:
-        #   600 bytes * (start bit + 8 data bits + stop bit) / bitrate
-        max_frame_time = (600.0 * 10.0) / self.bitrate
-        # Add 200ms extra, e.g. for inter-byte spaces.
-        return max_frame_time + 0.2
+        values = sorted(values)
+        index = int(math.ceil(percentile * len(values))) - 1
+        return values[min(max(index, 0), len(values) - 1)]
+
+    def _read_available(self, timeout, expected_length=1):
+        """
+        Wait until data is available on the file descriptor of the serial port
+        and read all available data. If less than the expected number of
+        bytes is available, sleep for the transmission time of the missing
+        bytes and read once more, instead of waking up for every byte.
+
+        :param float timeout: Maximum time to wait in seconds.
+        :param int expected_length: Minimum number of bytes expected.
+        :return: The received data (empty if timed out).
+        :rtype: bytes
+        """
+        fd = self._serial.fileno()
+        ready, _, _ = select.select([fd], [], [], max(timeout, 0.0))
+        if not ready:
+            return b""
+        data = self._read_fd(fd)
+        missing = expected_length - len(data)
+        if missing > 0:
+            # 10 bits per byte (start bit + 8 data bits + stop bit)
+            time.sleep(min(missing * 10.0 / self._serial.baudrate,
+                           max(timeout, 0.0)))
+            ready, _, _ = select.select([fd], [], [], 0.0)
+            if ready:
+                data += self._read_fd(fd)
+        return data
+
+    def _read_fd(self, fd):
+        """
+        Read all available data from a readable file descriptor.
+
+        :param int fd: The file descriptor of the serial port.
+        :return: The read data.
+        :rtype: bytes
+        """
+        try:
+            data = os.read(fd, self._READ_CHUNK_SIZE)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return b""
+            raise serial.SerialException("Read failed: {}".format(e))
+        if not data:
+            # Readable but no data means the device has been disconnected.
+            raise serial.SerialException(
+                "Device reports readiness to read but returned no data "
+                "(device disconnected?).")
+        return data
+
+    def calculate_frame_time_budget(self, max_response_length=None):
+        """
+        Calculate the time budget for receiving a response frame (after its
+        start byte was received), respecting the used bitrate. The budget is
+        the theoretical transmission time of the longest possible frame for
+        the given payload length (i.e. with all bytes stuffed), multiplied by
+        :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.frame_time_factor`
+        plus
+        :py:attr:`~sensirion_shdlc_driver.port.ShdlcSerialPort.frame_time_margin`.
+
+        :param byte max_response_length: Maximum response payload length
+                                         (``None`` for 255 bytes).
+        :return: Frame time budget in Seconds.
+        :rtype: float
+        """
+        if max_response_length is None:
+            max_response_length = 255
+        # Start and stop byte plus stuffed header, payload and checksum.
+        raw_length = 2 + 2 * (4 + max_response_length + 1)
+        # Each byte consists of start bit + 8 data bits + stop bit.
+        frame_time = (raw_length * 10.0) / self.bitrate
+        with self._lock:
+            return frame_time * self._frame_time_factor + \
+                self._frame_time_margin
 
 
 class ShdlcTcpPort(ShdlcPort):
@@ -342,12 +1366,51 @@ class ShdlcTcpPort(ShdlcPort):
     This class implements the ShdlcPort interface for a client connection on a
     TCP/IP port.
 
+    A lost connection (e.g. closed by the server or detected by TCP
+    keepalive) raises
+    :py:class:`~sensirion_shdlc_driver.errors.ShdlcConnectionLostError`
+    instead of a plain timeout error. With ``auto_reconnect`` enabled, the
+    next call reconnects transparently, with an exponentially increasing
+    delay between failed attempts. See
+    :py:attr:`~sensirion_shdlc_driver.port.ShdlcTcpPort.connection_stats`
+    for the connection health.
+
     .. note:: This class can be used in a "with"-statement, and it's
               recommended to do so as it automatically closes the port after
               using it.
     """
 
-    def __init__(self, ip, port, socket_timeout=5.0, do_open=True):
+    #: Default value of
+    #: :py:attr:`~sensirion_shdlc_driver.port.ShdlcTcpPort.max_outstanding`.
+    DEFAULT_MAX_OUTSTANDING = 8
+
+    #: Socket option: ``TCP_NODELAY`` was set to disable Nagle's algorithm,
+    #: i.e. frames are sent immediately instead of being held back until
+    #: previously sent data was acknowledged.
+    SOCKET_OPTION_NODELAY = 'nodelay'
+
+    #: Socket option: ``TCP_QUICKACK`` was set to acknowledge received data
+    #: immediately instead of delaying the ACK (Linux only).
+    SOCKET_OPTION_QUICKACK = 'quickack'
+
+    #: Socket option: ``SO_KEEPALIVE`` was set to detect dead connections.
+    SOCKET_OPTION_KEEPALIVE = 'keepalive'
+
+    #: Socket option: The idle time and interval of keepalive probes were set
+    #: (``TCP_KEEPIDLE`` and ``TCP_KEEPINTVL``, where available).
+    SOCKET_OPTION_KEEPALIVE_TIME = 'keepalive_time'
+
+    #: Socket option: The send buffer size was set (``SO_SNDBUF``).
+    SOCKET_OPTION_SEND_BUFFER_SIZE = 'send_buffer_size'
+
+    #: Socket option: The receive buffer size was set (``SO_RCVBUF``).
+    SOCKET_OPTION_RECEIVE_BUFFER_SIZE = 'receive_buffer_size'
+
+    def __init__(self, ip, port, socket_timeout=5.0, do_open=True,
+                 max_outstanding=DEFAULT_MAX_OUTSTANDING, auto_reconnect=False,
+                 reconnect_delay=0.1, max_reconnect_delay=30.0, nodelay=True,
+                 quickack=False, keepalive=True, keepalive_time=None,
+                 send_buffer_size=None, receive_buffer_size=None):
         """
         Create and optionally open a TCP socket. Throws an exception if the
         socket cannot be opened.
@@ -363,6 +1426,34 @@ class ShdlcTcpPort(ShdlcPort):
             you will have to call
             :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.open`
             manually before using this object. Defaults to ``True``.
+        :param int max_outstanding: Maximum number of requests sent without
+            having received their response in
+            :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.transceive_pipelined`.
+        :param bool auto_reconnect: Whether to reconnect automatically when
+            the connection was lost, see property
+            :py:attr:`~sensirion_shdlc_driver.port.ShdlcTcpPort.auto_reconnect`.
+            Defaults to ``False``.
+        :param float reconnect_delay: Delay in seconds after the first failed
+            reconnect attempt. It is doubled after every further failed
+            attempt.
+        :param float max_reconnect_delay: Maximum delay in seconds between
+            reconnect attempts.
+        :param bool nodelay: Whether to disable Nagle's algorithm
+            (``TCP_NODELAY``). Defaults to ``True``.
+        :param bool quickack: Whether to acknowledge received data
+            immediately (``TCP_QUICKACK``, Linux only). Reduces the latency if
+            the server sends responses in multiple segments with Nagle's
+            algorithm enabled, at the cost of one more system call per
+            receive. Defaults to ``False``.
+        :param bool keepalive: Whether to enable TCP keepalive to detect dead
+            connections. Defaults to ``True``.
+        :param float keepalive_time: Idle time and interval of keepalive
+            probes in seconds (rounded to whole seconds), or ``None`` to use
+            the defaults of the operating system (usually 2 hours).
+        :param int send_buffer_size: Size of the socket send buffer in bytes,
+            or ``None`` to use the default of the operating system.
+        :param int receive_buffer_size: Size of the socket receive buffer in
+            bytes, or ``None`` to use the default of the operating system.
         """
         super(ShdlcTcpPort, self).__init__()
         log.debug("Open ShdlcTcpPort as TCP client to '{}' on port {}."
@@ -370,10 +1461,31 @@ class ShdlcTcpPort(ShdlcPort):
         self._ip = str(ip)
         self._port = int(port)
         self._socket_timeout = float(socket_timeout)
+        self._max_outstanding = self._check_max_outstanding(max_outstanding)
         self._is_open = False
         self._lock = RLock()
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._socket.settimeout(self._socket_timeout)
+        self._tx_buffer = bytearray(_TX_BUFFER_SIZE)  # Reused for every frame
+        self._tx_view = memoryview(self._tx_buffer)
+        self._frame_cache = ShdlcFrameCache()
+        self._stream = ShdlcSerialMisoFrameStream()
+        self._socket = None  # Created on every (re)connect
+        self._nodelay = bool(nodelay)
+        self._quickack = bool(quickack)
+        self._keepalive = bool(keepalive)
+        self._keepalive_time = keepalive_time
+        self._send_buffer_size = send_buffer_size
+        self._receive_buffer_size = receive_buffer_size
+        self._socket_options = ()
+        self._auto_reconnect = bool(auto_reconnect)
+        self._reconnect_delay = float(reconnect_delay)
+        self._max_reconnect_delay = float(max_reconnect_delay)
+        self._backoff_delay = self._reconnect_delay
+        self._next_reconnect_time = 0.0
+        self._lost_time = None
+        self._connection_lost_count = 0
+        self._reconnect_count = 0
+        self._failed_reconnect_count = 0
+        self._last_downtime = None
         if do_open:
             self.open()
 
@@ -416,6 +1528,125 @@ class ShdlcTcpPort(ShdlcPort):
         with self._lock:
             self._socket_timeout = float(socket_timeout)
 
+    @property
+    def auto_reconnect(self):
+        """
+        Whether to reconnect automatically when the connection was lost.
+
+        If enabled, the port stays open after the connection was lost and
+        the next call tries to reconnect. If reconnecting fails, further
+        attempts are only made after a delay, starting with
+        ``reconnect_delay`` and doubled after every failed attempt up to
+        ``max_reconnect_delay`` (see
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.__init__`). Calls
+        in between raise
+        :py:class:`~sensirion_shdlc_driver.errors.ShdlcConnectionLostError`
+        immediately. If disabled, the port is closed when the connection was
+        lost, and can be reopened with
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.open`.
+
+        .. note:: The request during which the connection was lost is not
+                  repeated, since it's unknown whether the device received
+                  it.
+
+        :type: bool
+        """
+        with self._lock:
+            return self._auto_reconnect
+
+    @auto_reconnect.setter
+    def auto_reconnect(self, auto_reconnect):
+        with self._lock:
+            self._auto_reconnect = bool(auto_reconnect)
+
+    @property
+    def is_connected(self):
+        """
+        Indicates whether the socket is currently connected. Unlike
+        :py:attr:`~sensirion_shdlc_driver.port.ShdlcTcpPort.is_open`, this is
+        ``False`` while waiting for a reconnect.
+
+        :return: Whether the socket is connected.
+        :rtype: bool
+        """
+        return self._socket is not None
+
+    @property
+    def socket_options(self):
+        """
+        Get the socket options which actually took effect on the current
+        connection. Each option is only applied if enabled and supported by
+        the platform, otherwise it is skipped silently:
+
+        - :py:attr:`SOCKET_OPTION_NODELAY`
+        - :py:attr:`SOCKET_OPTION_QUICKACK`
+        - :py:attr:`SOCKET_OPTION_KEEPALIVE`
+        - :py:attr:`SOCKET_OPTION_KEEPALIVE_TIME`
+        - :py:attr:`SOCKET_OPTION_SEND_BUFFER_SIZE`
+        - :py:attr:`SOCKET_OPTION_RECEIVE_BUFFER_SIZE`
+
+        :return: The names of the applied options (empty if not connected).
+        :rtype: tuple
+        """
+        with self._lock:
+            return self._socket_options
+
+    @property
+    def connection_stats(self):
+        """
+        Get statistics about the connection health.
+
+        :return: Dict with the keys ``connection_lost_count`` (number of
+            lost connections), ``reconnect_count`` (number of successful
+            reconnects), ``failed_reconnect_count`` (number of failed
+            reconnect attempts) and ``last_downtime`` (seconds from the last
+            lost connection until it was reconnected, ``None`` if never
+            reconnected).
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(connection_lost_count=self._connection_lost_count,
+                        reconnect_count=self._reconnect_count,
+                        failed_reconnect_count=self._failed_reconnect_count,
+                        last_downtime=self._last_downtime)
+
+    @property
+    def max_outstanding(self):
+        """
+        The maximum number of requests sent without having received their
+        response in
+        :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.transceive_pipelined`.
+        Must be at least 1 (i.e. no pipelining).
+
+        :type: int
+        """
+        with self._lock:
+            return self._max_outstanding
+
+    @max_outstanding.setter
+    def max_outstanding(self, max_outstanding):
+        with self._lock:
+            self._max_outstanding = \
+                self._check_max_outstanding(max_outstanding)
+
+    @property
+    def frame_cache(self):
+        """
+        The cache of encoded frames used when sending frames. By default,
+        each port has its own
+        :py:class:`~sensirion_shdlc_driver.frame_cache.ShdlcFrameCache` with
+        default size. Set to ``None`` to disable caching.
+
+        :type: ~sensirion_shdlc_driver.frame_cache.ShdlcFrameCache
+        """
+        with self._lock:
+            return self._frame_cache
+
+    @frame_cache.setter
+    def frame_cache(self, frame_cache):
+        with self._lock:
+            self._frame_cache = frame_cache
+
     @property
     def lock(self):
         """
@@ -437,45 +1668,337 @@ class ShdlcTcpPort(ShdlcPort):
         """
         return self._is_open
 
+    @staticmethod
+    def _check_max_outstanding(max_outstanding):
+        """
+        Check if a maximum number of outstanding requests is valid.
+
+        :param int max_outstanding: The value to check.
+        :return: The value.
+        :rtype: int
+        :raise ValueError: If the value is less than 1.
+        """
+        max_outstanding = int(max_outstanding)
+        if max_outstanding < 1:
+            raise ValueError("Maximum number of outstanding requests must be "
+                             "at least 1, not {}.".format(max_outstanding))
+        return max_outstanding
+
     def open(self):
         """
         Open the TCP socket (only needs to be called if ``do_open`` in
         :py:meth:`~sensirion_shdlc_driver.port.ShdlcSerialPort.__init__`
         was set to ``False``). Does nothing if the socket is already opened.
         """
-        if self._is_open is False:
-            self._socket.connect((self._ip, self._port))
-            self._is_open = True
+        with self._lock:
+            if self._is_open is False:
+                self._connect()
+                self._is_open = True
 
     def close(self):
         """
         Close the TCP socket. Does nothing if the socket is already closed.
         """
-        if self._is_open is True:
+        with self._lock:
+            if self._is_open is True:
+                self._disconnect()
+                self._is_open = False
+
+    def _connect(self):
+        """
+        Create a new socket, configure its options and connect it to the
+        server.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self._socket_timeout)
+            # Options are set before connecting since the buffer sizes
+            # affect the TCP window negotiated during the handshake.
+            options = self._configure_socket(sock)
+            sock.connect((self._ip, self._port))
+        except Exception:
+            sock.close()
+            raise
+        self._socket = sock
+        self._socket_options = options
+        self._stream.clear()
+
+    def _configure_socket(self, sock):
+        """
+        Apply all enabled and supported socket options.
+
+        :param socket.socket sock: The socket to configure.
+        :return: The names of the applied options.
+        :rtype: tuple
+        """
+        options = []
+        tcp = socket.IPPROTO_TCP
+        if self._nodelay and self._setsockopt(
+                sock, tcp, socket.TCP_NODELAY, 1):
+            options.append(self.SOCKET_OPTION_NODELAY)
+        if self._quickack and self._setsockopt(
+                sock, tcp, getattr(socket, 'TCP_QUICKACK', None), 1):
+            options.append(self.SOCKET_OPTION_QUICKACK)
+        if self._keepalive and self._setsockopt(
+                sock, socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1):
+            options.append(self.SOCKET_OPTION_KEEPALIVE)
+            if self._keepalive_time is not None:
+                seconds = max(int(round(self._keepalive_time)), 1)
+                # On macOS, the idle time option is called TCP_KEEPALIVE.
+                idle = getattr(socket, 'TCP_KEEPIDLE',
+                               getattr(socket, 'TCP_KEEPALIVE', None))
+                interval = getattr(socket, 'TCP_KEEPINTVL', None)
+                if self._setsockopt(sock, tcp, idle, seconds) and \
+                        self._setsockopt(sock, tcp, interval, seconds):
+                    options.append(self.SOCKET_OPTION_KEEPALIVE_TIME)
+        if self._send_buffer_size is not None and self._setsockopt(
+                sock, socket.SOL_SOCKET, socket.SO_SNDBUF,
+                self._send_buffer_size):
+            options.append(self.SOCKET_OPTION_SEND_BUFFER_SIZE)
+        if self._receive_buffer_size is not None and self._setsockopt(
+                sock, socket.SOL_SOCKET, socket.SO_RCVBUF,
+                self._receive_buffer_size):
+            options.append(self.SOCKET_OPTION_RECEIVE_BUFFER_SIZE)
+        return tuple(options)
+
+    @staticmethod
+    def _setsockopt(sock, level, option, value):
+        """
+        Set a socket option if it is supported.
+
+        :param socket.socket sock: The socket.
+        :param int level: The protocol level.
+        :param int option: The option, or ``None`` if not available on this
+            platform.
+        :param int value: The value to set.
+        :return: Whether the option was set.
+        :rtype: bool
+        """
+        if option is None:
+            log.info("ShdlcTcpPort socket option not available on this "
+                     "platform.")
+            return False
+        try:
+            sock.setsockopt(level, option, value)
+            return True
+        except (socket.error, OSError) as e:
+            log.info("ShdlcTcpPort could not set socket option {}: {}"
+                     .format(option, e))
+            return False
+
+    def _disconnect(self):
+        """
+        Close the socket, if connected.
+        """
+        if self._socket is not None:
             self._socket.close()
+            self._socket = None
+        self._socket_options = ()
+        self._stream.clear()
+
+    def _ensure_connected(self):
+        """
+        Make sure the socket is connected. Reconnects if the connection was
+        lost and auto-reconnect is enabled, unless the backoff delay after a
+        failed attempt has not elapsed yet.
+
+        :raise ~sensirion_shdlc_driver.errors.ShdlcConnectionLostError:
+            If the socket is not connected.
+        """
+        if self._socket is not None:
+            return
+        if not self._is_open:
+            raise ShdlcConnectionLostError("Port '{}' is not open."
+                                           .format(self.description))
+        now = time.monotonic()
+        if now < self._next_reconnect_time:
+            raise ShdlcConnectionLostError(
+                "Not connected to '{}', next reconnect attempt in {:.1f} s."
+                .format(self.description, self._next_reconnect_time - now))
+        try:
+            self._connect()
+        except (socket.error, OSError) as e:
+            self._failed_reconnect_count += 1
+            self._next_reconnect_time = now + self._backoff_delay
+            self._backoff_delay = min(self._backoff_delay * 2.0,
+                                      self._max_reconnect_delay)
+            raise ShdlcConnectionLostError("Reconnecting to '{}' failed: {}"
+                                           .format(self.description, e))
+        self._reconnect_count += 1
+        self._last_downtime = time.monotonic() - self._lost_time
+        self._backoff_delay = self._reconnect_delay
+        log.info("ShdlcTcpPort reconnected to '{}' after {:.1f} s.".format(
+            self.description, self._last_downtime))
+
+    def _connection_lost(self, reason):
+        """
+        Close the socket after the connection was lost. Without
+        auto-reconnect, the port is closed.
+
+        :param reason: The reason (e.g. the exception which occurred).
+        :return: The exception to raise.
+        :rtype: ~sensirion_shdlc_driver.errors.ShdlcConnectionLostError
+        """
+        log.warning("ShdlcTcpPort lost connection to '{}': {}".format(
+            self.description, reason))
+        self._disconnect()
+        self._connection_lost_count += 1
+        self._lost_time = time.monotonic()
+        self._next_reconnect_time = 0.0  # First attempt without delay
+        if not self._auto_reconnect:
             self._is_open = False
+        return ShdlcConnectionLostError("{} ('{}')".format(
+            reason, self.description))
 
-    def transceive(self, slave_address, command_id, data, response_timeout):
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
         """
         Send SHDLC frame to the TCP socket and return received response frame.
 
+        Like the resync mode of
+        :py:class:`~sensirion_shdlc_driver.port.ShdlcSerialPort`, frames with
+        another slave address or command ID (e.g. late responses to previous
+        requests) are discarded. After a timeout or an invalid frame, all
+        received data is discarded.
+
         :param byte slave_address: Slave address.
         :param byte command_id: SHDLC command ID.
         :param bytes-like data: Payload.
         :param float response_timeout: Response timeout in seconds. The actual
             command response timeout is defined by the sum of this parameter
             and the socket base timeout.
+        :param byte max_response_length: Not used since the transmission time
+            is covered by the socket base timeout.
         :return: Received address, command_id, state, and payload.
         :rtype: byte, byte, byte, bytes
         :raise ~sensirion_shdlc_driver.errors.ShdlcTimeoutError:
             If no response received within timeout.
+        :raise ~sensirion_shdlc_driver.errors.ShdlcConnectionLostError:
+            If the connection was lost or is not established.
         :raise ~sensirion_shdlc_driver.errors.ShdlcResponseError:
             If the received response is invalid.
         """
         with self._lock:
-            self._socket.settimeout(self._socket_timeout + response_timeout)
+            self._ensure_connected()
             self._send_frame(slave_address, command_id, data)
-            return self._receive_frame()
+            deadline = time.monotonic() + self._socket_timeout + \
+                response_timeout
+            while True:
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0.0:
+                        raise ShdlcTimeoutError()
+                    self._socket.settimeout(remaining)
+                    frame = self._receive_frame()
+                except ShdlcConnectionLostError:
+                    raise
+                except (ShdlcTimeoutError, ShdlcResponseError):
+                    self._stream.clear()  # Drop partial or late responses
+                    raise
+                if frame[0] == slave_address and frame[1] == command_id:
+                    return frame
+                log.warning("ShdlcTcpPort discarded stale response from "
+                            "slave address {} with command ID 0x{:02X}."
+                            .format(frame[0], frame[1]))
+
+    def transceive_pipelined(self, requests):
+        """
+        Send multiple SHDLC frames and return the received response frames,
+        without waiting a full round trip for each request.
+
+        Up to
+        :py:attr:`~sensirion_shdlc_driver.port.ShdlcTcpPort.max_outstanding`
+        frames are sent back-to-back (in one TCP segment where possible), and
+        each received response allows to send the next frame. Responses are
+        matched to the requests in order by slave address and command ID.
+        If a response is skipped (e.g. the device didn't respond), the
+        skipped requests are reported as timed out. Invalid frames (e.g. line
+        noise) can't be matched to a request and are discarded, so the
+        request whose response was corrupted is reported as timed out too.
+        If nothing is received within the timeout, all outstanding requests
+        are reported as timed out. If the connection is lost (including a
+        timeout while sending), all outstanding and remaining requests are
+        reported with the
+        :py:class:`~sensirion_shdlc_driver.errors.ShdlcConnectionLostError`.
+
+        .. note:: Late responses to requests which timed out are not
+                  discarded, i.e. they might be received by the next call.
+
+        :param list requests: Sequence of ``(slave_address, command_id, data,
+            response_timeout, max_response_length)`` tuples, see
+            :py:meth:`~sensirion_shdlc_driver.port.ShdlcTcpPort.transceive`.
+        :return: For each request either the received address, command_id,
+            state, and payload, or the
+            :py:class:`~sensirion_shdlc_driver.errors.ShdlcTimeoutError`
+            which occurred.
+        :rtype: list
+        """
+        requests = list(requests)
+        results = [None] * len(requests)
+        outstanding = deque()  # Indices of sent requests
+        next_index = 0
+        with self._lock:
+            while next_index < len(requests) or len(outstanding):
+                try:
+                    free = self._max_outstanding - len(outstanding)
+                    if free > 0 and next_index < len(requests):
+                        self._ensure_connected()
+                        count = min(free, len(requests) - next_index)
+                        self._send_requests(
+                            requests[next_index:next_index + count])
+                        outstanding.extend(
+                            range(next_index, next_index + count))
+                        next_index += count
+                    self._socket.settimeout(self._socket_timeout +
+                                            requests[outstanding[0]][3])
+                    frame = self._receive_frame()
+                except ShdlcConnectionLostError as e:
+                    for index in list(outstanding) + \
+                            list(range(next_index, len(requests))):
+                        results[index] = e
+                    break
+                except ShdlcTimeoutError as e:
+                    self._stream.clear()
+                    while len(outstanding):
+                        results[outstanding.popleft()] = e
+                    continue
+                except ShdlcResponseError as e:
+                    log.warning("ShdlcTcpPort discarded invalid frame: {}"
+                                .format(e))
+                    continue
+                for index in outstanding:
+                    if requests[index][0] == frame[0] and \
+                            requests[index][1] == frame[1]:
+                        break
+                else:
+                    log.warning("ShdlcTcpPort discarded unexpected response "
+                                "from slave address {} with command ID "
+                                "0x{:02X}.".format(frame[0], frame[1]))
+                    continue
+                while outstanding[0] != index:
+                    results[outstanding.popleft()] = ShdlcTimeoutError()
+                results[outstanding.popleft()] = frame
+        return results
+
+    def _send_requests(self, requests):
+        """
+        Send the frames of multiple requests at once.
+
+        :param list requests: Sequence of ``(slave_address, command_id, data,
+            response_timeout, max_response_length)`` tuples.
+        """
+        if len(requests) == 1:
+            self._send_frame(*requests[0][:3])
+            return
+        batch = ShdlcSerialMosiBatchFrameBuilder(
+            [request[:3] for request in requests])
+        tx_data = batch.to_bytes()
+        if self._wire_traces:
+            self._trace_frames(batch)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ShdlcTcpPort send raw: [{}]".format(
+                ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
+        self._write(tx_data)
 
     def _send_frame(self, slave_address, command_id, data):
         """
@@ -485,33 +2008,108 @@ class ShdlcTcpPort(ShdlcPort):
         :param byte command_id: SHDLC command ID.
         :param bytes-like data: Payload.
         """
-        builder = ShdlcSerialMosiFrameBuilder(slave_address, command_id, data)
-        tx_data = builder.to_bytes()
-        log.debug("ShdlcTcpPort send raw: [{}]".format(
-                  ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
-        self._socket.send(tx_data)
+        tx_data = self._encode_frame(slave_address, command_id, data)
+        if self._wire_traces:
+            self._trace(ShdlcWireTrace.MOSI, tx_data)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("ShdlcTcpPort send raw: [{}]".format(
+                ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
+        self._write(tx_data)
+
+    def send_frames(self, frames):
+        """
+        Send multiple SHDLC frames at once without waiting for responses, e.g.
+        broadcast frames or frames to devices which do not respond. All frames
+        are encoded into one buffer and sent at once.
+
+        :param list frames: Sequence of ``(slave_address, command_id, data)``
+                            tuples.
+        """
+        batch = ShdlcSerialMosiBatchFrameBuilder(frames)
+        tx_data = batch.to_bytes()
+        with self._lock:
+            self._ensure_connected()
+            if self._wire_traces:
+                self._trace_frames(batch)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("ShdlcTcpPort send raw: [{}]".format(
+                    ", ".join(["0x%.2X" % i for i in bytearray(tx_data)])))
+            self._write(tx_data)
+
+    def _write(self, data):
+        """
+        Write data to the TCP socket. Unlike ``socket.send()``, all data is
+        written even if the kernel accepts only a part of it at once.
+
+        :param bytes-like data: The data to write.
+        :raise ~sensirion_shdlc_driver.errors.ShdlcConnectionLostError:
+            If the connection was lost, or sending timed out. In the latter
+            case an unknown part of the data was sent, so the connection is
+            dropped instead of continuing in the middle of a frame.
+        """
+        try:
+            self._socket.sendall(data)
+        except socket.timeout:
+            raise self._connection_lost("sending timed out")
+        except (socket.error, OSError) as e:
+            raise self._connection_lost(e)
+
+    def _encode_frame(self, slave_address, command_id, data):
+        """
+        Encode a frame, either by taking it from the frame cache or by
+        encoding it into the transmit buffer.
+
+        :param byte slave_address: Slave address.
+        :param byte command_id: SHDLC command ID.
+        :param bytes-like data: Payload.
+        :return: The raw frame, which is only valid until the next call.
+        :rtype: bytes-like
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        if self._frame_cache is not None:
+            tx_data = self._frame_cache.get(slave_address, command_id, data)
+            if tx_data is not None:
+                return tx_data
+        length = ShdlcSerialMosiFrameBuilder.encode_into(
+            self._tx_buffer, slave_address, command_id, data)
+        return self._tx_view[:length]
 
     def _receive_frame(self):
         """
         Wait for the response frame and return it.
 
+        Received data is decoded by a stream decoder which lives as long as
+        the port, so any data received after the response frame (e.g. the
+        next frame) is kept for the next call.
+
         :return: Received address, command_id, state, and payload.
         :rtype: byte, byte, byte, bytes
         """
-        builder = ShdlcSerialMisoFrameBuilder()
-
         try:
-            while True:
+            while not self._stream.available:
                 # Receive data from socket
                 # Note: recv buffer size should be a relatively small power
                 # of 2. See: https://docs.python.org/3/library/socket.html
                 new_data = self._socket.recv(1024)
                 if len(new_data) == 0:
-                    raise ShdlcTimeoutError()
-                # Process received data and return if the frame is complete
-                if builder.add_data(new_data):
-                    log.debug("ShdlcTcpPort received raw: [{}]".format(
-                              ", ".join(["0x%.2X" % i for i in builder.data])))
-                    return builder.interpret_data()
+                    raise self._connection_lost("closed by the server")
+                if self.SOCKET_OPTION_QUICKACK in self._socket_options:
+                    # The kernel may fall back to delayed ACKs at any time,
+                    # so the option needs to be set again after receiving.
+                    self._socket.setsockopt(socket.IPPROTO_TCP,
+                                            socket.TCP_QUICKACK, 1)
+                self._stream.add_data(new_data)
         except socket.timeout:
             raise ShdlcTimeoutError()
+        except (socket.error, OSError) as e:
+            raise self._connection_lost(e)
+        try:
+            return self._stream.get_frame()
+        finally:
+            if self._wire_traces:
+                self._trace(ShdlcWireTrace.MISO, self._stream.last_raw_frame)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("ShdlcTcpPort received raw: [{}]".format(
+                    ", ".join(["0x%.2X" % i for i in
+                               bytearray(self._stream.last_raw_frame)])))
@@ -3,6 +3,7 @@
 
 from __future__ import absolute_import, division, print_function
 from .errors import ShdlcResponseError
+from collections import deque
 
 import logging
 log = logging.getLogger(__name__)
@@ -21,6 +22,16 @@ class ShdlcSerialFrameBuilder(object):
     _ESCAPE_XOR = 0x20
     _CHARS_TO_ESCAPE = [_START_STOP_BYTE, _ESCAPE_BYTE, 0x11, 0x13]
 
+    # Lookup tables for bulk byte-stuffing with C-level bytes operations. The
+    # escape byte must be replaced first to not escape the inserted escapes.
+    _STUFFING_TABLE = [
+        (b"\x7d", b"\x7d\x5d"),
+        (b"\x7e", b"\x7d\x5e"),
+        (b"\x11", b"\x7d\x31"),
+        (b"\x13", b"\x7d\x33"),
+    ]
+    _UNSTUFFING_TABLE = bytes(bytearray(i ^ 0x20 for i in range(256)))
+
     # Maximum raw frame length when all bytes are stuffed:
     # START + 2 * (ADDRESS + COMMAND + STATE + LENGTH + DATA + CHECKSUM) + STOP
     # = 1 + 2 * (1 + 1 + 1 + 1 + 255 + 1) + 1
@@ -44,6 +55,28 @@ class ShdlcSerialFrameBuilder(object):
         """
         return ~sum(frame) & 0xFF
 
+    @staticmethod
+    def _unstuff_into(target, stuffed_data):
+        """
+        Undo byte-stuffing and append the result to a bytearray. The escape
+        bytes are located with C-level operations, so only stuffed bytes are
+        processed in Python.
+
+        :param bytearray target: The bytearray to append the data to.
+        :param bytes stuffed_data: The data with stuffed bytes.
+        :return: Whether the data ends with an escape byte, i.e. whether the
+                 first byte of the following data needs to be unstuffed.
+        :rtype: bool
+        """
+        parts = stuffed_data.split(b"\x7d")
+        target += parts[0]
+        for i in range(1, len(parts)):
+            part = parts[i]
+            target += part[:1].translate(
+                ShdlcSerialFrameBuilder._UNSTUFFING_TABLE)
+            target += part[1:]
+        return len(parts) > 1 and len(parts[-1]) == 0
+
 
 class ShdlcSerialMosiFrameBuilder(ShdlcSerialFrameBuilder):
     """
@@ -74,31 +107,99 @@ class ShdlcSerialMosiFrameBuilder(ShdlcSerialFrameBuilder):
         :rtype: bytes
         """
         frame_content = bytearray([self._slave_address, self._command_id,
-                                   len(self._data)]) + bytearray(self._data)
+                                   len(self._data)]) + self._data
         frame_content.append(self._calculate_checksum(frame_content))
-        raw_frame = bytearray()
-        raw_frame.append(self._START_STOP_BYTE)
-        raw_frame.extend(self._stuff_data_bytes(frame_content))
-        raw_frame.append(self._START_STOP_BYTE)
-        return bytes(raw_frame)
+        return b"\x7e" + self._stuff_data_bytes(frame_content) + b"\x7e"
+
+    @classmethod
+    def decode(cls, raw_data):
+        """
+        Decode a raw MOSI frame, i.e. the reverse of
+        :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMosiFrameBuilder.to_bytes`.
+        This is needed on the receiving side of requests, e.g. in gateways and
+        capture tools.
+
+        :param bytes-like raw_data: The raw frame, with or without start and
+            stop byte.
+        :return: Slave address, command ID and payload, or ``None`` if the
+                 frame is invalid.
+        :rtype: byte, byte, bytes
+        """
+        content = bytearray()
+        cls._unstuff_into(content, bytes(raw_data).strip(b"\x7e"))
+        if len(content) < 4 or content[2] != len(content) - 4 or \
+                sum(content) & 0xFF != 0xFF:
+            return None
+        return content[0], content[1], bytes(content[3:-1])
+
+    @classmethod
+    def encode_into(cls, buffer, slave_address, command_id, data, offset=0):
+        """
+        Encode a frame and write the raw bytes directly into a caller-supplied
+        buffer, without allocating intermediate frame copies. This allows to
+        reuse the same buffer for every frame.
+
+        :param bytearray/memoryview buffer: Writable buffer which must provide
+            at least 522 bytes (the maximum raw frame length) after
+            ``offset``, or at least as many bytes as the encoded frame needs.
+        :param byte slave_address: Slave address.
+        :param byte command_id: Command ID.
+        :param bytes-like data: Payload (can be empty).
+        :param int offset: Position in ``buffer`` where to write the frame.
+        :return: Number of bytes written to ``buffer``.
+        :rtype: int
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        header = bytearray([slave_address, command_id, len(data)])
+        checksum = ~(sum(header) + sum(data)) & 0xFF
+        with memoryview(buffer) as view:
+            view[offset] = cls._START_STOP_BYTE
+            position = cls._stuff_bytes_into(view, offset + 1, header)
+            stuffed = cls._stuff_data_bytes(data)
+            view[position:position + len(stuffed)] = stuffed
+            position += len(stuffed)
+            position = cls._stuff_bytes_into(view, position, [checksum])
+            view[position] = cls._START_STOP_BYTE
+        return position + 1 - offset
+
+    @classmethod
+    def _stuff_bytes_into(cls, view, position, data):
+        """
+        Perform byte-stuffing on a few bytes (e.g. the frame header) and write
+        them into a buffer.
+
+        :param memoryview view: The buffer to write to.
+        :param int position: Position in the buffer where to write the data.
+        :param iterable data: The bytes (integers) to write.
+        :return: The position after the written bytes.
+        :rtype: int
+        """
+        for b in data:
+            if b in cls._CHARS_TO_ESCAPE:
+                view[position] = cls._ESCAPE_BYTE
+                b ^= cls._ESCAPE_XOR
+                position += 1
+            view[position] = b
+            position += 1
+        return position
 
     @staticmethod
     def _stuff_data_bytes(data):
         """
         Perform byte-stuffing (escape reserved bytes).
 
-        :param bytearray data: The data without stuffed bytes.
+        The reserved bytes are replaced with C-level operations, data without
+        reserved bytes is not copied at all.
+
+        :param bytes-like data: The data without stuffed bytes.
         :return: The data with stuffed bytes.
-        :rtype: bytearray
+        :rtype: bytes
         """
-        result = bytearray()
-        for b in data:
-            if b in ShdlcSerialFrameBuilder._CHARS_TO_ESCAPE:
-                result.append(ShdlcSerialFrameBuilder._ESCAPE_BYTE)
-                result.append(b ^ ShdlcSerialFrameBuilder._ESCAPE_XOR)
-            else:
-                result.append(b)
-        return result
+        data = bytes(data)
+        for char, replacement in ShdlcSerialFrameBuilder._STUFFING_TABLE:
+            data = data.replace(char, replacement)
+        return data
 
 
 class ShdlcSerialMisoFrameBuilder(ShdlcSerialFrameBuilder):
@@ -182,6 +283,74 @@ class ShdlcSerialMisoFrameBuilder(ShdlcSerialFrameBuilder):
             raise ShdlcResponseError("Wrong checksum.", self._data)
         return address, command_id, state, data
 
+    @staticmethod
+    def encode(slave_address, command_id, state, data):
+        """
+        Encode a raw MISO frame, i.e. the reverse of
+        :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameBuilder.interpret_data`.
+        This is needed on the responding side, e.g. in gateways and device
+        simulators.
+
+        :param byte slave_address: Slave address.
+        :param byte command_id: Command ID.
+        :param byte state: State byte.
+        :param bytes-like data: Payload (can be empty).
+        :return: The raw frame, including start and stop byte.
+        :rtype: bytes
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        content = bytearray([slave_address, command_id, state, len(data)])
+        content += data
+        content.append(ShdlcSerialFrameBuilder._calculate_checksum(content))
+        return b"\x7e" + \
+            ShdlcSerialMosiFrameBuilder._stuff_data_bytes(content) + b"\x7e"
+
+    @classmethod
+    def decode_from(cls, raw_data, buffer):
+        """
+        Decode a complete raw frame into a caller-supplied buffer and return
+        the payload as a memoryview on that buffer. This allows to reuse the
+        same buffer for every frame, without allocating a payload copy.
+
+        .. note:: The returned payload refers to ``buffer``, so it's only
+                  valid until the buffer gets overwritten (e.g. by decoding
+                  the next frame).
+
+        :param bytes-like raw_data: Raw data containing a complete frame
+            (including start and stop byte).
+        :param bytearray/memoryview buffer: Writable buffer for the unstuffed
+            frame. Must provide at least 260 bytes to hold the longest frame.
+        :return: Received address, command_id, state, and payload.
+        :rtype: byte, byte, byte, memoryview
+        :raise ~sensirion_shdlc_driver.errors.ShdlcResponseError:
+            If the frame is incomplete or invalid.
+        """
+        if not isinstance(raw_data, (bytes, bytearray)):
+            raw_data = bytes(raw_data)
+        start = raw_data.find(cls._START_STOP_BYTE)
+        stop = raw_data.find(cls._START_STOP_BYTE, start + 1)
+        if start < 0 or stop < 0:
+            raise ShdlcResponseError("Frame is incomplete.", raw_data)
+        view = memoryview(buffer)
+        length = 0
+        xor = 0x00
+        for part in raw_data[start + 1:stop].split(b"\x7d"):
+            if length + len(part) > len(view):
+                raise ShdlcResponseError("Response is too long.", raw_data)
+            if len(part) > 0:
+                view[length:length + len(part)] = part
+                view[length] ^= xor
+                length += len(part)
+            xor = cls._ESCAPE_XOR
+        if length < 5:
+            raise ShdlcResponseError("Response is too short.", raw_data)
+        if view[3] != length - 5:
+            raise ShdlcResponseError("Wrong length.", raw_data)
+        if sum(view[:length]) & 0xFF != 0xFF:
+            raise ShdlcResponseError("Wrong checksum.", raw_data)
+        return view[0], view[1], view[2], view[4:length - 1]
+
     @staticmethod
     def _unstuff_data_bytes(stuffed_data):
         """
@@ -192,11 +361,386 @@ class ShdlcSerialMisoFrameBuilder(ShdlcSerialFrameBuilder):
         :rtype: bytearray
         """
         data = bytearray()
-        xor = 0x00
-        for i in range(0, len(stuffed_data)):
-            if stuffed_data[i] == ShdlcSerialFrameBuilder._ESCAPE_BYTE:
-                xor = ShdlcSerialFrameBuilder._ESCAPE_XOR
-            else:
-                data.append(stuffed_data[i] ^ xor)
-                xor = 0x00
+        ShdlcSerialFrameBuilder._unstuff_into(data, bytes(stuffed_data))
         return data
+
+
+class ShdlcSerialMisoFrameDecoder(ShdlcSerialFrameBuilder):
+    """
+    Incremental serial MISO (master in, slave out) frame decoder.
+
+    In contrast to
+    :py:class:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameBuilder`,
+    this class keeps its parse state between calls of
+    :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameDecoder.add_data`.
+    Start and stop bytes are searched with C-level operations, and the frame
+    content in between is only collected until the stop byte (or the header,
+    see :py:attr:`min_remaining_length`) is needed. Then it is unstuffed and
+    added to the checksum in bulk, exactly once per byte. So the processing
+    time per byte stays constant no matter in how many chunks a frame is
+    received (e.g. byte by byte from a serial port), and no byte is handled
+    one by one in Python.
+    """
+
+    _STATE_IDLE = 0  # Waiting for the start byte
+    _STATE_FRAME = 1  # Receiving the frame content
+    _STATE_ESCAPE = 2  # Escape byte received, next byte needs to be unstuffed
+    _STATE_DONE = 3  # Stop byte received, frame is complete
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        super(ShdlcSerialMisoFrameDecoder, self).__init__()
+        self._data = bytearray()
+        self._frame = bytearray()
+        self._pending = bytearray()  # Stuffed content not yet unstuffed
+        self._state = self._STATE_IDLE
+        self._checksum = 0
+        self._skipped = 0  # Number of bytes discarded before the start byte
+        self._result = None
+        self._error = None
+
+    @property
+    def data(self):
+        """
+        Get the received raw data.
+
+        :return: The received raw data.
+        :rtype: bytearray
+        """
+        return self._data
+
+    @property
+    def error(self):
+        """
+        Get the error of the complete frame, if it is invalid.
+
+        :return: The error which
+            :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameDecoder.interpret_data`
+            raises, or ``None`` if the frame is valid or not complete yet.
+        :rtype: ~sensirion_shdlc_driver.errors.ShdlcResponseError
+        """
+        return self._error
+
+    @property
+    def start_received(self):
+        """
+        Check if the start byte was already received.
+
+        :return: Whether the start byte was already received or not.
+        :rtype: bool
+        """
+        return self._state != self._STATE_IDLE
+
+    @property
+    def min_remaining_length(self):
+        """
+        Get the minimum number of raw bytes still needed to complete the frame.
+        Once the header is received, this is derived from the length byte.
+        Since byte-stuffing can only add bytes, the actual number may be
+        higher, but never lower, so it is safe to read exactly this number of
+        bytes without reading beyond the end of the frame.
+
+        :return: Minimum number of missing raw bytes (0 if complete).
+        :rtype: int
+        """
+        if self._state == self._STATE_DONE:
+            return 0
+        elif self._state == self._STATE_IDLE:
+            return 7  # Start, header (4), checksum and stop byte
+        self._flush_pending()
+        received = len(self._frame)
+        if received < 4:
+            missing = 5 - received  # Rest of header and checksum
+        else:
+            missing = max(5 + self._frame[3] - received, 0)
+        return missing + 1  # Stop byte
+
+    def add_data(self, data):
+        """
+        Add more data (received from the serial port) and check if a complete
+        frame is received.
+
+        :param bytes-like data: The bytes received from the serial port.
+        :return: Whether the received data contains a complete frame or not.
+        :rtype: bool
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        self._data += data
+        state = self._state
+        if state == self._STATE_DONE:
+            return True
+        elif state != self._STATE_IDLE and \
+                data.find(self._START_STOP_BYTE) < 0:
+            self._pending += data  # Same fast path as in _decode()
+        elif self._decode(data) and self._state == self._STATE_DONE:
+            return True
+        if len(self._data) > self._MAX_RAW_FRAME_LENGTH:
+            # Abort condition in case we are receiving endless rubbish.
+            raise ShdlcResponseError("Response is too long.", self._data)
+        return False
+
+    def interpret_data(self):
+        """
+        Return the frame which was decoded while adding the data.
+
+        :return: Received address, command_id, state, and payload.
+        :rtype: byte, byte, byte, bytes
+        :raise ~sensirion_shdlc_driver.errors.ShdlcResponseError:
+            If the received frame is invalid or incomplete.
+        """
+        if self._error is not None:
+            raise self._error
+        if self._result is None:
+            raise ShdlcResponseError("Frame is incomplete.", self._data)
+        return self._result
+
+    def _decode(self, data):
+        """
+        Feed raw bytes into the state machine until the stop byte is found.
+
+        :param bytes-like data: The raw bytes to decode.
+        :return: Number of consumed bytes (i.e. the index after the stop byte
+                 if a frame was completed, otherwise the length of ``data``).
+        :rtype: int
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        if self._state != self._STATE_IDLE and \
+                data.find(self._START_STOP_BYTE) < 0:
+            # Fast path for content without stop byte (e.g. single bytes).
+            self._pending += data
+            return len(data)
+        position = 0
+        length = len(data)
+        while position < length:
+            if self._state == self._STATE_IDLE:
+                start = data.find(self._START_STOP_BYTE, position)
+                if start < 0:
+                    self._skipped += length - position
+                    break
+                self._skipped += start - position
+                self._state = self._STATE_FRAME
+                position = start + 1
+                continue
+            stop = data.find(self._START_STOP_BYTE, position)
+            if stop < 0:
+                self._pending += data[position:]
+                break
+            self._pending += data[position:stop]
+            position = stop + 1
+            self._flush_pending()
+            if len(self._frame) == 0:
+                continue  # Two consecutive start bytes, keep waiting
+            self._state = self._STATE_DONE
+            self._validate()
+            return position
+        return length
+
+    def _flush_pending(self):
+        """
+        Unstuff the collected frame content and add it to the frame.
+        """
+        if len(self._pending):
+            self._add_stuffed_content(bytes(self._pending))
+            del self._pending[:]
+
+    def _add_stuffed_content(self, stuffed_data):
+        """
+        Unstuff frame content, append it to the frame and update the checksum.
+
+        :param bytes stuffed_data: Frame content without start/stop bytes.
+        """
+        if self._state == self._STATE_ESCAPE:
+            stuffed_data = b"\x7d" + stuffed_data
+        offset = len(self._frame)
+        escape = self._unstuff_into(self._frame, stuffed_data)
+        self._state = self._STATE_ESCAPE if escape else self._STATE_FRAME
+        with memoryview(self._frame) as view:
+            self._checksum += sum(view[offset:])
+
+    def _validate(self):
+        """
+        Validate the completely received frame and store the result (or the
+        error if the frame is invalid).
+        """
+        frame = self._frame
+        if len(frame) < 5:
+            self._error = ShdlcResponseError("Response is too short.",
+                                             self._data)
+        elif frame[3] != len(frame) - 5:
+            self._error = ShdlcResponseError("Wrong length.", self._data)
+        elif self._checksum & 0xFF != 0xFF:
+            # The checksum is the inverted sum of all other bytes, so the sum
+            # over all bytes (including the checksum) must be 0xFF.
+            self._error = ShdlcResponseError("Wrong checksum.", self._data)
+        else:
+            self._result = (frame[0], frame[1], frame[2], bytes(frame[4:-1]))
+
+
+class ShdlcSerialMisoFrameStream(object):
+    """
+    Serial MISO (master in, slave out) frame stream decoder.
+
+    In contrast to
+    :py:class:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameDecoder`,
+    which decodes exactly one frame, this class decodes a continuous stream of
+    raw bytes containing any number of frames. Each complete frame is queued
+    until it is fetched with
+    :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameStream.get_frame`,
+    and incomplete frames are kept until the remaining bytes are added. So a
+    single instance can be used for the whole lifetime of a port.
+
+    Rubbish between frames is discarded. If a frame turns out to be invalid,
+    its stop byte is used as start byte of the next frame, so the stream
+    resynchronizes even if the rubbish contains a start/stop byte.
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        super(ShdlcSerialMisoFrameStream, self).__init__()
+        self._decoder = ShdlcSerialMisoFrameDecoder()
+        self._raw = bytearray()  # Raw data of the incomplete frame
+        self._frames = deque()
+        self._last_raw_frame = b""
+        self._discarded_bytes = 0
+
+    @property
+    def start_received(self):
+        """
+        Check if the start byte of an incomplete frame was already received.
+
+        :return: Whether the start byte was already received or not.
+        :rtype: bool
+        """
+        return self._decoder.start_received
+
+    @property
+    def min_remaining_length(self):
+        """
+        Get the minimum number of raw bytes still needed to complete the
+        current frame, see
+        :py:attr:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameDecoder.min_remaining_length`.
+
+        :return: Minimum number of missing raw bytes.
+        :rtype: int
+        """
+        return self._decoder.min_remaining_length
+
+    @property
+    def available(self):
+        """
+        Get the number of complete frames which can be fetched with
+        :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameStream.get_frame`.
+
+        :return: Number of complete (valid or invalid) frames.
+        :rtype: int
+        """
+        return len(self._frames)
+
+    @property
+    def last_raw_frame(self):
+        """
+        Get the raw data of the frame last returned (or raised) by
+        :py:meth:`~sensirion_shdlc_driver.serial_frame_builder.ShdlcSerialMisoFrameStream.get_frame`.
+
+        :return: The raw frame, including start and stop byte.
+        :rtype: bytes
+        """
+        return self._last_raw_frame
+
+    @property
+    def discarded_bytes(self):
+        """
+        Get the total number of received bytes which were discarded because
+        they were not part of a frame.
+
+        :return: Number of discarded bytes.
+        :rtype: int
+        """
+        return self._discarded_bytes + self._decoder._skipped
+
+    def add_data(self, data):
+        """
+        Add more data (received from the port) and decode all frames which
+        are completed by this data.
+
+        :param bytes-like data: The bytes received from the port.
+        :return: Whether at least one complete frame is available or not.
+        :rtype: bool
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(bytearray(data))  # Allow arbitrary iterables
+        position = 0
+        while position < len(data):
+            decoder = self._decoder
+            skipped = decoder._skipped
+            chunk = data[position:] if position > 0 else data
+            consumed = decoder._decode(chunk)
+            self._raw += chunk[decoder._skipped - skipped:consumed]
+            position += consumed
+            if decoder._state == decoder._STATE_DONE:
+                self._finish_frame()
+            elif len(self._raw) > decoder._MAX_RAW_FRAME_LENGTH:
+                # Abort condition in case we are receiving endless rubbish.
+                self._frames.append((None, ShdlcResponseError(
+                    "Response is too long.", self._raw), bytes(self._raw)))
+                self._restart(start_received=False)
+        return len(self._frames) > 0
+
+    def get_frame(self):
+        """
+        Get the oldest completely received frame and remove it from the queue.
+
+        :return: Received address, command_id, state, and payload, or ``None``
+                 if there is no complete frame available.
+        :rtype: byte, byte, byte, bytes
+        :raise ~sensirion_shdlc_driver.errors.ShdlcResponseError:
+            If the oldest received frame is invalid.
+        """
+        if len(self._frames) == 0:
+            return None
+        result, error, self._last_raw_frame = self._frames.popleft()
+        if error is not None:
+            raise error
+        return result
+
+    def clear(self):
+        """
+        Discard all received frames and the data of an incomplete frame.
+        """
+        self._discarded_bytes += len(self._raw) + sum(
+            len(raw) for _, _, raw in self._frames)
+        self._frames.clear()
+        self._restart(start_received=False)
+
+    def _finish_frame(self):
+        """
+        Queue the frame completed by the decoder and restart decoding.
+        """
+        decoder = self._decoder
+        if decoder._error is None:
+            self._frames.append((decoder._result, None, bytes(self._raw)))
+            self._restart(start_received=False)
+        else:
+            # Do not consume the stop byte of invalid frames. If the frame was
+            # rubbish, it's actually the start byte of the next frame.
+            self._frames.append((None, decoder._error, bytes(self._raw)))
+            self._restart(start_received=True)
+
+    def _restart(self, start_received):
+        """
+        Reset the decoder to receive the next frame.
+
+        :param bool start_received: Whether the next frame is already started.
+        """
+        self._discarded_bytes += self._decoder._skipped
+        self._decoder = ShdlcSerialMisoFrameDecoder()
+        self._raw = bytearray()
+        if start_received:
+            self._decoder._state = self._decoder._STATE_FRAME
+            self._raw.append(ShdlcSerialFrameBuilder._START_STOP_BYTE)
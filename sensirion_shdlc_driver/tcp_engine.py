@@ -0,0 +1,748 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from .connection import ShdlcConnection
+from .serial_frame_builder import ShdlcSerialMisoFrameStream, \
+    ShdlcSerialMosiFrameBuilder
+from .errors import ShdlcConnectionLostError, ShdlcError, \
+    ShdlcResponseError, ShdlcTimeoutError
+from collections import deque
+from concurrent.futures import Future
+from itertools import count
+from threading import Event, Lock, Thread
+import errno
+import heapq
+import os
+import selectors
+import socket
+import time
+
+import logging
+log = logging.getLogger(__name__)
+
+_DISCONNECTED = 0
+_CONNECTING = 1
+_CONNECTED = 2
+
+_READ_CHUNK_SIZE = 4096
+# The timer heap is rebuilt if it contains more replaced entries than this,
+# and more replaced than valid ones.
+_MAX_STALE_TIMERS = 64
+_CONNECT_IN_PROGRESS = (0, errno.EINPROGRESS, errno.EWOULDBLOCK,
+                        errno.EALREADY)
+
+
+class _Request(object):
+    """
+    A request submitted to an endpoint.
+    """
+
+    def __init__(self, slave_address, command_id, data, response_timeout,
+                 command=None):
+        super(_Request, self).__init__()
+        self.slave_address = slave_address
+        self.command_id = command_id
+        self.data = bytes(data)
+        self.response_timeout = float(response_timeout)
+        self.command = command
+        self.future = Future()
+        self.deadline = None
+
+
+class ShdlcTcpEndpoint(object):
+    """
+    A TCP SHDLC gateway registered in a
+    :py:class:`~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEngine`, used to
+    address requests. Created by
+    :py:meth:`~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEngine.add_endpoint`.
+    """
+
+    def __init__(self, ip, port):
+        super(ShdlcTcpEndpoint, self).__init__()
+        self._ip = ip
+        self._port = int(port)
+        self._socket = None
+        self._state = _DISCONNECTED
+        self._connect_deadline = None
+        self._stream = ShdlcSerialMisoFrameStream()
+        self._tx = bytearray()
+        self._queue = deque()  # Requests waiting to be sent
+        self._active = None  # Request waiting for its response
+        self._ready_time = 0.0  # End of post processing of the last command
+        self._pending = 0  # Submitted and not yet finished requests
+        self._timer = None  # (time, sequence) of the valid timer, if any
+        self._removed = False
+        self._backoff_delay = None
+        self._next_connect_time = 0.0
+        self._connected_before = False
+        self._connection_lost_count = 0
+        self._reconnect_count = 0
+        self._failed_connect_count = 0
+
+    @property
+    def description(self):
+        """
+        Get the description of the endpoint.
+
+        :return: Description string ("<ip>:<port>").
+        :rtype: string
+        """
+        return '{}:{}'.format(self._ip, self._port)
+
+    @property
+    def is_connected(self):
+        """
+        Indicates whether the endpoint is currently connected. The connection
+        is established with the first request.
+
+        :return: Whether the socket is connected.
+        :rtype: bool
+        """
+        return self._state == _CONNECTED
+
+    @property
+    def pending_count(self):
+        """
+        Get the number of submitted requests which are not finished yet.
+
+        :return: Number of pending requests.
+        :rtype: int
+        """
+        return self._pending
+
+    @property
+    def connection_stats(self):
+        """
+        Get statistics about the connection health.
+
+        :return: Dict with the keys ``connection_lost_count`` (number of
+            lost connections), ``reconnect_count`` (number of successful
+            reconnects) and ``failed_connect_count`` (number of failed
+            connection attempts).
+        :rtype: dict
+        """
+        return dict(connection_lost_count=self._connection_lost_count,
+                    reconnect_count=self._reconnect_count,
+                    failed_connect_count=self._failed_connect_count)
+
+
+class ShdlcTcpEngine(object):
+    """
+    Engine which communicates with many TCP SHDLC gateways (e.g. gateways
+    served by :py:class:`~sensirion_shdlc_driver.gateway.ShdlcTcpGateway`)
+    from a single thread.
+
+    Unlike :py:class:`~sensirion_shdlc_driver.port.ShdlcTcpPort`, requests
+    don't block: They are submitted from any thread and return a
+    :py:class:`concurrent.futures.Future` which is resolved by the engine
+    thread. All sockets are non-blocking and handled with one
+    :py:mod:`selectors` loop, so polling a whole plant needs neither a
+    thread per gateway nor a serial sweep.
+
+    Each endpoint sends one request at a time and the next one as soon as
+    the response was received, so the endpoints are polled in parallel while
+    each bus is used back-to-back. Endpoints connect on their first request,
+    with TCP_NODELAY and TCP keepalive enabled. If the connection is lost, the
+    request on the wire fails with
+    :py:class:`~sensirion_shdlc_driver.errors.ShdlcConnectionLostError` and
+    the endpoint reconnects for the next request. If connecting fails, all
+    queued requests fail and further attempts are delayed with exponential
+    backoff, as with ``auto_reconnect`` of
+    :py:class:`~sensirion_shdlc_driver.port.ShdlcTcpPort`.
+
+    The memory usage is bounded: At most ``max_pending`` requests are
+    accepted per endpoint, and each endpoint has only one request frame on
+    the wire.
+
+    .. note:: Callbacks added to the futures are called in the engine thread
+              if the future is finished there, so they must not block.
+              Endpoints should be given by IP address since host names are
+              resolved with a blocking call.
+
+    .. note:: This class can be used in a "with"-statement, and it's
+              recommended to do so as it automatically stops the engine.
+    """
+
+    def __init__(self, socket_timeout=5.0, max_pending=64,
+                 reconnect_delay=0.1, max_reconnect_delay=30.0):
+        """
+        Start the engine thread.
+
+        :param float socket_timeout: Timeout in seconds for connecting, and
+            the base timeout for waiting for a response. The response timeout
+            of each request is added.
+        :param int max_pending: Maximum number of pending requests per
+            endpoint.
+        :param float reconnect_delay: Delay in seconds after the first failed
+            connection attempt. It is doubled after every further failed
+            attempt.
+        :param float max_reconnect_delay: Maximum delay in seconds between
+            connection attempts.
+        """
+        super(ShdlcTcpEngine, self).__init__()
+        self._socket_timeout = float(socket_timeout)
+        self._max_pending = int(max_pending)
+        self._reconnect_delay = float(reconnect_delay)
+        self._max_reconnect_delay = float(max_reconnect_delay)
+        self._endpoints = []
+        self._lock = Lock()
+        self._calls = deque()  # Functions to call in the engine thread
+        self._timers = []  # Heap of (time, sequence, endpoint)
+        self._stale_timers = 0  # Replaced entries still in the heap
+        self._sequence = count()
+        self._stopped = Event()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self._selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+        self._thread = Thread(target=self._loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def endpoints(self):
+        """
+        Get all registered endpoints.
+
+        :return: List of endpoints.
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._endpoints)
+
+    def add_endpoint(self, ip, port):
+        """
+        Register a TCP SHDLC gateway. It's connected with the first request.
+
+        :param string ip: The IP address (e.g. "192.168.100.200").
+        :param int port: The TCP port.
+        :return: The endpoint to address requests to.
+        :rtype: ~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEndpoint
+        """
+        endpoint = ShdlcTcpEndpoint(ip, port)
+        endpoint._backoff_delay = self._reconnect_delay
+        with self._lock:
+            self._endpoints.append(endpoint)
+        return endpoint
+
+    def remove_endpoint(self, endpoint):
+        """
+        Remove an endpoint and close its connection. Its pending requests
+        fail with
+        :py:class:`~sensirion_shdlc_driver.errors.ShdlcConnectionLostError`.
+
+        :param ~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEndpoint endpoint:
+            The endpoint.
+        """
+        with self._lock:
+            self._endpoints.remove(endpoint)
+            endpoint._removed = True
+        self._call_soon(self._close_endpoint, endpoint, "endpoint removed")
+
+    def submit(self, endpoint, slave_address, command_id, data,
+               response_timeout):
+        """
+        Submit a raw SHDLC request.
+
+        :param ~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEndpoint endpoint:
+            The endpoint to send the request to.
+        :param byte slave_address: Slave address.
+        :param byte command_id: SHDLC command ID.
+        :param bytes-like data: Payload (may be empty).
+        :param float response_timeout: Response timeout in seconds (maximum
+                                       time until the first byte is received).
+        :return: Future of the received address, command_id, state, and
+                 payload. It fails with
+                 :py:class:`~sensirion_shdlc_driver.errors.ShdlcTimeoutError`
+                 (or its subclass
+                 :py:class:`~sensirion_shdlc_driver.errors.ShdlcConnectionLostError`).
+                 Invalid frames are discarded, so a corrupted response
+                 results in a timeout.
+        :rtype: concurrent.futures.Future
+        :raise ~sensirion_shdlc_driver.errors.ShdlcError:
+            If the engine is stopped, the endpoint was removed, or it has
+            already ``max_pending`` pending requests.
+        """
+        return self._submit(endpoint, _Request(
+            slave_address, command_id, data, response_timeout))
+
+    def execute(self, endpoint, slave_address, command):
+        """
+        Submit an SHDLC command. Like
+        :py:meth:`~sensirion_shdlc_driver.connection.ShdlcConnection.execute`,
+        the response is validated and interpreted, and the next request to
+        the endpoint is delayed until the post processing of the command is
+        done.
+
+        :param ~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEndpoint endpoint:
+            The endpoint to send the command to.
+        :param byte slave_address: Slave address.
+        :param ~sensirion_shdlc_driver.command.ShdlcCommand command:
+            SHDLC command to execute.
+        :return: Future of the received response (interpreted) and error
+                 state flag. It fails with the same exceptions as
+                 :py:meth:`~sensirion_shdlc_driver.connection.ShdlcConnection.execute`.
+        :rtype: concurrent.futures.Future
+        :raise ~sensirion_shdlc_driver.errors.ShdlcError:
+            If the engine is stopped, the endpoint was removed, or it has
+            already ``max_pending`` pending requests.
+        """
+        return self._submit(endpoint, _Request(
+            slave_address, command.id, command.data, command.max_response_time,
+            command))
+
+    def stop(self):
+        """
+        Close all connections and stop the engine thread. All pending
+        requests fail. Does nothing if the engine is already stopped.
+        """
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            self._stopped.set()
+        self._wakeup()
+        self._thread.join()
+        self._selector.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def _submit(self, endpoint, request):
+        """
+        Queue a request in the engine thread.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param _Request request: The request.
+        :return: The future of the request.
+        :rtype: concurrent.futures.Future
+        """
+        with self._lock:
+            if self._stopped.is_set():
+                raise ShdlcError("ShdlcTcpEngine is stopped.")
+            if endpoint._removed:
+                raise ShdlcError("Endpoint '{}' was removed."
+                                 .format(endpoint.description))
+            if endpoint._pending >= self._max_pending:
+                raise ShdlcError("Endpoint '{}' has already {} pending "
+                                 "requests.".format(endpoint.description,
+                                                    endpoint._pending))
+            endpoint._pending += 1
+            self._calls.append((self._enqueue, (endpoint, request)))
+        self._wakeup()
+        return request.future
+
+    def _call_soon(self, function, *args):
+        """
+        Call a function in the engine thread.
+
+        :param callable function: The function.
+        :param args: Its arguments.
+        """
+        with self._lock:
+            self._calls.append((function, args))
+        self._wakeup()
+
+    def _wakeup(self):
+        """
+        Wake up the engine thread.
+        """
+        try:
+            self._wakeup_sender.send(b"\x00")
+        except (BlockingIOError, InterruptedError):
+            pass  # Already woken up
+
+    def _update_timer(self, endpoint):
+        """
+        Schedule servicing an endpoint at its next deadline (connection
+        attempt, response or end of post processing). Each endpoint has at
+        most one valid timer, a previous one is replaced and skipped when it
+        expires.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        deadlines = []
+        if endpoint._state == _CONNECTING:
+            deadlines.append(endpoint._connect_deadline)
+        if endpoint._active is not None:
+            deadlines.append(endpoint._active.deadline)
+        elif len(endpoint._queue) and \
+                endpoint._ready_time > time.monotonic():
+            deadlines.append(endpoint._ready_time)
+        when = min(deadlines) if len(deadlines) else None
+        if endpoint._timer is not None:
+            if endpoint._timer[0] == when:
+                return
+            self._stale_timers += 1
+            endpoint._timer = None
+        if when is not None:
+            endpoint._timer = (when, next(self._sequence))
+            heapq.heappush(self._timers, endpoint._timer + (endpoint,))
+        if self._stale_timers > _MAX_STALE_TIMERS and \
+                self._stale_timers * 2 > len(self._timers):
+            self._timers = [t for t in self._timers if t[2]._timer == t[:2]]
+            heapq.heapify(self._timers)
+            self._stale_timers = 0
+
+    def _loop(self):
+        """
+        The engine thread.
+        """
+        while not self._stopped.is_set():
+            timeout = None
+            if len(self._timers):
+                timeout = max(self._timers[0][0] - time.monotonic(), 0.0)
+            for key, events in self._selector.select(timeout):
+                endpoint = key.data
+                if endpoint is None:
+                    self._handle_wakeup()
+                elif key.fileobj is not endpoint._socket:
+                    continue  # Closed while handling previous events
+                elif endpoint._state == _CONNECTING:
+                    self._finish_connect(endpoint)
+                else:
+                    if events & selectors.EVENT_WRITE:
+                        self._flush(endpoint)
+                    if events & selectors.EVENT_READ and \
+                            key.fileobj is endpoint._socket:
+                        self._read(endpoint)
+            now = time.monotonic()
+            while len(self._timers) and self._timers[0][0] <= now:
+                when, sequence, endpoint = heapq.heappop(self._timers)
+                if endpoint._timer != (when, sequence):
+                    self._stale_timers -= 1
+                    continue
+                endpoint._timer = None
+                self._service(endpoint)
+        self._handle_wakeup()  # Fails requests submitted meanwhile
+        for endpoint in self.endpoints:
+            self._close_endpoint(endpoint, "engine stopped")
+
+    def _handle_wakeup(self):
+        """
+        Run all functions passed to
+        :py:meth:`~sensirion_shdlc_driver.tcp_engine.ShdlcTcpEngine._call_soon`.
+        """
+        try:
+            while self._wakeup_receiver.recv(_READ_CHUNK_SIZE):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._lock:
+            calls = list(self._calls)
+            self._calls.clear()
+        for function, args in calls:
+            function(*args)
+
+    def _enqueue(self, endpoint, request):
+        """
+        Queue a submitted request.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param _Request request: The request.
+        """
+        if self._stopped.is_set():
+            self._finish(endpoint, request,
+                         error=ShdlcError("ShdlcTcpEngine stopped."))
+            return
+        if endpoint._removed:
+            self._finish(endpoint, request, error=ShdlcConnectionLostError(
+                "endpoint '{}' removed".format(endpoint.description)))
+            return
+        endpoint._queue.append(request)
+        self._send_next(endpoint)
+
+    def _service(self, endpoint):
+        """
+        Handle expired deadlines of an endpoint and send the next request if
+        possible.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        now = time.monotonic()
+        if endpoint._state == _CONNECTING and \
+                now >= endpoint._connect_deadline:
+            self._connect_failed(endpoint, "connection timed out")
+        request = endpoint._active
+        if request is not None and now >= request.deadline:
+            log.debug("ShdlcTcpEngine got no response from '{}'."
+                      .format(endpoint.description))
+            endpoint._active = None
+            endpoint._stream.clear()  # Drop partially received response
+            self._finish(endpoint, request, error=ShdlcTimeoutError())
+        self._send_next(endpoint)
+
+    def _send_next(self, endpoint):
+        """
+        Send the next queued request of an endpoint if it's idle, connecting
+        first if needed, and schedule its next deadline.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        self._start_next(endpoint)
+        self._update_timer(endpoint)
+
+    def _start_next(self, endpoint):
+        """
+        Send the next queued request of an endpoint if it's idle, connecting
+        first if needed.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        if endpoint._active is not None or len(endpoint._queue) == 0:
+            return
+        now = time.monotonic()
+        if now < endpoint._ready_time:
+            return  # Scheduled by _update_timer()
+        if endpoint._state == _DISCONNECTED:
+            self._connect(endpoint)
+            return
+        if endpoint._state == _CONNECTING:
+            return
+        while len(endpoint._queue):
+            request = endpoint._queue.popleft()
+            if request.future.set_running_or_notify_cancel():
+                break
+            self._finish(endpoint, request)  # Cancelled by the caller
+        else:
+            return
+        request.deadline = now + self._socket_timeout + \
+            request.response_timeout
+        endpoint._active = request
+        endpoint._tx += ShdlcSerialMosiFrameBuilder(
+            request.slave_address, request.command_id,
+            request.data).to_bytes()
+        self._flush(endpoint)
+
+    def _connect(self, endpoint):
+        """
+        Start connecting an endpoint without blocking.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        now = time.monotonic()
+        if now < endpoint._next_connect_time:
+            self._fail_queued(endpoint, ShdlcConnectionLostError(
+                "not connected to '{}', next connection attempt in {:.1f} s"
+                .format(endpoint.description,
+                        endpoint._next_connect_time - now)))
+            return
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        endpoint._socket = sock
+        try:
+            error = sock.connect_ex((endpoint._ip, endpoint._port))
+        except (socket.error, OSError) as e:  # e.g. unresolvable host name
+            self._connect_failed(endpoint, e)
+            return
+        if error not in _CONNECT_IN_PROGRESS:
+            self._connect_failed(endpoint, os.strerror(error))
+            return
+        endpoint._state = _CONNECTING
+        endpoint._connect_deadline = now + self._socket_timeout
+        self._selector.register(sock, selectors.EVENT_WRITE, endpoint)
+
+    def _finish_connect(self, endpoint):
+        """
+        Complete a connection attempt after the socket became writable.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        error = endpoint._socket.getsockopt(socket.SOL_SOCKET,
+                                            socket.SO_ERROR)
+        if error != 0:
+            self._connect_failed(endpoint, os.strerror(error))
+            self._update_timer(endpoint)
+            return
+        endpoint._state = _CONNECTED
+        endpoint._backoff_delay = self._reconnect_delay
+        if endpoint._connected_before:
+            endpoint._reconnect_count += 1
+        endpoint._connected_before = True
+        self._selector.modify(endpoint._socket, selectors.EVENT_READ,
+                              endpoint)
+        log.debug("ShdlcTcpEngine connected to '{}'."
+                  .format(endpoint.description))
+        self._send_next(endpoint)
+
+    def _connect_failed(self, endpoint, reason):
+        """
+        Handle a failed connection attempt: Fail all queued requests and
+        delay the next attempt.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param reason: The reason (e.g. the exception which occurred).
+        """
+        log.info("ShdlcTcpEngine could not connect to '{}': {}"
+                 .format(endpoint.description, reason))
+        self._disconnect(endpoint)
+        endpoint._failed_connect_count += 1
+        endpoint._next_connect_time = time.monotonic() + \
+            endpoint._backoff_delay
+        endpoint._backoff_delay = min(endpoint._backoff_delay * 2.0,
+                                      self._max_reconnect_delay)
+        self._fail_queued(endpoint, ShdlcConnectionLostError(
+            "connecting to '{}' failed: {}".format(endpoint.description,
+                                                   reason)))
+
+    def _connection_lost(self, endpoint, reason):
+        """
+        Handle a lost connection: Fail the request on the wire. Queued
+        requests are sent after reconnecting.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param reason: The reason (e.g. the exception which occurred).
+        """
+        log.warning("ShdlcTcpEngine lost connection to '{}': {}"
+                    .format(endpoint.description, reason))
+        self._disconnect(endpoint)
+        endpoint._connection_lost_count += 1
+        endpoint._next_connect_time = 0.0  # First attempt without delay
+        request, endpoint._active = endpoint._active, None
+        if request is not None:
+            self._finish(endpoint, request, error=ShdlcConnectionLostError(
+                "{} ('{}')".format(reason, endpoint.description)))
+        self._send_next(endpoint)
+
+    def _disconnect(self, endpoint):
+        """
+        Close the socket of an endpoint, if any.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        if endpoint._socket is not None:
+            try:
+                self._selector.unregister(endpoint._socket)
+            except KeyError:
+                pass  # Not registered yet
+            endpoint._socket.close()
+            endpoint._socket = None
+        endpoint._state = _DISCONNECTED
+        endpoint._stream.clear()
+        del endpoint._tx[:]
+
+    def _close_endpoint(self, endpoint, reason):
+        """
+        Close the connection of an endpoint and fail all its requests.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param string reason: The reason.
+        """
+        self._disconnect(endpoint)
+        error = ShdlcConnectionLostError("{} ('{}')".format(
+            reason, endpoint.description))
+        request, endpoint._active = endpoint._active, None
+        if request is not None:
+            self._finish(endpoint, request, error=error)
+        self._fail_queued(endpoint, error)
+        self._update_timer(endpoint)
+
+    def _fail_queued(self, endpoint, error):
+        """
+        Fail all queued requests of an endpoint.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param Exception error: The exception to set.
+        """
+        while len(endpoint._queue):
+            request = endpoint._queue.popleft()
+            if request.future.set_running_or_notify_cancel():
+                self._finish(endpoint, request, error=error)
+            else:
+                self._finish(endpoint, request)
+
+    def _flush(self, endpoint):
+        """
+        Send as much buffered data as possible without blocking.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        try:
+            sent = endpoint._socket.send(endpoint._tx)
+            del endpoint._tx[:sent]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except (socket.error, OSError) as e:
+            self._connection_lost(endpoint, e)
+            return
+        events = selectors.EVENT_READ
+        if len(endpoint._tx):
+            events |= selectors.EVENT_WRITE
+        self._selector.modify(endpoint._socket, events, endpoint)
+
+    def _read(self, endpoint):
+        """
+        Receive data from an endpoint and finish the request on the wire if
+        its response was received.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        """
+        try:
+            data = endpoint._socket.recv(_READ_CHUNK_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except (socket.error, OSError) as e:
+            self._connection_lost(endpoint, e)
+            return
+        if len(data) == 0:
+            self._connection_lost(endpoint, "closed by the server")
+            return
+        endpoint._stream.add_data(data)
+        while endpoint._stream.available:
+            request = endpoint._active
+            try:
+                frame = endpoint._stream.get_frame()
+            except ShdlcResponseError as e:
+                # Can't be matched to the request (e.g. line noise), so the
+                # request times out unless its response is received.
+                log.debug("ShdlcTcpEngine discards invalid frame from '{}': "
+                          "{}".format(endpoint.description, e))
+                continue
+            if request is None or frame[0] != request.slave_address or \
+                    frame[1] != request.command_id:
+                log.debug("ShdlcTcpEngine discards stale response from '{}'."
+                          .format(endpoint.description))
+                continue
+            endpoint._active = None
+            self._finish(endpoint, request, frame)
+        self._send_next(endpoint)
+
+    def _finish(self, endpoint, request, frame=None, error=None):
+        """
+        Finish a request: Interpret the response (for commands) and resolve
+        its future.
+
+        :param ShdlcTcpEndpoint endpoint: The endpoint.
+        :param _Request request: The request.
+        :param tuple frame: The received response frame, if any.
+        :param Exception error: The exception to set, if any.
+        """
+        with self._lock:
+            endpoint._pending -= 1
+        if request.future.cancelled():
+            return
+        result = frame
+        command = request.command
+        if error is None and frame is not None and command is not None:
+            if command.post_processing_time > 0.0:
+                endpoint._ready_time = time.monotonic() + \
+                    command.post_processing_time
+            try:
+                data, error_state = ShdlcConnection._check_response(
+                    request.slave_address, request.command_id, *frame)
+                command.check_response_length(data)
+                result = command.interpret_response(data), error_state
+            except Exception as e:
+                error = e
+        if error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
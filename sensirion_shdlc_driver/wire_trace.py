@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from collections import deque
+from threading import Lock
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ShdlcWireTrace(object):
+    """
+    Common interface for all wire trace subscribers.
+
+    A wire trace subscriber can be registered on a port with
+    :py:meth:`~sensirion_shdlc_driver.port.ShdlcPort.add_wire_trace` to get
+    notified about every raw frame sent or received by the port. If no
+    subscriber is registered, tracing doesn't cost anything.
+    """
+
+    #: Direction of frames sent to the device (master out, slave in).
+    MOSI = 0
+
+    #: Direction of frames received from the device (master in, slave out).
+    MISO = 1
+
+    def on_frame(self, port, direction, data, timestamp):
+        """
+        Called by the port for every raw frame sent or received.
+
+        .. note:: This method is called while the port is locked, so it
+                  should return as fast as possible. The passed data is only
+                  valid during the call, so it needs to be copied if it's
+                  used later.
+
+        :param ~sensirion_shdlc_driver.port.ShdlcPort port:
+            The port which sent or received the frame.
+        :param int direction:
+            :py:attr:`~sensirion_shdlc_driver.wire_trace.ShdlcWireTrace.MOSI`
+            or
+            :py:attr:`~sensirion_shdlc_driver.wire_trace.ShdlcWireTrace.MISO`.
+        :param bytes-like data: The raw frame.
+        :param float timestamp: Monotonic timestamp in seconds (see
+                                :py:func:`time.monotonic`).
+        """
+        raise NotImplementedError()
+
+
+class ShdlcWireTraceBuffer(ShdlcWireTrace):
+    """
+    Wire trace subscriber which keeps the last N frames in a ring buffer.
+
+    Only the raw bytes and timestamps are stored while tracing, so the buffer
+    can be kept enabled during normal operation. Formatting is done only when
+    the buffer gets dumped, e.g. after an error occurred.
+    """
+
+    def __init__(self, max_frames=100):
+        """
+        Constructor.
+
+        :param int max_frames: Maximum number of frames to keep.
+        """
+        super(ShdlcWireTraceBuffer, self).__init__()
+        self._lock = Lock()
+        self._frames = deque(maxlen=int(max_frames))
+
+    @property
+    def frames(self):
+        """
+        Get the buffered frames, oldest first.
+
+        :return: List of ``(timestamp, port, direction, data)`` tuples.
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._frames)
+
+    def on_frame(self, port, direction, data, timestamp):
+        """
+        Store a frame in the ring buffer. See
+        :py:meth:`~sensirion_shdlc_driver.wire_trace.ShdlcWireTrace.on_frame`.
+        """
+        with self._lock:
+            self._frames.append((timestamp, port, direction, bytes(data)))
+
+    def clear(self):
+        """
+        Remove all buffered frames.
+        """
+        with self._lock:
+            self._frames.clear()
+
+    def dump(self):
+        """
+        Format the buffered frames as human readable text.
+
+        :return: One line per frame, containing the timestamp, the port
+                 description, the direction and the raw data.
+        :rtype: string
+        """
+        lines = []
+        for timestamp, port, direction, data in self.frames:
+            lines.append("{:.6f} {} {}: [{}]".format(
+                timestamp, port.description,
+                "MISO" if direction == self.MISO else "MOSI",
+                ", ".join(["0x%.2X" % i for i in bytearray(data)])))
+        return "\n".join(lines)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.errors import ShdlcConnectionLostError, \
+    ShdlcTimeoutError
+
+
+def test_message():
+    """
+    Test if the message contains the reason.
+    """
+    err = ShdlcConnectionLostError("Closed by the server.")
+    assert str(err) == "Connection lost: Closed by the server."
+
+
+def test_is_timeout_error():
+    """
+    Test if the exception can be caught as timeout error.
+    """
+    assert isinstance(ShdlcConnectionLostError(""), ShdlcTimeoutError)
+
+
+def test_reason():
+    """
+    Test if the reason is available without the message prefix.
+    """
+    assert ShdlcConnectionLostError("Closed by the server.").reason == \
+        "Closed by the server."
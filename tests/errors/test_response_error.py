@@ -15,6 +15,15 @@ def test_message():
     assert len(msg) > 0
 
 
+def test_error_message():
+    """
+    Test if the "error_message" property contains the message without the
+    generic prefix.
+    """
+    err = ShdlcResponseError(message="Wrong checksum.")
+    assert err.error_message == "Wrong checksum."
+
+
 @pytest.mark.parametrize("input, output", [
     pytest.param(None, None, id="none"),
     pytest.param(b"", b"", id="empty_bytes"),
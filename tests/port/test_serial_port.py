@@ -3,10 +3,52 @@
 
 from __future__ import absolute_import, division, print_function
 from sensirion_shdlc_driver.port import ShdlcSerialPort
+from sensirion_shdlc_driver.frame_cache import ShdlcFrameCache
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder
 from sensirion_shdlc_driver.errors import ShdlcResponseError, ShdlcTimeoutError
 from serial import SerialException
-from mock import Mock, PropertyMock
+from serial.rs485 import RS485Settings
+from mock import Mock, PropertyMock, patch
+from itertools import chain, repeat
+from threading import Thread
+import os
 import pytest
+import time
+
+needs_pty = pytest.mark.skipif(not hasattr(os, 'openpty'),
+                               reason="pseudo terminals not available")
+
+
+class _PtyDevice(object):
+    """
+    Simulated device on a pseudo terminal pair which answers every received
+    frame with the given response (in the given chunks).
+    """
+
+    def __init__(self, response_chunks, delay=0.0, count=1):
+        self.master, self.slave = os.openpty()
+        self.name = os.ttyname(self.slave)
+        self._response_chunks = response_chunks
+        self._delay = delay
+        self._count = count
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        for i in range(self._count):
+            received = b""
+            while received.count(b"\x7E") < 2:
+                received += os.read(self.master, 1024)
+            for chunk in self._response_chunks:
+                time.sleep(self._delay)
+                os.write(self.master, chunk)
+
+    def close(self):
+        self._thread.join(5.0)
+        os.close(self.master)
+        os.close(self.slave)
 
 
 @pytest.mark.needs_serialport
@@ -114,6 +156,138 @@ def test_transceive_segmented():
     assert data == b"\x05\x08\x00\x03\x00\x01\x00"
 
 
+def test_transceive_reads_remaining_length():
+    """
+    Test if the transceive() method reads the remaining frame length at once
+    after the header is received, instead of only the available bytes.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    port._serial = Mock()
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 0
+    port._serial.read.side_effect = [
+        b"\x7E\x00\xD1\x00\x07",
+        b"\x05\x08\x00\x03\x00\x01\x00\x16\x7E",
+    ]
+    addr, cmd, state, data = port.transceive(
+        slave_address=42, command_id=0xD1, data=b'',
+        response_timeout=10.0)
+    arguments = [arg[0][0] for arg in port._serial.read.call_args_list]
+    assert arguments == [7, 9]
+    assert data == b"\x05\x08\x00\x03\x00\x01\x00"
+
+
+def test_transceive_uses_frame_cache():
+    """
+    Test if the transceive() method takes the sent frame from the frame cache.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    port._serial = Mock()
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 1
+    port._serial.read.return_value = \
+        b"\x7E\x2A\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\xEC\x7E"
+    for i in range(3):
+        port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                        response_timeout=10.0)
+    arguments = [arg[0][0] for arg in port._serial.write.call_args_list]
+    assert arguments == [b"\x7E\x2A\xD1\x00\x04\x7E"] * 3
+    assert port.frame_cache.misses == 1
+    assert port.frame_cache.hits == 2
+
+
+def test_transceive_iterable_payload():
+    """
+    Test if the transceive() method sends payloads given as iterable (which
+    can be consumed only once) correctly, without caching them.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    port._serial = Mock()
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 1
+    port._serial.read.return_value = \
+        b"\x7E\x2A\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\xEC\x7E"
+    port.transceive(slave_address=42, command_id=0xD1,
+                    data=(i for i in [0x7E, 0x01]), response_timeout=10.0)
+    port._serial.write.assert_called_once_with(
+        ShdlcSerialMosiFrameBuilder(42, 0xD1, b"\x7E\x01").to_bytes())
+    assert port.frame_cache.size == 0
+
+
+RESPONSE_0 = b"\x7E\x00\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7E"
+RESPONSE_42 = b"\x7E\x2A\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\xEC\x7E"
+
+
+def _create_resync_port(read_data):
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False,
+                           resync_mode=True)
+    port._serial = Mock()
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 0
+    port._serial.read.side_effect = read_data
+    return port
+
+
+def test_transceive_resync_discards_stale_frames():
+    """
+    Test if the transceive() method in resync mode discards stale responses
+    and rubbish without flushing the input buffer.
+    """
+    port = _create_resync_port([b"\x00\x00" + RESPONSE_0, RESPONSE_42])
+    addr, cmd, state, data = port.transceive(
+        slave_address=42, command_id=0xD1, data=b'', response_timeout=10.0)
+    assert addr == 42
+    assert data == b"\x05\x08\x00\x03\x00\x01\x00"
+    assert port.stale_bytes == 2 + len(RESPONSE_0)
+    assert port._serial.flushInput.call_count == 0
+    assert port._serial.flush.call_count == 0
+
+
+def test_transceive_resync_keeps_data_after_response():
+    """
+    Test if the transceive() method in resync mode keeps data received after
+    the response and discards it as stale response in the next transceive.
+    """
+    port = _create_resync_port([RESPONSE_42 + RESPONSE_0, RESPONSE_42])
+    for i in range(2):
+        addr, cmd, state, data = port.transceive(
+            slave_address=42, command_id=0xD1, data=b'', response_timeout=10.0)
+        assert addr == 42
+    assert port._serial.read.call_count == 2
+    assert port.stale_bytes == len(RESPONSE_0)
+
+
+@pytest.mark.parametrize("read_data,exception", [
+    pytest.param(chain([b"\x7E\x2A"], repeat(b"")), ShdlcTimeoutError,
+                 id="timeout"),
+    pytest.param([b"\x7E\x2A\xD1\x00\x00\x00\x7E"], ShdlcResponseError,
+                 id="checksum_error"),
+])
+def test_transceive_resync_flushes_on_error(read_data, exception):
+    """
+    Test if the transceive() method in resync mode flushes the input buffer
+    after errors.
+    """
+    port = _create_resync_port(read_data)
+    port.additional_response_time = 0.0
+    with pytest.raises(exception):
+        port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                        response_timeout=0.0)
+    assert port._serial.flushInput.call_count == 1
+    assert port._stream.start_received is False
+
+
+def test_resync_mode():
+    """
+    Test if the resync_mode property can be read and set.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert port.resync_mode is False
+    assert port.stale_bytes == 0
+    port.resync_mode = True
+    assert port.resync_mode is True
+
+
 def test_transceive_checksum_error():
     """
     Test if the transceive() method raises a ShdlcResponseError exception if
@@ -130,6 +304,258 @@ def test_transceive_checksum_error():
             response_timeout=10.0)
 
 
+@needs_pty
+@pytest.mark.parametrize("receive_mode", [
+    ShdlcSerialPort.RECEIVE_MODE_POLLING,
+    ShdlcSerialPort.RECEIVE_MODE_SELECT,
+])
+@pytest.mark.parametrize("chunks", [
+    pytest.param([b"\x7E\x00\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00"
+                  b"\x16\x7E"], id="1chunk"),
+    pytest.param([b"\x7E\x00\xD1", b"\x00\x07\x05\x08\x00\x03",
+                  b"\x00\x01\x00\x16\x7E"], id="3chunks"),
+])
+def test_transceive_pty(receive_mode, chunks):
+    """
+    Test the transceive() method in all receive modes with a simulated device
+    on a pseudo terminal.
+    """
+    device = _PtyDevice(chunks, delay=0.01)
+    try:
+        with ShdlcSerialPort(device.name, 115200,
+                             receive_mode=receive_mode) as port:
+            addr, cmd, state, data = port.transceive(
+                slave_address=0, command_id=0xD1, data=b'',
+                response_timeout=1.0)
+    finally:
+        device.close()
+    assert (addr, cmd, state) == (0x00, 0xD1, 0x00)
+    assert data == b"\x05\x08\x00\x03\x00\x01\x00"
+
+
+@needs_pty
+def test_transceive_pty_direct_write():
+    """
+    Test if the transceive() method writes the frame directly to the file
+    descriptor, without pyserial write() and flush().
+    """
+    device = _PtyDevice([RESPONSE_0])
+    try:
+        with ShdlcSerialPort(device.name, 115200) as port:
+            with patch.object(port._serial, 'write') as write, \
+                    patch.object(port._serial, 'flush') as flush:
+                port.transceive(slave_address=0, command_id=0xD1, data=b'',
+                                response_timeout=1.0)
+            assert write.call_count == 0
+            assert flush.call_count == 0
+    finally:
+        device.close()
+
+
+@needs_pty
+def test_send_frames_pty():
+    """
+    Test if the send_frames() method writes all frames at once.
+    """
+    master, slave = os.openpty()
+    try:
+        with ShdlcSerialPort(os.ttyname(slave), 115200) as port:
+            port.send_frames([(0xFF, 0x91, b"\x00\x00\x4B\x00"),
+                              (0x00, 0xD1, b"")])
+            received = b""
+            while len(received) < 16:
+                received += os.read(master, 1024)
+    finally:
+        os.close(master)
+        os.close(slave)
+    assert received == b"\x7E\xFF\x91\x04\x00\x00\x4B\x00\x20\x7E" \
+        b"\x7E\x00\xD1\x00\x2E\x7E"
+
+
+def test_send_frames_without_fd():
+    """
+    Test if the send_frames() method writes all frames with a single pyserial
+    write() and drains the output if the file descriptor is not available.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    port._serial = Mock()
+    port.send_frames([(0xFF, 0x91, b"\x00\x00\x4B\x00"), (0x00, 0xD1, b"")])
+    port._serial.write.assert_called_once_with(
+        b"\x7E\xFF\x91\x04\x00\x00\x4B\x00\x20\x7E"
+        b"\x7E\x00\xD1\x00\x2E\x7E")
+    assert port._serial.flush.call_count == 1
+
+
+@needs_pty
+def test_transceive_pty_timeout():
+    """
+    Test if the transceive() method in select receive mode raises
+    ShdlcTimeoutError after the response timeout if no response is received.
+    """
+    device = _PtyDevice([b"\x7E\x00"])
+    try:
+        with ShdlcSerialPort(device.name, 115200,
+                             additional_response_time=0.0,
+                             receive_mode='select') as port:
+            start_time = time.time()
+            with pytest.raises(ShdlcTimeoutError):
+                port.transceive(slave_address=0, command_id=0xD1, data=b'',
+                                response_timeout=0.05)
+            elapsed_time = time.time() - start_time
+            timeout_budget = port.last_timeout_budget
+    finally:
+        device.close()
+    # Start byte received -> waits for the frame time budget too, plus the
+    # transmission time of the request since the output is not drained
+    assert timeout_budget == pytest.approx(
+        0.05 + 60 / 115200 + port.calculate_frame_time_budget())
+    assert timeout_budget <= elapsed_time < timeout_budget + 0.5
+
+
+@needs_pty
+def test_calibrate_additional_response_time():
+    """
+    Test if calibrate_additional_response_time() measures the latency of a
+    simulated device, and if the calibrated value is used by default for new
+    ports with the same description.
+    """
+    device = _PtyDevice([b"\x7E\x00\x93\x00\x04\x00\x00\x00\x01\x67\x7E"],
+                        count=10)
+    try:
+        with ShdlcSerialPort(device.name, 115200) as port:
+            assert port.additional_response_time == 0.1
+            value = port.calibrate_additional_response_time(
+                slave_address=0, samples=10, margin=0.001)
+            assert 0.001 <= value < 0.1
+            assert port.additional_response_time == value
+        port = ShdlcSerialPort(device.name, 115200, do_open=False)
+        assert port.additional_response_time == value
+        port = ShdlcSerialPort(device.name, 57600, do_open=False)
+        assert port.additional_response_time == 0.1
+    finally:
+        ShdlcSerialPort._calibrated_response_times.pop(
+            device.name + '@115200', None)
+        device.close()
+
+
+def test_auto_tune():
+    """
+    Test if the additional response time is re-tuned from the observed
+    latencies once enough samples were collected, ignoring commands with a
+    long response timeout.
+    """
+    port = ShdlcSerialPort('/auto/tune/port', 115200, do_open=False)
+    port._serial = Mock()
+    port._serial.name = '/auto/tune/port'
+    port._serial.baudrate = 115200
+    port._serial.inWaiting.return_value = 0
+    port._serial.read.return_value = \
+        b"\x7E\x2A\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\xEC\x7E"
+    assert port.auto_tune_enabled is False
+    port.enable_auto_tune(window=3, margin=0.002)
+    assert port.auto_tune_enabled is True
+    try:
+        for response_timeout in [0.05, 1.0, 0.05]:
+            port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                            response_timeout=response_timeout)
+        assert port.additional_response_time == 0.1
+        port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                        response_timeout=0.05)
+        assert 0.002 <= port.additional_response_time < 0.1
+        assert ShdlcSerialPort._calibrated_response_times[
+            '/auto/tune/port@115200'] == port.additional_response_time
+        port._serial.read.return_value = b""
+        with pytest.raises(ShdlcTimeoutError):
+            port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                            response_timeout=0.01)
+        assert port.additional_response_time == 0.1
+        assert '/auto/tune/port@115200' not in \
+            ShdlcSerialPort._calibrated_response_times
+    finally:
+        ShdlcSerialPort._calibrated_response_times.pop(
+            '/auto/tune/port@115200', None)
+    port.disable_auto_tune()
+    assert port.auto_tune_enabled is False
+
+
+def test_auto_tune_absent_slave():
+    """
+    Test if timeouts of slaves which never responded (e.g. absent addresses
+    in a bus poll) don't reset the auto-tuned additional response time.
+    """
+    port = ShdlcSerialPort('/auto/tune/port', 115200, do_open=False)
+    port._serial = Mock()
+    port._serial.name = '/auto/tune/port'
+    port._serial.baudrate = 115200
+    port._serial.inWaiting.return_value = 0
+    response = b"\x7E\x2A\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\xEC\x7E"
+    port.enable_auto_tune(window=2, margin=0.002)
+    try:
+        for _ in range(3):
+            port._serial.read.return_value = response
+            port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                            response_timeout=0.05)
+            port._serial.read.return_value = b""
+            with pytest.raises(ShdlcTimeoutError):
+                port.transceive(slave_address=7, command_id=0xD1, data=b'',
+                                response_timeout=0.01)
+        tuned = port.additional_response_time
+        assert 0.002 <= tuned < 0.1
+        assert ShdlcSerialPort._calibrated_response_times[
+            '/auto/tune/port@115200'] == tuned
+    finally:
+        ShdlcSerialPort._calibrated_response_times.pop(
+            '/auto/tune/port@115200', None)
+
+
+def test_auto_tune_invalid_sample_count():
+    """
+    Test if auto-tuning and calibration reject less than one sample.
+    """
+    port = ShdlcSerialPort('/auto/tune/port', 115200, do_open=False)
+    with pytest.raises(ValueError):
+        port.enable_auto_tune(window=0)
+    assert port.auto_tune_enabled is False
+    with pytest.raises(ValueError):
+        port.calibrate_additional_response_time(slave_address=0, samples=0)
+
+
+@needs_pty
+def test_low_latency_pty():
+    """
+    Test if low latency mode falls back cleanly on a pseudo terminal (which
+    does not support the ASYNC_LOW_LATENCY flag).
+    """
+    device = _PtyDevice([RESPONSE_0])
+    try:
+        with ShdlcSerialPort(device.name, 115200, low_latency=True) as port:
+            assert port.low_latency is True
+            assert port.low_latency_features == ()
+            port.transceive(slave_address=0, command_id=0xD1, data=b'',
+                            response_timeout=1.0)
+        assert port.low_latency_features == ()
+    finally:
+        device.close()
+
+
+def test_low_latency_features():
+    """
+    Test if low latency mode records the ASYNC_LOW_LATENCY flag if it could be
+    set, and no features if disabled.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False,
+                           low_latency=True)
+    port._serial = Mock()
+    port._serial.is_open = False
+    port.open()
+    assert port.low_latency_features == \
+        (ShdlcSerialPort.LOW_LATENCY_ASYNC_FLAG,)
+    port._serial.set_low_latency_mode.assert_called_once_with(True)
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert port.low_latency is False
+    assert port.low_latency_features == ()
+
+
 def test_create_and_open_invalid_port():
     """
     Test if the constructor of ShdlcSerialPort tries to open the port. This
@@ -192,6 +618,82 @@ def test_additional_response_time():
     assert port.additional_response_time == 0.5
 
 
+def test_receive_mode():
+    """
+    Test if the receive_mode property can be read and set, and rejects invalid
+    receive modes.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert port.receive_mode == ShdlcSerialPort.RECEIVE_MODE_POLLING
+    with pytest.raises(ValueError):
+        port.receive_mode = 'foo'
+    with pytest.raises(ValueError):
+        ShdlcSerialPort('/non/existing/port', 115200, do_open=False,
+                        receive_mode='foo')
+    if os.name == 'posix':
+        port.receive_mode = ShdlcSerialPort.RECEIVE_MODE_SELECT
+        assert port.receive_mode == ShdlcSerialPort.RECEIVE_MODE_SELECT
+
+
+@pytest.mark.parametrize("max_response_length,expected", [
+    pytest.param(None, 0.05 + 1.5 * 5220 / 115200, id="None"),
+    pytest.param(255, 0.05 + 1.5 * 5220 / 115200, id="255"),
+    pytest.param(0, 0.05 + 1.5 * 120 / 115200, id="0"),
+])
+def test_calculate_frame_time_budget(max_response_length, expected):
+    """
+    Test if the frame time budget is calculated from the maximum response
+    length, the bitrate and the default slack model.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert port.calculate_frame_time_budget(max_response_length) == \
+        pytest.approx(expected)
+
+
+def test_frame_time_slack():
+    """
+    Test if the frame_time_factor and frame_time_margin properties can be read
+    and set, and are applied to the frame time budget.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert port.frame_time_factor == ShdlcSerialPort.DEFAULT_FRAME_TIME_FACTOR
+    assert port.frame_time_margin == ShdlcSerialPort.DEFAULT_FRAME_TIME_MARGIN
+    port.frame_time_factor = 2
+    port.frame_time_margin = 0
+    assert type(port.frame_time_factor) is float
+    assert type(port.frame_time_margin) is float
+    assert port.calculate_frame_time_budget(0) == pytest.approx(240 / 115200)
+
+
+def test_last_timeout_budget():
+    """
+    Test if the last_timeout_budget property reports the total timeout of the
+    last received frame.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200,
+                           additional_response_time=0.1, do_open=False)
+    port._serial = Mock()
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 0
+    port._serial.read.return_value = \
+        b"\x7E\x2A\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\xEC\x7E"
+    assert port.last_timeout_budget is None
+    port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                    response_timeout=1.0, max_response_length=7)
+    assert port.last_timeout_budget == pytest.approx(
+        1.1 + port.calculate_frame_time_budget(7))
+
+
+def test_frame_cache():
+    """
+    Test if the frame_cache property can be read and set.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert type(port.frame_cache) is ShdlcFrameCache
+    port.frame_cache = None
+    assert port.frame_cache is None
+
+
 def test_lock():
     """
     Test if the lock property can be used in a "with"-statement.
@@ -199,3 +701,75 @@ def test_lock():
     port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
     with port.lock:
         port.additional_response_time = 1.0  # access port while locked
+
+
+def test_reply_delays():
+    """
+    Test if set_reply_delay() tracks the reply delay per slave address, and
+    if a reply delay of zero removes the slave.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    assert port.reply_delays == dict()
+    port.set_reply_delay(1, 500)
+    port.set_reply_delay(2, 1000)
+    port.set_reply_delay(1, 0)
+    assert port.reply_delays == {2: 1000}
+
+
+def test_transceive_reply_delay_extends_timeout():
+    """
+    Test if the response timeout is extended to the reply delay of the
+    addressed slave.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200,
+                           additional_response_time=0.1, do_open=False)
+    port._serial = Mock()
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 0
+    port._serial.read.return_value = RESPONSE_42
+    port.set_reply_delay(42, 2000000)
+    port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                    response_timeout=1.0, max_response_length=7)
+    assert port.last_timeout_budget == pytest.approx(
+        2.1 + port.calculate_frame_time_budget(7))
+    port.set_reply_delay(42, 1000)
+    port.transceive(slave_address=42, command_id=0xD1, data=b'',
+                    response_timeout=1.0, max_response_length=7)
+    assert port.last_timeout_budget == pytest.approx(
+        1.1 + port.calculate_frame_time_budget(7))
+
+
+def test_rs485_mode():
+    """
+    Test if the rs485_mode property is passed to the serial port.
+    """
+    settings = RS485Settings(loopback=True)
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False,
+                           rs485_mode=settings)
+    assert port.rs485_mode is settings
+    assert port._serial.rs485_mode is settings
+    port.rs485_mode = None
+    assert port.rs485_mode is None
+
+
+@needs_pty
+def test_transceive_pty_rs485_echo():
+    """
+    Test if the echo of the sent frame is discarded in RS485 mode with
+    loopback.
+    """
+    device = _PtyDevice([b"\x7E\x00\xD1\x00\x2E\x7E" + RESPONSE_0])
+    try:
+        # Explicit additional response time to not use a calibrated one
+        with ShdlcSerialPort(device.name, 115200,
+                             additional_response_time=0.1) as port:
+            # Pseudo terminals don't support RS485 mode, so only enable the
+            # echo handling.
+            port._rs485_loopback = True
+            addr, cmd, state, data = port.transceive(
+                slave_address=0, command_id=0xD1, data=b'',
+                response_timeout=1.0)
+    finally:
+        device.close()
+    assert (addr, cmd, state) == (0x00, 0xD1, 0x00)
+    assert data == b"\x05\x08\x00\x03\x00\x01\x00"
@@ -3,10 +3,22 @@
 
 from __future__ import absolute_import, division, print_function
 from sensirion_shdlc_driver.port import ShdlcTcpPort
-from sensirion_shdlc_driver.errors import ShdlcResponseError, ShdlcTimeoutError
+from sensirion_shdlc_driver.frame_cache import ShdlcFrameCache
+from sensirion_shdlc_driver.errors import ShdlcConnectionLostError, \
+    ShdlcResponseError, ShdlcTimeoutError
+from sensirion_shdlc_driver.capture import decode_mosi_frame
+from sensirion_shdlc_driver.commands.system_up_time import \
+    ShdlcCmdGetSystemUpTime
+from sensirion_shdlc_driver.connection import ShdlcConnection
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder, ShdlcSerialMisoFrameBuilder
+from collections import deque
+from mock import Mock
 import pytest
+import select
 import socket
 import threading
+import time
 
 
 class ShdlcTcpServer(object):
@@ -66,6 +78,144 @@ class ShdlcTcpServer(object):
             self._exception = e
 
 
+def _miso_frame(address, command_id, payload):
+    return ShdlcSerialMisoFrameBuilder.encode(address, command_id, 0x00,
+                                              payload)
+
+
+class ShdlcPipelineServer(object):
+    """
+    Virtual SHDLC TCP gateway which answers every received request frame
+    after a delay, with the payload ``0x0000002A``. Requests to slave
+    addresses in ``silent_addresses`` are not answered. Each response is
+    preceded by ``noise``. The maximum number of requests waiting for their
+    response is recorded in `max_outstanding`.
+    """
+
+    def __init__(self, delay=0.02, silent_addresses=(), noise=b""):
+        super(ShdlcPipelineServer, self).__init__()
+        self._delay = delay
+        self._silent_addresses = silent_addresses
+        self._noise = noise
+        self._stop = False
+        self.max_outstanding = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(('localhost', 0))
+        self._socket.listen(0)
+        self.ip, self.port = self._socket.getsockname()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop = True
+        self._thread.join(2.0)
+
+    def _run(self):
+        sock, _ = self._socket.accept()
+        buffer = b""
+        pending = deque()  # (due time, response)
+        try:
+            while not self._stop:
+                ready, _, _ = select.select([sock], [], [], 0.001)
+                if ready:
+                    buffer += sock.recv(1024)
+                while buffer.count(b"\x7E") >= 2:
+                    end = buffer.index(b"\x7E", 1) + 1
+                    request = decode_mosi_frame(buffer[:end])
+                    buffer = buffer[end:]
+                    if request[0] not in self._silent_addresses:
+                        pending.append((time.time() + self._delay,
+                                        self._noise + _miso_frame(
+                                            request[0], request[1],
+                                            b"\x00\x00\x00\x2A")))
+                        self.max_outstanding = max(self.max_outstanding,
+                                                   len(pending))
+                while len(pending) and pending[0][0] <= time.time():
+                    sock.sendall(pending.popleft()[1])
+        except IOError:
+            pass  # Probably client disconnected, which is fine
+        finally:
+            sock.close()
+            self._socket.close()
+
+
+class ShdlcReconnectServer(object):
+    """
+    Virtual SHDLC TCP gateway which accepts any number of consecutive
+    connections and answers every request frame immediately with an empty
+    response. The current connection can be closed with `drop()`, and
+    `close()` stops accepting new connections. The number of accepted
+    connections is recorded in `connection_count`.
+    """
+
+    def __init__(self):
+        super(ShdlcReconnectServer, self).__init__()
+        self._stop = False
+        self._client = None
+        self.connection_count = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind(('localhost', 0))
+        self._socket.settimeout(0.05)
+        self._socket.listen(1)
+        self.ip, self.port = self._socket.getsockname()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def drop(self):
+        client = self._client
+        if client is not None:
+            client.shutdown(socket.SHUT_RDWR)
+
+    def close(self):
+        self._stop = True
+        self._thread.join(2.0)
+
+    def _run(self):
+        while not self._stop:
+            try:
+                sock, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            sock.settimeout(0.05)
+            self._client = sock
+            self.connection_count += 1
+            self._serve(sock)
+            self._client = None
+            sock.close()
+        self._socket.close()
+        self.drop()
+
+    def _serve(self, sock):
+        buffer = b""
+        try:
+            while not self._stop:
+                try:
+                    data = sock.recv(1024)
+                except socket.timeout:
+                    continue
+                if len(data) == 0:
+                    return
+                buffer += data
+                while buffer.count(b"\x7E") >= 2:
+                    end = buffer.index(b"\x7E", 1) + 1
+                    request = decode_mosi_frame(buffer[:end])
+                    buffer = buffer[end:]
+                    sock.sendall(_miso_frame(request[0], request[1], b""))
+        except IOError:
+            pass  # Dropped connection
+
+
 @pytest.fixture
 def tcp_server():
     """
@@ -149,21 +299,195 @@ def test_transceive_segmented(tcp_server):
     """
     with ShdlcTcpPort(tcp_server.ip, tcp_server.port) as port:
         tcp_server.response_data = [
-            b"\x7E\x00\xD1",
+            b"\x7E\x2A\xD1",
             b"\x00",
             b"\x07\x05\x08\x00\x03\x00\x01\x00",
-            b"\x16\x7E"
+            b"\xEC\x7E"
         ]
         addr, cmd, state, data = port.transceive(
             slave_address=42, command_id=0xD1, data=b'',
             response_timeout=10.0)
         assert tcp_server.received_data == [b"\x7E\x2A\xD1\x00\x04\x7E"]
-        assert addr == 0x00
+        assert addr == 0x2A
         assert cmd == 0xD1
         assert state == 0x00
         assert data == b"\x05\x08\x00\x03\x00\x01\x00"
 
 
+def test_transceive_multiple_frames_in_one_packet(tcp_server):
+    """
+    Test if the transceive() method keeps a second frame which was received
+    together with the first one, and returns it on the next call.
+    """
+    with ShdlcTcpPort(tcp_server.ip, tcp_server.port) as port:
+        tcp_server.response_data = [
+            b"\x7E\x00\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7E"
+            b"\x7E\x00\x93\x00\x04\x00\x00\x00\x2A\x3E\x7E"
+        ]
+        addr, cmd, state, data = port.transceive(
+            slave_address=0, command_id=0xD1, data=b'',
+            response_timeout=10.0)
+        assert cmd == 0xD1
+        assert data == b"\x05\x08\x00\x03\x00\x01\x00"
+        tcp_server.response_data = []
+        addr, cmd, state, data = port.transceive(
+            slave_address=0, command_id=0x93, data=b'',
+            response_timeout=10.0)
+        assert cmd == 0x93
+        assert data == b"\x00\x00\x00\x2A"
+
+
+def test_transceive_discards_stale_response(tcp_server):
+    """
+    Test if the transceive() method discards responses with another slave
+    address or command ID, e.g. late responses to previous requests.
+    """
+    with ShdlcTcpPort(tcp_server.ip, tcp_server.port) as port:
+        tcp_server.response_data = [
+            _miso_frame(0x01, 0x93, b"\x00\x00\x00\x01") +
+            _miso_frame(0x00, 0x92, b"") +
+            _miso_frame(0x00, 0x93, b"\x00\x00\x00\x2A")
+        ]
+        assert port.transceive(slave_address=0, command_id=0x93, data=b'',
+                               response_timeout=10.0) == \
+            (0x00, 0x93, 0x00, b"\x00\x00\x00\x2A")
+
+
+def test_transceive_timeout_clears_stream():
+    """
+    Test if a partially received response is discarded after a timeout, so
+    its remainder can't be mixed up with the next response.
+    """
+    port = ShdlcTcpPort('localhost', 0, do_open=False)
+    port._is_open = True
+    port._socket = Mock()
+    port._socket.recv.side_effect = [b"\x7E\x00\x93\x00", socket.timeout()]
+    with pytest.raises(ShdlcTimeoutError):
+        port.transceive(slave_address=0, command_id=0x93, data=b'',
+                        response_timeout=0.1)
+    assert port._stream.start_received is False
+    assert port.is_connected is True
+
+
+def test_send_frames(tcp_server):
+    """
+    Test if the send_frames() method sends all frames.
+    """
+    expected = b"\x7E\xFF\x91\x04\x00\x00\x4B\x00\x20\x7E" \
+        b"\x7E\x00\xD1\x00\x2E\x7E"
+    with ShdlcTcpPort(tcp_server.ip, tcp_server.port) as port:
+        port.send_frames([(0xFF, 0x91, b"\x00\x00\x4B\x00"),
+                          (0x00, 0xD1, b"")])
+        end_time = time.time() + 2.0
+        while len(b"".join(tcp_server.received_data)) < len(expected) and \
+                time.time() < end_time:
+            time.sleep(0.01)
+    assert b"".join(tcp_server.received_data) == expected
+
+
+def test_send_frames_full_write(tcp_server):
+    """
+    Test if all data is sent even if it doesn't fit into the socket send
+    buffer at once.
+    """
+    frames = [(i % 256, 0xD1, bytes([0x7E]) * 255) for i in range(200)]
+    with ShdlcTcpPort(tcp_server.ip, tcp_server.port,
+                      send_buffer_size=4096) as port:
+        port.send_frames(frames)
+        expected = sum(len(ShdlcSerialMosiFrameBuilder(*f).to_bytes())
+                       for f in frames)
+        end_time = time.time() + 2.0
+        while len(b"".join(tcp_server.received_data)) < expected and \
+                time.time() < end_time:
+            time.sleep(0.01)
+    assert len(b"".join(tcp_server.received_data)) == expected
+
+
+def test_transceive_pipelined():
+    """
+    Test if the transceive_pipelined() method sends up to max_outstanding
+    requests without waiting for the responses, and returns the responses in
+    order.
+    """
+    with ShdlcPipelineServer() as server:
+        with ShdlcTcpPort(server.ip, server.port, max_outstanding=4) as port:
+            results = port.transceive_pipelined(
+                [(i, 0x93, b"", 1.0, 4) for i in range(10)])
+    assert results == [(i, 0x93, 0x00, b"\x00\x00\x00\x2A")
+                       for i in range(10)]
+    assert server.max_outstanding == 4
+
+
+def test_transceive_pipelined_skipped_response():
+    """
+    Test if the transceive_pipelined() method reports requests without
+    response as timed out, without affecting the other requests.
+    """
+    with ShdlcPipelineServer(silent_addresses=(2, 5)) as server:
+        with ShdlcTcpPort(server.ip, server.port, socket_timeout=0.2) as port:
+            results = port.transceive_pipelined(
+                [(i, 0x93, b"", 0.0, 4) for i in range(6)])
+    assert [type(r) for r in results] == [
+        tuple, tuple, ShdlcTimeoutError, tuple, tuple, ShdlcTimeoutError]
+    assert [r[0] for r in results if type(r) is tuple] == [0, 1, 3, 4]
+
+
+def test_transceive_pipelined_invalid_frames():
+    """
+    Test if the transceive_pipelined() method discards invalid frames (e.g.
+    line noise) instead of failing the oldest outstanding request.
+    """
+    with ShdlcPipelineServer(noise=b"\x7E\x01\x02\x7E") as server:
+        with ShdlcTcpPort(server.ip, server.port, max_outstanding=4) as port:
+            results = port.transceive_pipelined(
+                [(i, 0x93, b"", 1.0, 4) for i in range(6)])
+    assert results == [(i, 0x93, 0x00, b"\x00\x00\x00\x2A")
+                       for i in range(6)]
+
+
+def test_transceive_pipelined_send_timeout():
+    """
+    Test if a timeout while sending is treated as a lost connection, so the
+    requests are not sent again and again.
+    """
+    port = ShdlcTcpPort('localhost', 0, do_open=False)
+    port._is_open = True
+    port._socket = sock = Mock()
+    sock.sendall.side_effect = socket.timeout()
+    results = port.transceive_pipelined(
+        [(i, 0x93, b"", 1.0, 4) for i in range(3)])
+    assert [type(r) for r in results] == [ShdlcConnectionLostError] * 3
+    assert sock.sendall.call_count == 1
+    sock.close.assert_called_once_with()
+    assert port.is_connected is False
+
+
+def test_execute_pipelined():
+    """
+    Test if ShdlcConnection.execute_pipelined() interprets the responses of
+    all commands.
+    """
+    with ShdlcPipelineServer() as server:
+        with ShdlcTcpPort(server.ip, server.port) as port:
+            connection = ShdlcConnection(port)
+            results = connection.execute_pipelined(
+                [(i, ShdlcCmdGetSystemUpTime()) for i in range(3)])
+    assert results == [(42, False)] * 3
+
+
+def test_max_outstanding():
+    """
+    Test if the max_outstanding property can be read and set, and rejects
+    values less than 1.
+    """
+    port = ShdlcTcpPort('localhost', 0, do_open=False)
+    assert port.max_outstanding == ShdlcTcpPort.DEFAULT_MAX_OUTSTANDING
+    port.max_outstanding = 1
+    assert port.max_outstanding == 1
+    with pytest.raises(ValueError):
+        port.max_outstanding = 0
+
+
 def test_transceive_checksum_error(tcp_server):
     """
     Test if the transceive() method raises a ShdlcResponseError exception if
@@ -227,6 +551,16 @@ def test_socket_timeout():
     assert port.socket_timeout == 0.5
 
 
+def test_frame_cache():
+    """
+    Test if the frame_cache property can be read and set.
+    """
+    port = ShdlcTcpPort('localhost', 0, do_open=False)
+    assert type(port.frame_cache) is ShdlcFrameCache
+    port.frame_cache = None
+    assert port.frame_cache is None
+
+
 def test_lock():
     """
     Test if the lock property can be used in a "with"-statement.
@@ -234,3 +568,154 @@ def test_lock():
     port = ShdlcTcpPort('localhost', 0, do_open=False)
     with port.lock:
         port.socket_timeout = 1.0  # access port while locked
+
+
+def test_connection_lost():
+    """
+    Test if a connection closed by the server raises a
+    ShdlcConnectionLostError and closes the port, and if the port can be
+    reopened afterwards.
+    """
+    with ShdlcReconnectServer() as server:
+        with ShdlcTcpPort(server.ip, server.port) as port:
+            assert port.transceive(1, 0x00, b"", 0.1) == (1, 0x00, 0x00, b"")
+            server.drop()
+            with pytest.raises(ShdlcConnectionLostError):
+                port.transceive(1, 0x00, b"", 0.1)
+            assert port.is_open is False
+            with pytest.raises(ShdlcConnectionLostError):
+                port.transceive(1, 0x00, b"", 0.1)
+            port.open()
+            assert port.transceive(1, 0x00, b"", 0.1) == (1, 0x00, 0x00, b"")
+            assert port.connection_stats['connection_lost_count'] == 1
+            assert port.connection_stats['reconnect_count'] == 0
+    assert server.connection_count == 2
+
+
+def test_device_timeout_is_not_connection_lost():
+    """
+    Test if a device which doesn't respond raises a plain ShdlcTimeoutError
+    and keeps the connection.
+    """
+    with ShdlcPipelineServer(silent_addresses=(1,)) as server:
+        with ShdlcTcpPort(server.ip, server.port, socket_timeout=0.1) as port:
+            with pytest.raises(ShdlcTimeoutError) as exc_info:
+                port.transceive(1, 0x00, b"", 0.0)
+            assert type(exc_info.value) is ShdlcTimeoutError
+            assert port.is_connected is True
+            assert port.transceive(2, 0x93, b"", 0.1)[0] == 2
+
+
+def test_auto_reconnect():
+    """
+    Test if the port reconnects transparently after a lost connection, and
+    reports the downtime.
+    """
+    with ShdlcReconnectServer() as server:
+        with ShdlcTcpPort(server.ip, server.port, auto_reconnect=True) as port:
+            port.transceive(1, 0x00, b"", 0.1)
+            server.drop()
+            with pytest.raises(ShdlcConnectionLostError):
+                port.transceive(1, 0x00, b"", 0.1)
+            assert port.is_open is True
+            assert port.is_connected is False
+            assert port.transceive(1, 0x00, b"", 0.1) == (1, 0x00, 0x00, b"")
+            assert port.is_connected is True
+            stats = port.connection_stats
+    assert stats['connection_lost_count'] == 1
+    assert stats['reconnect_count'] == 1
+    assert stats['failed_reconnect_count'] == 0
+    assert stats['last_downtime'] >= 0.0
+    assert server.connection_count == 2
+
+
+def test_auto_reconnect_backoff():
+    """
+    Test if failed reconnect attempts are delayed with exponential backoff.
+    """
+    server = ShdlcReconnectServer()
+    port = ShdlcTcpPort(server.ip, server.port, auto_reconnect=True,
+                        reconnect_delay=0.2, max_reconnect_delay=0.6)
+    server.close()
+
+    def check_failed_attempts(attempts):
+        with pytest.raises(ShdlcConnectionLostError):
+            port.transceive(1, 0x00, b"", 0.1)
+        assert port.connection_stats['failed_reconnect_count'] == attempts
+
+    check_failed_attempts(0)  # Connection lost
+    check_failed_attempts(1)  # Immediate reconnect attempt
+    check_failed_attempts(1)  # Within delay of 0.2s
+    time.sleep(0.25)
+    check_failed_attempts(2)
+    time.sleep(0.25)
+    check_failed_attempts(2)  # Within delay of 0.4s
+    time.sleep(0.25)
+    check_failed_attempts(3)
+    assert port.connection_stats['connection_lost_count'] == 1
+    assert port._backoff_delay == 0.6  # Limited by max_reconnect_delay
+    port.close()
+    assert port.is_open is False
+
+
+def test_reopen_after_close():
+    """
+    Test if a closed port can be opened again.
+    """
+    with ShdlcReconnectServer() as server:
+        port = ShdlcTcpPort(server.ip, server.port)
+        port.close()
+        port.open()
+        assert port.transceive(1, 0x00, b"", 0.1)[0] == 1
+        port.close()
+    assert server.connection_count == 2
+
+
+def test_socket_options():
+    """
+    Test if the enabled socket options are applied on connect and reported
+    by the socket_options property.
+    """
+    with ShdlcPipelineServer() as server:
+        port = ShdlcTcpPort(server.ip, server.port, do_open=False,
+                            keepalive_time=10, receive_buffer_size=8192)
+        assert port.socket_options == ()
+        port.open()
+        options = port.socket_options
+        assert ShdlcTcpPort.SOCKET_OPTION_NODELAY in options
+        assert ShdlcTcpPort.SOCKET_OPTION_KEEPALIVE in options
+        assert ShdlcTcpPort.SOCKET_OPTION_RECEIVE_BUFFER_SIZE in options
+        assert ShdlcTcpPort.SOCKET_OPTION_QUICKACK not in options
+        assert ShdlcTcpPort.SOCKET_OPTION_SEND_BUFFER_SIZE not in options
+        sock = port._socket
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY) != 0
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE) != 0
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            assert sock.getsockopt(socket.IPPROTO_TCP,
+                                   socket.TCP_KEEPIDLE) == 10
+        port.close()
+        assert port.socket_options == ()
+
+
+def test_socket_options_disabled():
+    """
+    Test if socket options can be disabled.
+    """
+    with ShdlcPipelineServer() as server:
+        with ShdlcTcpPort(server.ip, server.port, nodelay=False,
+                          keepalive=False) as port:
+            assert port.socket_options == ()
+            assert port._socket.getsockopt(socket.IPPROTO_TCP,
+                                           socket.TCP_NODELAY) == 0
+
+
+@pytest.mark.skipif(not hasattr(socket, 'TCP_QUICKACK'),
+                    reason="requires TCP_QUICKACK")
+def test_quickack():
+    """
+    Test if TCP_QUICKACK is applied and the port still communicates.
+    """
+    with ShdlcPipelineServer() as server:
+        with ShdlcTcpPort(server.ip, server.port, quickack=True) as port:
+            assert ShdlcTcpPort.SOCKET_OPTION_QUICKACK in port.socket_options
+            assert port.transceive(1, 0x93, b"", 0.1)[0] == 1
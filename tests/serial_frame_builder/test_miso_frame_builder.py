@@ -153,3 +153,102 @@ def test_interpret_data_invalid(raw):
     assert builder.add_data(raw) is True
     with pytest.raises(ShdlcResponseError):
         builder.interpret_data()
+
+
+@pytest.mark.parametrize("raw,addr,cmd,state,data", [
+    pytest.param(b"\x7e\x00\x00\x00\x00\xff\x7e",
+                 0x00,
+                 0x00,
+                 0x00,
+                 b"",
+                 id="all_zeros_nodata"),
+    pytest.param(b"\x7e\xff\xff\xff\xff" + b"\xff" * 255 + b"\x02\x7e",
+                 0xFF,
+                 0xFF,
+                 0xFF,
+                 [0xFF] * 255,
+                 id="all_0xFF_withdata"),
+    pytest.param(b"\x7e\x7d\x5e\x7d\x5d\x7d\x31\x03\x12\x7d\x33\x14\xb7\x7e",
+                 0x7e,
+                 0x7d,
+                 0x11,
+                 b"\x12\x13\x14",
+                 id="byte_stuffing_in_address_command_state_and_data"),
+    pytest.param(b"\x7e\x00\x01\x00\xff" + b"\x7d\x5e" * 255 + b"\x7d\x5d\x7e",
+                 0x00,
+                 0x01,
+                 0x00,
+                 bytearray(b"\x7e" * 255),
+                 id="byte_stuffing_in_data_and_checksum"),
+])
+def test_encode(raw, addr, cmd, state, data):
+    """
+    Test if "encode()" returns the raw frame, and "interpret_data()" decodes
+    it again.
+    """
+    frame = ShdlcSerialMisoFrameBuilder.encode(addr, cmd, state, data)
+    assert type(frame) is bytes
+    assert frame == raw
+    builder = ShdlcSerialMisoFrameBuilder()
+    assert builder.add_data(frame) is True
+    assert builder.interpret_data() == (addr, cmd, state, bytes(data))
+
+
+@pytest.mark.parametrize("raw,exp_addr,exp_cmd,exp_state,exp_data", [
+    pytest.param(b"\x7e\x00\x00\x00\x00\xff\x7e",
+                 0x00,
+                 0x00,
+                 0x00,
+                 b"",
+                 id="all_zeros_nodata"),
+    pytest.param(b"\x01\x7e\xff\xff\xff\xff" + b"\xff" * 255 + b"\x02\x7e",
+                 0xFF,
+                 0xFF,
+                 0xFF,
+                 b"\xff" * 255,
+                 id="all_0xFF_withdata_and_rubbish"),
+    pytest.param(b"\x7e\x7d\x5e\x7d\x5d\x7d\x31\x03\x12\x7d\x33\x14\xb7\x7e",
+                 0x7e,
+                 0x7d,
+                 0x11,
+                 b"\x12\x13\x14",
+                 id="byte_stuffing_in_address_command_state_and_data"),
+    pytest.param(b"\x7e\x00\x01\x00\xff" + b"\x7d\x5e" * 255 + b"\x7d\x5d\x7e",
+                 0x00,
+                 0x01,
+                 0x00,
+                 b"\x7e" * 255,
+                 id="byte_stuffing_in_data_and_checksum"),
+])
+def test_decode_from_valid(raw, exp_addr, exp_cmd, exp_state, exp_data):
+    """
+    Test if "decode_from()" returns the payload as a memoryview on the passed
+    buffer.
+    """
+    buffer = bytearray(260)
+    addr, cmd, state, data = \
+        ShdlcSerialMisoFrameBuilder.decode_from(raw, buffer)
+    assert type(data) is memoryview
+    assert data.obj is buffer
+    assert (addr, cmd, state) == (exp_addr, exp_cmd, exp_state)
+    assert data == exp_data
+
+
+@pytest.mark.parametrize("raw", [
+    pytest.param(b"\x7e\x00\x00\x00\x00\xff",
+                 id="incomplete"),
+    pytest.param(b"\x7e\x00\x00\x00\xff\x7e",
+                 id="too_short"),
+    pytest.param(b"\x7e\x00\x00\x00\xff" + b"\x00" * 256 + b"\x00\x7e",
+                 id="too_long"),
+    pytest.param(b"\x7e\x00\x00\x00\x01\xfe\x7e",
+                 id="too_less_data"),
+    pytest.param(b"\x7e\x00\x00\x00\x00\xfe\x7e",
+                 id="nodata_wrong_checksum"),
+])
+def test_decode_from_invalid(raw):
+    """
+    Test if "decode_from()" raises an ShdlcResponseError on invalid data.
+    """
+    with pytest.raises(ShdlcResponseError):
+        ShdlcSerialMisoFrameBuilder.decode_from(raw, bytearray(260))
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMisoFrameDecoder
+from sensirion_shdlc_driver.errors import ShdlcResponseError
+import pytest
+
+
+def test_initial_data_empty():
+    """
+    Test if the initial value and type of the "data" property is correct.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    assert type(decoder.data) is bytearray
+    assert len(decoder.data) == 0
+
+
+def test_initial_start_received_false():
+    """
+    Test if the initial value and type of the "start_received" property is
+    correct.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    assert type(decoder.start_received) is bool
+    assert decoder.start_received is False
+
+
+def test_error():
+    """
+    Test if the "error" property is only set for a complete invalid frame.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    assert decoder.error is None
+    decoder.add_data(b"\x7e\x00\xd1\x00\x00\x00\x7e")  # Wrong checksum
+    assert type(decoder.error) is ShdlcResponseError
+    decoder = ShdlcSerialMisoFrameDecoder()
+    decoder.add_data(b"\x7e\x00\xd1\x00\x00\x2e\x7e")
+    assert decoder.error is None
+
+
+def test_add_data_appends():
+    """
+    Test if the "add_data()" method appends the passed data to the object.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    decoder.add_data(b"\x00\x01\x02")
+    assert decoder.data == b"\x00\x01\x02"
+    decoder.add_data(b"\x7e\x04\x05")
+    assert decoder.data == b"\x00\x01\x02\x7e\x04\x05"
+
+
+def test_add_data_raises_if_max_length_reached():
+    """
+    Test if the "add_data()" method raises an ShdlcResponseError if no valid
+    frame is contained and the maximum frame length is reached.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    decoder.add_data(b"\x00" * 500)
+    with pytest.raises(ShdlcResponseError):
+        decoder.add_data(b"\x00" * 23)
+
+
+def test_add_data():
+    """
+    Test if return type and value of the "add_data()" method is correct.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    assert type(decoder.add_data(b"")) is bool
+    assert decoder.add_data(b"") is False
+    assert decoder.add_data(b"\x00\x01\x02") is False  # some rubbish
+    assert decoder.add_data(b"\x7e\x00\x00") is False  # frame START
+    assert decoder.start_received is True
+    assert decoder.add_data(b"\x00\x00\x7e") is True  # frame STOP
+    assert decoder.add_data(b"\x00\x01\x02") is True  # some rubbish
+
+
+def test_interpret_data_incomplete():
+    """
+    Test if "interpret_data()" raises an ShdlcResponseError if the frame is
+    not complete yet.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    decoder.add_data(b"\x7e\x00\x00\x00")
+    with pytest.raises(ShdlcResponseError):
+        decoder.interpret_data()
+
+
+@pytest.mark.parametrize("raw,exp_addr,exp_cmd,exp_state,exp_data", [
+    pytest.param(b"\x7e\x00\x00\x00\x00\xff\x7e",
+                 0x00,
+                 0x00,
+                 0x00,
+                 b"",
+                 id="all_zeros_nodata"),
+    pytest.param(b"\x7e\xff\xff\xff\xff" + b"\xff" * 255 + b"\x02\x7e",
+                 0xFF,
+                 0xFF,
+                 0xFF,
+                 b"\xff" * 255,
+                 id="all_0xFF_withdata"),
+    pytest.param(b"\x7e\x7d\x5e\x7d\x5d\x7d\x31\x03\x12\x7d\x33\x14\xb7\x7e",
+                 0x7e,
+                 0x7d,
+                 0x11,
+                 b"\x12\x13\x14",
+                 id="byte_stuffing_in_address_command_state_and_data"),
+    pytest.param(b"\x7e\x00\x01\x00\xff" + b"\x7d\x5e" * 255 + b"\x7d\x5d\x7e",
+                 0x00,
+                 0x01,
+                 0x00,
+                 b"\x7e" * 255,
+                 id="byte_stuffing_in_data_and_checksum"),
+    pytest.param(b"\x01\x7e\x7e\x00\x00\x00\x00\xff\x7e\x02",
+                 0x00,
+                 0x00,
+                 0x00,
+                 b"",
+                 id="rubbish_and_double_start"),
+])
+@pytest.mark.parametrize("chunk_size", [1, 2, 17, 1024])
+def test_interpret_data_valid(raw, exp_addr, exp_cmd, exp_state, exp_data,
+                              chunk_size):
+    """
+    Test if return type and value of the "interpret_data()" method is correct,
+    no matter in how many chunks the raw data is added.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    results = [decoder.add_data(raw[i:i + chunk_size])
+               for i in range(0, len(raw), chunk_size)]
+    assert results[-1] is True
+    recv_addr, recv_cmd, recv_state, recv_data = decoder.interpret_data()
+    assert type(recv_addr) is int
+    assert type(recv_cmd) is int
+    assert type(recv_state) is int
+    assert type(recv_data) is bytes
+    assert recv_addr == exp_addr
+    assert recv_cmd == exp_cmd
+    assert recv_state == exp_state
+    assert recv_data == exp_data
+
+
+@pytest.mark.parametrize("raw", [
+    pytest.param(b"\x7e\x00\x00\x00\xff\x7e",
+                 id="too_short"),
+    pytest.param(b"\x7e\x00\x00\x00\xff" + b"\x00" * 256 + b"\x00\x7e",
+                 id="too_long"),
+    pytest.param(b"\x7e\x00\x00\x00\x01\xfe\x7e",
+                 id="too_less_data"),
+    pytest.param(b"\x7e\x00\x00\x00\x00\x00\xff\x7e",
+                 id="too_much_data"),
+    pytest.param(b"\x7e\x00\x00\x00\x00\xfe\x7e",
+                 id="nodata_wrong_checksum"),
+    pytest.param(b"\x7e\xff\xff\xff\xff" + b"\xff" * 255 + b"\x00\x7e",
+                 id="all_0xFF_wrong_checksum"),
+])
+def test_interpret_data_invalid(raw):
+    """
+    Test if "interpret_data()" raises an ShdlcResponseError on invalid data.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    assert decoder.add_data(raw) is True
+    with pytest.raises(ShdlcResponseError):
+        decoder.interpret_data()
+
+
+@pytest.mark.parametrize("raw", [
+    pytest.param(b"\x7e\x00\xd1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7e",
+                 id="no_stuffing"),
+    pytest.param(b"\x7e\x7d\x5e\x7d\x5d\x7d\x31\x03\x7d\x33\x7d\x5e\x7d\x5d"
+                 b"\xe2\x7e", id="stuffing"),
+    pytest.param(b"\x00\x00\x7e\x00\xd1\x00\x00\x2e\x7e", id="rubbish"),
+])
+def test_min_remaining_length(raw):
+    """
+    Test if "min_remaining_length" never exceeds the number of actually
+    missing bytes while receiving a frame byte by byte, and is exact for
+    frames without stuffing. Querying it in between (even right after an
+    escape byte) must not corrupt the decoded frame.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    assert decoder.min_remaining_length == 7
+    for i in range(len(raw)):
+        assert 1 <= decoder.min_remaining_length <= len(raw) - i
+        decoder.add_data(raw[i:i + 1])
+    assert decoder.min_remaining_length == 0
+    assert decoder.error is None
+
+
+def test_min_remaining_length_after_header():
+    """
+    Test if "min_remaining_length" is exact after the header of a frame
+    without stuffing is received.
+    """
+    decoder = ShdlcSerialMisoFrameDecoder()
+    decoder.add_data(b"\x7e\x00\xd1\x00\x07")
+    assert decoder.min_remaining_length == 9
+    decoder.add_data(b"\x05\x08\x00")
+    assert decoder.min_remaining_length == 6
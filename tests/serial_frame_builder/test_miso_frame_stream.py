@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMisoFrameStream
+from sensirion_shdlc_driver.errors import ShdlcResponseError
+import pytest
+
+FRAME_1 = b"\x7e\x00\xd1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7e"
+FRAME_2 = b"\x7e\x7d\x5e\x7d\x5d\x7d\x31\x03\x12\x7d\x33\x14\xb7\x7e"
+RESULT_1 = (0x00, 0xD1, 0x00, b"\x05\x08\x00\x03\x00\x01\x00")
+RESULT_2 = (0x7E, 0x7D, 0x11, b"\x12\x13\x14")
+
+
+def test_initial_state():
+    """
+    Test if the initial values and types of the properties are correct.
+    """
+    stream = ShdlcSerialMisoFrameStream()
+    assert stream.start_received is False
+    assert stream.available == 0
+    assert stream.last_raw_frame == b""
+    assert stream.discarded_bytes == 0
+    assert stream.get_frame() is None
+
+
+def test_multiple_frames_in_one_chunk():
+    """
+    Test if all frames contained in a single chunk are returned in order.
+    """
+    stream = ShdlcSerialMisoFrameStream()
+    assert stream.add_data(FRAME_1 + FRAME_2) is True
+    assert stream.available == 2
+    assert stream.get_frame() == RESULT_1
+    assert stream.last_raw_frame == FRAME_1
+    assert stream.get_frame() == RESULT_2
+    assert stream.last_raw_frame == FRAME_2
+    assert stream.get_frame() is None
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 17, 1024])
+def test_frames_split_across_chunks(chunk_size):
+    """
+    Test if incomplete frames are kept until the remaining bytes are added.
+    """
+    raw = FRAME_1 + FRAME_2 + FRAME_1[:5]
+    stream = ShdlcSerialMisoFrameStream()
+    for i in range(0, len(raw), chunk_size):
+        stream.add_data(raw[i:i + chunk_size])
+    assert stream.get_frame() == RESULT_1
+    assert stream.get_frame() == RESULT_2
+    assert stream.get_frame() is None
+    assert stream.start_received is True
+    stream.add_data(FRAME_1[5:])
+    assert stream.get_frame() == RESULT_1
+
+
+def test_rubbish_between_frames_is_discarded():
+    """
+    Test if rubbish between frames is discarded and counted.
+    """
+    stream = ShdlcSerialMisoFrameStream()
+    stream.add_data(b"\x01\x02" + FRAME_1 + b"\x03\x04\x05" + FRAME_2)
+    assert stream.get_frame() == RESULT_1
+    assert stream.get_frame() == RESULT_2
+    assert stream.discarded_bytes == 5
+
+
+def test_resync_after_rubbish_with_start_byte():
+    """
+    Test if the stream resynchronizes if the rubbish contains a start byte,
+    i.e. the invalid frame is reported and the following frame is valid.
+    """
+    stream = ShdlcSerialMisoFrameStream()
+    stream.add_data(b"\x7e\x01\x02" + FRAME_1)
+    assert stream.available == 2
+    with pytest.raises(ShdlcResponseError):
+        stream.get_frame()
+    assert stream.last_raw_frame == b"\x7e\x01\x02\x7e"
+    assert stream.get_frame() == RESULT_1
+
+
+def test_too_long_frame():
+    """
+    Test if an endless frame is reported as invalid and discarded.
+    """
+    stream = ShdlcSerialMisoFrameStream()
+    stream.add_data(b"\x7e" + b"\x00" * 600)
+    with pytest.raises(ShdlcResponseError):
+        stream.get_frame()
+    stream.add_data(FRAME_1)
+    assert stream.get_frame() == RESULT_1
+
+
+def test_clear():
+    """
+    Test if "clear()" discards complete and incomplete frames.
+    """
+    stream = ShdlcSerialMisoFrameStream()
+    stream.add_data(FRAME_1 + FRAME_2[:3])
+    stream.clear()
+    assert stream.available == 0
+    assert stream.start_received is False
+    assert stream.discarded_bytes == len(FRAME_1) + 3
+    stream.add_data(FRAME_2[3:] + FRAME_2)
+    assert stream.get_frame() == RESULT_2
+    assert stream.get_frame() is None
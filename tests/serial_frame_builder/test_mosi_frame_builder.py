@@ -42,3 +42,77 @@ def test_to_bytes(address, command, data, expected):
     frame = builder.to_bytes()
     assert type(frame) is bytes
     assert frame == expected
+
+
+def test_to_bytes_all_byte_values():
+    """
+    Test if "to_bytes()" escapes exactly the reserved bytes when the payload
+    contains every possible byte value.
+    """
+    data = bytes(bytearray(range(0, 255)))
+    frame = ShdlcSerialMosiFrameBuilder(0x00, 0x00, data).to_bytes()
+    expected = bytearray(b"\x7e\x00\x00\xff")
+    for b in bytearray(data):
+        if b in [0x7e, 0x7d, 0x11, 0x13]:
+            expected.extend([0x7d, b ^ 0x20])
+        else:
+            expected.append(b)
+    expected.extend([0x7f, 0x7e])  # checksum and stop byte
+    assert frame == expected
+
+
+@pytest.mark.parametrize("address,command,data", [
+    pytest.param(0x00, 0x00, [], id="all_zeros_nodata"),
+    pytest.param(0xFF, 0xFF, [0xFF] * 255, id="all_0xFF_withdata"),
+    pytest.param(0x7e, 0x7d, [0x11, 0x12, 0x13, 0x14],
+                 id="byte_stuffing_in_address_command_and_data"),
+    pytest.param(0x00, 0x01, [0x7E] * 255,
+                 id="byte_stuffing_in_data_and_checksum"),
+])
+@pytest.mark.parametrize("offset", [0, 3])
+def test_encode_into(address, command, data, offset):
+    """
+    Test if "encode_into()" writes the same raw bytes as "to_bytes()" into
+    the passed buffer and returns the number of written bytes.
+    """
+    expected = ShdlcSerialMosiFrameBuilder(address, command, data).to_bytes()
+    buffer = bytearray(b"\xaa" * (offset + 522))
+    length = ShdlcSerialMosiFrameBuilder.encode_into(
+        buffer, address, command, data, offset=offset)
+    assert type(length) is int
+    assert length == len(expected)
+    assert buffer[:offset] == b"\xaa" * offset
+    assert buffer[offset:offset + length] == expected
+
+
+@pytest.mark.parametrize("address,command,data", [
+    pytest.param(0x00, 0x00, b"", id="all_zeros_nodata"),
+    pytest.param(0xFF, 0xFF, b"\xff" * 255, id="all_0xFF_withdata"),
+    pytest.param(0x7e, 0x7d, b"\x11\x12\x13\x14",
+                 id="byte_stuffing_in_address_command_and_data"),
+    pytest.param(0x00, 0x01, b"\x7e" * 255,
+                 id="byte_stuffing_in_data_and_checksum"),
+])
+def test_decode(address, command, data):
+    """
+    Test if "decode()" returns the structured data of a frame encoded with
+    "to_bytes()", with or without start and stop byte.
+    """
+    raw = ShdlcSerialMosiFrameBuilder(address, command, data).to_bytes()
+    assert ShdlcSerialMosiFrameBuilder.decode(raw) == (address, command, data)
+    assert ShdlcSerialMosiFrameBuilder.decode(raw[1:-1]) == \
+        (address, command, data)
+
+
+@pytest.mark.parametrize("raw", [
+    pytest.param(b"\x7e\x7e", id="empty"),
+    pytest.param(b"\x7e\x00\x00\xff\x7e", id="too_short"),
+    pytest.param(b"\x7e\x00\x00\x01\xfe\x7e", id="too_less_data"),
+    pytest.param(b"\x7e\x00\x00\x00\x00\xff\x7e", id="too_much_data"),
+    pytest.param(b"\x7e\x00\x00\x00\xfe\x7e", id="wrong_checksum"),
+])
+def test_decode_invalid(raw):
+    """
+    Test if "decode()" returns None for invalid frames.
+    """
+    assert ShdlcSerialMosiFrameBuilder.decode(raw) is None
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.batch_frame_builder import \
+    ShdlcSerialMosiBatchFrameBuilder
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder
+import pytest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+USE_NUMPY = [
+    pytest.param(False, id="python"),
+    pytest.param(True, id="numpy", marks=pytest.mark.skipif(
+        numpy is None, reason="NumPy not installed")),
+]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_empty(use_numpy):
+    """
+    Test if an empty request sequence results in empty raw data.
+    """
+    builder = ShdlcSerialMosiBatchFrameBuilder([], use_numpy=use_numpy)
+    assert builder.to_bytes() == b""
+    assert builder.offsets == [0]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+@pytest.mark.parametrize("frames", [
+    pytest.param([(0x00, 0xD1, b"")], id="single_frame"),
+    pytest.param([(address, 0xD1, b"") for address in range(32)],
+                 id="32_slaves"),
+    pytest.param([(0x7E, 0x7D, [0x11, 0x12, 0x13, 0x14]),
+                  (0x00, 0x01, [0x7E] * 255),
+                  (0xFF, 0xFF, [0xFF] * 255),
+                  (0x00, 0xD2, [0x01])],
+                 id="byte_stuffing"),
+])
+def test_to_bytes(frames, use_numpy):
+    """
+    Test if the raw data contains the same frames as encoded with
+    ShdlcSerialMosiFrameBuilder, located at the returned offsets.
+    """
+    expected = [ShdlcSerialMosiFrameBuilder(*frame).to_bytes()
+                for frame in frames]
+    builder = ShdlcSerialMosiBatchFrameBuilder(frames, use_numpy=use_numpy)
+    raw = builder.to_bytes()
+    offsets = builder.offsets
+    assert type(raw) is bytes
+    assert raw == b"".join(expected)
+    assert len(offsets) == len(frames) + 1
+    assert [raw[offsets[i]:offsets[i + 1]]
+            for i in range(len(frames))] == expected
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+@pytest.mark.parametrize("frame", [
+    pytest.param((0x100, 0x00, b""), id="slave_address_too_high"),
+    pytest.param((-1, 0x00, b""), id="slave_address_negative"),
+    pytest.param((0x00, 0x100, b""), id="command_id_too_high"),
+    pytest.param((0x00, 0x00, b"\x00" * 256), id="payload_too_long"),
+])
+def test_invalid_frame(frame, use_numpy):
+    """
+    Test if frames which don't fit into the frame format are rejected with a
+    ValueError, independent of the encoding path.
+    """
+    with pytest.raises(ValueError):
+        ShdlcSerialMosiBatchFrameBuilder([(0x00, 0xD1, b""), frame],
+                                         use_numpy=use_numpy)
+
+
+@pytest.mark.skipif(numpy is not None, reason="NumPy is installed")
+def test_use_numpy_without_numpy():
+    """
+    Test if requesting NumPy raises an ImportError if it's not installed.
+    """
+    with pytest.raises(ImportError):
+        ShdlcSerialMosiBatchFrameBuilder([], use_numpy=True)
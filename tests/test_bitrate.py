@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.bitrate import ShdlcBusBitrate
+from sensirion_shdlc_driver.connection import ShdlcConnection
+from sensirion_shdlc_driver.errors import ShdlcError, ShdlcTimeoutError
+from sensirion_shdlc_driver.port import ShdlcPort
+from threading import RLock
+import struct
+import pytest
+
+
+class _Device(object):
+    def __init__(self, bitrate, supported, apply=True):
+        self.bitrate = bitrate
+        self.supported = supported
+        self.apply = apply  # Whether a new bitrate is actually applied
+
+
+class _BusPort(ShdlcPort):
+    """
+    Simulated bus where devices only respond at their own bitrate.
+    """
+
+    def __init__(self, bitrate, devices):
+        super(_BusPort, self).__init__()
+        self._lock = RLock()
+        self._bitrate = bitrate
+        self.devices = devices
+        self.max_bitrate = None  # Bitrates above are rejected by the port
+        self.fail_on_set = None  # (bitrate, n): n-th set of bitrate raises
+
+    @property
+    def description(self):
+        return 'bus'
+
+    @property
+    def bitrate(self):
+        return self._bitrate
+
+    @bitrate.setter
+    def bitrate(self, bitrate):
+        if self.max_bitrate is not None and bitrate > self.max_bitrate:
+            raise ValueError("Unsupported bitrate {}.".format(bitrate))
+        if self.fail_on_set is not None and self.fail_on_set[0] == bitrate:
+            self.fail_on_set = (bitrate, self.fail_on_set[1] - 1)
+            if self.fail_on_set[1] == 0:
+                raise IOError("Failed to set bitrate.")
+        self._bitrate = bitrate
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        device = self.devices.get(slave_address)
+        if device is None or device.bitrate != self._bitrate:
+            raise ShdlcTimeoutError()
+        assert command_id == 0x91
+        if len(data) == 0:
+            return slave_address, command_id, 0x00, \
+                struct.pack(">I", device.bitrate)
+        bitrate = struct.unpack(">I", data)[0]
+        if bitrate not in device.supported:
+            return slave_address, command_id, 0x04, b""  # Parameter error
+        if device.apply:
+            device.bitrate = bitrate  # Applied after sending the response
+        return slave_address, command_id, 0x00, b""
+
+
+def _bus(bitrate, *devices):
+    port = _BusPort(bitrate, dict(enumerate(devices)))
+    return port, ShdlcBusBitrate(ShdlcConnection(port), sorted(port.devices))
+
+
+ALL = ShdlcBusBitrate.COMMON_BITRATES
+
+
+def test_detect():
+    """
+    Test if detect() finds the bitrate at which the slaves respond, and
+    leaves the port at this bitrate.
+    """
+    port, bus = _bus(115200, _Device(19200, ALL), _Device(19200, ALL))
+    assert bus.detect() == 19200
+    assert port.bitrate == 19200
+
+
+def test_detect_fails():
+    """
+    Test if detect() raises an exception and restores the bitrate of the
+    port if no slave responds.
+    """
+    port, bus = _bus(115200, _Device(300, ALL))
+    with pytest.raises(ShdlcError):
+        bus.detect()
+    assert port.bitrate == 115200
+
+
+def test_upgrade():
+    """
+    Test if upgrade() moves all slaves to the fastest common bitrate, rolling
+    back faster bitrates which are not supported by all slaves.
+    """
+    port, bus = _bus(115200,
+                     _Device(115200, ALL),
+                     _Device(115200, (115200, 230400, 460800)),
+                     _Device(115200, (115200, 230400, 460800, 1000000)))
+    assert bus.upgrade() == 460800
+    assert port.bitrate == 460800
+    assert [d.bitrate for d in port.devices.values()] == [460800] * 3
+
+
+def test_upgrade_rollback_not_responding():
+    """
+    Test if upgrade() rolls back if a slave doesn't respond at the new
+    bitrate.
+    """
+    port, bus = _bus(115200, _Device(115200, ALL),
+                     _Device(115200, ALL, apply=False))
+    assert bus.upgrade(bitrates=(115200, 460800)) == 115200
+    assert port.bitrate == 115200
+    assert [d.bitrate for d in port.devices.values()] == [115200] * 2
+
+
+def test_upgrade_rollback_fails():
+    """
+    Test if upgrade() raises an exception if a slave is lost during the
+    rollback.
+    """
+    port, bus = _bus(115200, _Device(115200, ALL),
+                     _Device(115200, ALL, apply=False))
+    port.devices[0].supported = (460800,)  # Can't go back
+    with pytest.raises(ShdlcError):
+        bus.upgrade(bitrates=(115200, 460800))
+
+
+def test_upgrade_port_rejects_bitrate():
+    """
+    Test if upgrade() skips bitrates which the port doesn't support, without
+    changing the bitrate of any slave.
+    """
+    port, bus = _bus(115200, _Device(115200, ALL), _Device(115200, ALL))
+    port.max_bitrate = 460800
+    assert bus.upgrade() == 460800
+    assert port.bitrate == 460800
+    assert [d.bitrate for d in port.devices.values()] == [460800] * 2
+
+
+def test_upgrade_port_fails_after_slaves_switched():
+    """
+    Test if upgrade() rolls back the slaves if the port raises an arbitrary
+    exception when switching after the slaves were switched.
+    """
+    port, bus = _bus(115200, _Device(115200, ALL), _Device(115200, ALL))
+    port.fail_on_set = (460800, 2)  # Check passes, switching fails
+    assert bus.upgrade(bitrates=(115200, 460800)) == 115200
+    assert port.bitrate == 115200
+    assert [d.bitrate for d in port.devices.values()] == [115200] * 2
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.capture import ShdlcCaptureWriter, \
+    ShdlcCaptureReader, ShdlcLatencyStatistics, decode_mosi_frame, \
+    decode_miso_frame, main
+from sensirion_shdlc_driver.errors import ShdlcError
+from sensirion_shdlc_driver.wire_trace import ShdlcWireTrace
+from mock import Mock
+import pytest
+
+MOSI = b"\x7E\x00\xD1\x00\x2E\x7E"
+MISO = b"\x7E\x00\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7E"
+
+
+def _port(description):
+    port = Mock()
+    port.description = description
+    return port
+
+
+def _write_capture(path):
+    port_1 = _port('COM1@115200')
+    port_2 = _port('COM2@115200')
+    with ShdlcCaptureWriter(str(path), flush_interval=0.01) as writer:
+        writer.on_frame(port_1, ShdlcWireTrace.MOSI, MOSI, 1.0)
+        writer.on_frame(port_2, ShdlcWireTrace.MOSI, MOSI, 1.5)
+        writer.on_frame(port_1, ShdlcWireTrace.MISO, MISO, 1.002)
+        writer.on_frame(port_1, ShdlcWireTrace.MOSI, MOSI, 2.0)
+        writer.on_frame(port_1, ShdlcWireTrace.MISO, memoryview(MISO), 2.004)
+    return writer
+
+
+def test_write_and_read(tmp_path):
+    """
+    Test if frames written by ShdlcCaptureWriter are read back by
+    ShdlcCaptureReader.
+    """
+    path = tmp_path / "capture.bin"
+    writer = _write_capture(path)
+    assert writer.dropped_frames == 0
+    assert list(ShdlcCaptureReader(str(path))) == [
+        (1.0, 'COM1@115200', ShdlcWireTrace.MOSI, MOSI),
+        (1.5, 'COM2@115200', ShdlcWireTrace.MOSI, MOSI),
+        (1.002, 'COM1@115200', ShdlcWireTrace.MISO, MISO),
+        (2.0, 'COM1@115200', ShdlcWireTrace.MOSI, MOSI),
+        (2.004, 'COM1@115200', ShdlcWireTrace.MISO, MISO),
+    ]
+
+
+def test_writer_appends(tmp_path):
+    """
+    Test if opening an existing capture file appends the new frames.
+    """
+    path = tmp_path / "capture.bin"
+    for i in range(2):
+        with ShdlcCaptureWriter(str(path)) as writer:
+            writer.on_frame(_port('COM1'), ShdlcWireTrace.MOSI, MOSI, 1.0)
+    assert len(list(ShdlcCaptureReader(str(path)))) == 2
+
+
+def test_writer_drops_frames_if_queue_full(tmp_path):
+    """
+    Test if frames are dropped and counted if the queue is full.
+    """
+    path = tmp_path / "capture.bin"
+    with ShdlcCaptureWriter(str(path), flush_interval=10.0,
+                            max_queued_frames=2) as writer:
+        for i in range(3):
+            writer.on_frame(_port('COM1'), ShdlcWireTrace.MOSI, MOSI, 1.0)
+        assert writer.dropped_frames == 1
+    assert len(list(ShdlcCaptureReader(str(path)))) == 2
+
+
+def test_writer_port_ids(tmp_path):
+    """
+    Test if deleted ports don't pass their ID on to new ports, and frames of
+    more than 256 ports are dropped.
+    """
+    path = tmp_path / "capture.bin"
+    with ShdlcCaptureWriter(str(path), flush_interval=10.0) as writer:
+        for i in range(257):
+            port = _port('COM{}'.format(i))
+            writer.on_frame(port, ShdlcWireTrace.MOSI, MOSI, float(i))
+            del port
+        assert writer.dropped_frames == 1
+    assert [frame[1] for frame in ShdlcCaptureReader(str(path))] == \
+        ['COM{}'.format(i) for i in range(256)]
+
+
+def test_reader_invalid_file(tmp_path):
+    """
+    Test if reading a file which is not a capture raises an exception.
+    """
+    path = tmp_path / "capture.bin"
+    path.write_bytes(b"something else")
+    with pytest.raises(ShdlcError):
+        list(ShdlcCaptureReader(str(path)))
+
+
+def test_decode_frames():
+    """
+    Test if raw frames are decoded, and invalid frames return None.
+    """
+    assert decode_mosi_frame(MOSI) == (0x00, 0xD1)
+    assert decode_mosi_frame(b"\x7E\x00\xD1\x00\x2F\x7E") is None
+    assert decode_miso_frame(MISO) == \
+        (0x00, 0xD1, 0x00, b"\x05\x08\x00\x03\x00\x01\x00")
+    assert decode_miso_frame(b"\x7E\x00\xD1\x00\x00\x00\x7E") is None
+
+
+def test_latency_statistics():
+    """
+    Test if the latency statistics pair requests and responses per port, and
+    count requests without response as lost.
+    """
+    statistics = ShdlcLatencyStatistics()
+    statistics.add_frame(1.0, 'COM1', ShdlcWireTrace.MOSI, MOSI)
+    statistics.add_frame(1.5, 'COM2', ShdlcWireTrace.MOSI, MOSI)
+    statistics.add_frame(1.002, 'COM1', ShdlcWireTrace.MISO, MISO)
+    statistics.add_frame(2.0, 'COM1', ShdlcWireTrace.MOSI, MOSI)
+    statistics.add_frame(3.0, 'COM1', ShdlcWireTrace.MOSI, MOSI)
+    statistics.add_frame(3.004, 'COM1', ShdlcWireTrace.MISO, MISO)
+    rows = statistics.rows()
+    assert len(rows) == 1
+    port, address, command, count, lost, minimum, mean, p95, maximum = \
+        rows[0]
+    assert (port, address, command, count, lost) == ('COM1', 0, 0xD1, 3, 1)
+    assert minimum == pytest.approx(0.002)
+    assert mean == pytest.approx(0.003)
+    assert maximum == pytest.approx(0.004)
+    assert len(statistics.format().splitlines()) == 2
+
+
+def test_main(tmp_path, capsys):
+    """
+    Test if the command line interface prints the latency table.
+    """
+    path = tmp_path / "capture.bin"
+    _write_capture(path)
+    assert main([str(path), "--frames"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "{}:".format(path)
+    assert len(lines) == 1 + 5 + 1 + 1
+    assert lines[-1].split()[:5] == ['COM1@115200', '0', '0xD1', '2', '0']
+
+
+def test_main_corrupt_port_description(tmp_path, capsys):
+    """
+    Test if the command line interface still prints the frames of a capture
+    file with a corrupt (not UTF-8) port description.
+    """
+    path = tmp_path / "capture.bin"
+    _write_capture(path)
+    path.write_bytes(path.read_bytes().replace(b"COM1@", b"COM1\xff"))
+    frames = list(ShdlcCaptureReader(str(path)))
+    assert frames[0][1] == u"COM1\ufffd115200"
+    assert main([str(path), "--frames"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1 + 5 + 1 + 1
+
+
+def test_main_invalid_file(tmp_path, capsys):
+    """
+    Test if the command line interface reports invalid files.
+    """
+    path = tmp_path / "capture.bin"
+    path.write_bytes(b"something else")
+    assert main([str(path)]) == 1
+    assert "not an SHDLC capture file" in capsys.readouterr().err
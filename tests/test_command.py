@@ -2,7 +2,7 @@
 # (c) Copyright 2019 Sensirion AG, Switzerland
 
 from __future__ import absolute_import, division, print_function
-from sensirion_shdlc_driver.command import ShdlcCommand
+from sensirion_shdlc_driver.command import ShdlcCommand, ShdlcStructCommand
 from sensirion_shdlc_driver.errors import ShdlcResponseError
 import pytest
 
@@ -41,6 +41,19 @@ def test_property_max_response_time():
     assert cmd.max_response_time == 42.0
 
 
+def test_property_response_length():
+    """
+    Test if the value and type of the "min_response_length" and
+    "max_response_length" properties are correct.
+    """
+    cmd = ShdlcCommand(id=42, data=[], max_response_time=0.5,
+                       min_response_length=2, max_response_length=5)
+    assert type(cmd.min_response_length) is int
+    assert cmd.min_response_length == 2
+    assert type(cmd.max_response_length) is int
+    assert cmd.max_response_length == 5
+
+
 def test_property_post_processing_time():
     """
     Test if the value and type of the "post_processing_time" property is
@@ -103,3 +116,94 @@ def test_interpret_response():
     response = cmd.interpret_response(input)
     assert type(response) is bytes
     assert response == input
+
+
+class _CmdStructBase(ShdlcCommand):
+    ID = 0x42
+
+    def __init__(self, *args, **kwargs):
+        super(_CmdStructBase, self).__init__(0x42, *args, **kwargs)
+
+
+class _CmdStruct(ShdlcStructCommand, _CmdStructBase):
+    REQUEST_FORMAT = ">HB"
+    REQUEST_FIELDS = ("value", "flags")
+    RESPONSE_FORMAT = ">hB"
+    MAX_RESPONSE_TIME = 0.5
+    POST_PROCESSING_TIME = 0.1
+
+
+class _CmdStructSingle(ShdlcStructCommand):
+    ID = 0x43
+    RESPONSE_FORMAT = ">I"
+    MAX_RESPONSE_TIME = 0.05
+
+
+class _CmdStructEmpty(ShdlcStructCommand):
+    ID = 0x44
+    MAX_RESPONSE_TIME = 0.05
+
+
+@pytest.mark.parametrize("args,kwargs", [
+    pytest.param((0x1234, 5), {}, id="positional"),
+    pytest.param((), dict(value=0x1234, flags=5), id="keyword"),
+    pytest.param((0x1234,), dict(flags=5), id="mixed"),
+])
+def test_struct_command_request(args, kwargs):
+    """
+    Test if ShdlcStructCommand packs the request data and derives the
+    properties from the class attributes.
+    """
+    cmd = _CmdStruct(*args, **kwargs)
+    assert isinstance(cmd, _CmdStructBase)
+    assert cmd.id == 0x42
+    assert cmd.data == b"\x12\x34\x05"
+    assert cmd.max_response_time == 0.5
+    assert cmd.post_processing_time == 0.1
+    assert cmd.min_response_length == 3
+    assert cmd.max_response_length == 3
+
+
+def test_struct_command_unexpected_keyword():
+    """
+    Test if ShdlcStructCommand raises TypeError on unknown keyword arguments.
+    """
+    with pytest.raises(TypeError):
+        _CmdStruct(0x1234, 5, foo=1)
+
+
+def test_struct_command_fields_mismatch():
+    """
+    Test if defining a ShdlcStructCommand with REQUEST_FIELDS not matching
+    REQUEST_FORMAT raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        class _CmdInvalid(ShdlcStructCommand):
+            REQUEST_FORMAT = ">HB"
+            REQUEST_FIELDS = ("value",)
+
+
+@pytest.mark.parametrize("cmd,data,expected", [
+    pytest.param(_CmdStruct(1, 2), b"\xff\xfe\x07", (-2, 7), id="tuple"),
+    pytest.param(_CmdStructSingle(), b"\x00\x01\x00\x00", 65536,
+                 id="single"),
+    pytest.param(_CmdStructEmpty(), b"", None, id="empty"),
+])
+def test_struct_command_interpret_response(cmd, data, expected):
+    """
+    Test if the generated "interpret_response()" of ShdlcStructCommand returns
+    the unpacked response.
+    """
+    cmd.check_response_length(data)
+    assert cmd.interpret_response(data) == expected
+
+
+def test_struct_command_shares_structs():
+    """
+    Test if commands with the same layout share the compiled struct.
+    """
+    class _CmdOther(ShdlcStructCommand):
+        ID = 0x45
+        RESPONSE_FORMAT = ">I"
+        MAX_RESPONSE_TIME = 0.05
+    assert _CmdOther._response_struct is _CmdStructSingle._response_struct
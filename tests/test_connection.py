@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.connection import ShdlcConnection
+from sensirion_shdlc_driver.commands.system_up_time import \
+    ShdlcCmdGetSystemUpTime
+from sensirion_shdlc_driver.errors import ShdlcDeviceError, \
+    ShdlcTimeoutError
+from sensirion_shdlc_driver.port import ShdlcPort
+from threading import RLock
+
+
+class _LegacyPort(ShdlcPort):
+    """
+    Port implementing the original transceive() signature without
+    max_response_length.
+    """
+
+    def __init__(self):
+        super(_LegacyPort, self).__init__()
+        self._lock = RLock()
+        self.calls = []
+
+    @property
+    def description(self):
+        return 'legacy'
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def transceive(self, slave_address, command_id, data, response_timeout):
+        self.calls.append((slave_address, command_id))
+        return slave_address, command_id, 0x00, b"\x00\x00\x00\x2A"
+
+
+class _Port(_LegacyPort):
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        self.calls.append(max_response_length)
+        return slave_address, command_id, 0x00, b"\x00\x00\x00\x2A"
+
+
+def test_execute_legacy_port():
+    """
+    Test if ports without the max_response_length parameter still work.
+    """
+    port = _LegacyPort()
+    connection = ShdlcConnection(port)
+    assert connection.execute(1, ShdlcCmdGetSystemUpTime()) == (42, False)
+    assert connection.execute_pipelined(
+        [(2, ShdlcCmdGetSystemUpTime())]) == [(42, False)]
+    assert port.calls == [(1, 0x93), (2, 0x93)]
+
+
+def test_execute_passes_max_response_length():
+    """
+    Test if the maximum response length is passed to ports which accept it.
+    """
+    port = _Port()
+    connection = ShdlcConnection(port)
+    connection.execute(1, ShdlcCmdGetSystemUpTime())
+    connection.transceive(1, 0x93, b"", 0.1)
+    assert port.calls == [4, None]
+
+
+class _FailingPort(_Port):
+    """
+    Port which NACKs requests to slave address 2 and doesn't get a response
+    from slave address 4.
+    """
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        self.calls.append(slave_address)
+        if slave_address == 4:
+            raise ShdlcTimeoutError()
+        state = 0x01 if slave_address == 2 else 0x00
+        return slave_address, command_id, state, b"\x00\x00\x00\x2A"
+
+
+def test_execute_pipelined_partial_failure():
+    """
+    Test if execute_pipelined() returns the responses of all successful
+    requests, and the errors of the failed requests in their place.
+    """
+    port = _FailingPort()
+    connection = ShdlcConnection(port)
+    results = connection.execute_pipelined(
+        [(i, ShdlcCmdGetSystemUpTime()) for i in range(1, 6)])
+    assert port.calls == [1, 2, 3, 4, 5]
+    assert len(results) == 5
+    assert results[0] == (42, False)
+    assert type(results[1]) is ShdlcDeviceError
+    assert results[1].error_code == 1
+    assert results[2] == (42, False)
+    assert type(results[3]) is ShdlcTimeoutError
+    assert results[4] == (42, False)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.connection import ShdlcConnection
+from sensirion_shdlc_driver.device import ShdlcDevice
+from sensirion_shdlc_driver.errors import ShdlcError, ShdlcTimeoutError
+from sensirion_shdlc_driver.port import ShdlcPort
+from threading import RLock
+import struct
+import pytest
+
+
+class _Rs485Port(ShdlcPort):
+    """
+    Simulated RS485 bus with one device, where responses get lost if the
+    reply delay of the device is shorter than the turnaround time of the
+    master.
+    """
+
+    def __init__(self, turnaround_time):
+        super(_Rs485Port, self).__init__()
+        self._lock = RLock()
+        self.turnaround_time = turnaround_time
+        self.device_reply_delay = 0
+        self.port_reply_delays = dict()
+
+    @property
+    def description(self):
+        return 'rs485'
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def set_reply_delay(self, slave_address, reply_delay):
+        self.port_reply_delays[slave_address] = reply_delay
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        if command_id == 0x95 and len(data) == 2:
+            self.device_reply_delay = struct.unpack(">H", data)[0]
+            payload = b""
+        else:
+            payload = b"\x05\x08\x00\x03\x00\x01\x00"
+        if self.device_reply_delay < self.turnaround_time:
+            raise ShdlcTimeoutError()
+        return slave_address, command_id, 0x00, payload
+
+
+def test_set_reply_delay_updates_port():
+    """
+    Test if set_reply_delay() passes the reply delay to the port, unless
+    update_driver is False.
+    """
+    port = _Rs485Port(0)
+    device = ShdlcDevice(ShdlcConnection(port), 3)
+    device.set_reply_delay(100, update_driver=False)
+    assert port.port_reply_delays == dict()
+    device.set_reply_delay(200)
+    assert port.device_reply_delay == 200
+    assert port.port_reply_delays == {3: 200}
+
+
+@pytest.mark.parametrize("turnaround_time,expected", [
+    (0, 0),
+    (1, 9),
+    (237, 243),
+    (9990, 9990),
+])
+def test_find_min_reply_delay(turnaround_time, expected):
+    """
+    Test if find_min_reply_delay() finds the smallest working reply delay
+    within the resolution, and sets it in the device and the port.
+    """
+    port = _Rs485Port(turnaround_time)
+    device = ShdlcDevice(ShdlcConnection(port), 0)
+    assert device.find_min_reply_delay(resolution=10, samples=2) == expected
+    assert port.device_reply_delay == expected
+    assert port.port_reply_delays == {0: expected}
+    assert expected - turnaround_time <= 10
+
+
+def test_find_min_reply_delay_fails():
+    """
+    Test if find_min_reply_delay() raises an exception if even the maximum
+    reply delay doesn't work.
+    """
+    port = _Rs485Port(20000)
+    device = ShdlcDevice(ShdlcConnection(port), 0)
+    with pytest.raises(ShdlcError):
+        device.find_min_reply_delay(max_reply_delay=10000)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.frame_cache import ShdlcFrameCache
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder
+
+
+def test_initial_state():
+    """
+    Test if the initial values of the properties are correct.
+    """
+    cache = ShdlcFrameCache(max_size=10, max_payload_length=4)
+    assert cache.max_size == 10
+    assert cache.max_payload_length == 4
+    assert cache.command_ids == frozenset()
+    assert cache.size == 0
+    assert cache.hits == 0
+    assert cache.misses == 0
+
+
+def test_get_returns_encoded_frame():
+    """
+    Test if "get()" returns the same frame as the frame builder, and counts
+    hits and misses.
+    """
+    cache = ShdlcFrameCache(command_ids=[0xD2])
+    expected = ShdlcSerialMosiFrameBuilder(0x7E, 0xD2, [0x01]).to_bytes()
+    assert cache.get(0x7E, 0xD2, b"\x01") == expected
+    assert cache.get(0x7E, 0xD2, (i for i in [0x01])) == expected
+    assert cache.get(0x7E, 0xD2, b"\x01") == expected
+    assert cache.misses == 1
+    assert cache.hits == 2
+    assert cache.size == 1
+
+
+def test_get_payload_not_cached_without_opt_in():
+    """
+    Test if "get()" returns None for frames with payload, unless their
+    command ID is in "command_ids".
+    """
+    cache = ShdlcFrameCache(command_ids=[0x93])
+    assert cache.get(0x00, 0x91, b"\x00\x00\x4B\x00") is None
+    assert cache.get(0x00, 0x91, (i for i in [0x01])) is None
+    assert cache.get(0x00, 0x93, b"\x01") is not None
+    assert cache.get(0x00, 0x91, b"") is not None
+    assert cache.size == 2
+    assert cache.misses == 2
+
+
+def test_get_long_payload_not_cached():
+    """
+    Test if "get()" returns None for payloads which are too long.
+    """
+    cache = ShdlcFrameCache(max_payload_length=2, command_ids=[0x00])
+    assert cache.get(0x00, 0x00, b"\x00\x00\x00") is None
+    assert cache.size == 0
+    assert cache.misses == 0
+
+
+def test_least_recently_used_frame_is_evicted():
+    """
+    Test if the least recently used frame is evicted when the cache is full.
+    """
+    cache = ShdlcFrameCache(max_size=2)
+    cache.get(0, 0xD1, b"")
+    cache.get(1, 0xD1, b"")
+    cache.get(0, 0xD1, b"")  # hit, makes address 1 least recently used
+    cache.get(2, 0xD1, b"")  # evicts address 1
+    assert cache.size == 2
+    cache.get(0, 0xD1, b"")
+    assert cache.hits == 2
+    cache.get(1, 0xD1, b"")
+    assert cache.misses == 4
+
+
+def test_clear():
+    """
+    Test if "clear()" removes all frames and resets the counters.
+    """
+    cache = ShdlcFrameCache()
+    cache.get(0, 0xD1, b"")
+    cache.get(0, 0xD1, b"")
+    cache.clear()
+    assert cache.size == 0
+    assert cache.hits == 0
+    assert cache.misses == 0
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.gateway import ShdlcTcpGateway
+from sensirion_shdlc_driver.port import ShdlcPort, ShdlcTcpPort
+from sensirion_shdlc_driver.errors import ShdlcConnectionLostError, \
+    ShdlcTimeoutError
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMosiFrameBuilder
+from threading import Event, RLock
+import socket
+import time
+import pytest
+
+
+class _FakePort(ShdlcPort):
+    """
+    Port which echoes the request payload and records all requests.
+    """
+
+    def __init__(self, name='fake'):
+        super(_FakePort, self).__init__()
+        self._lock = RLock()
+        self._name = name
+        self.requests = []
+        self.sent_frames = []
+        self.gate = Event()
+        self.gate.set()
+        self.executing = 0
+        self.silent_addresses = ()
+
+    @property
+    def description(self):
+        return self._name
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        with self._lock:
+            self.executing += 1
+            self.gate.wait()
+            self.requests.append((slave_address, command_id, bytes(data)))
+            if slave_address in self.silent_addresses:
+                raise ShdlcTimeoutError()
+            return slave_address, command_id, 0x42, bytes(data)
+
+    def send_frames(self, frames):
+        with self._lock:
+            self.sent_frames.extend(frames)
+
+
+@pytest.fixture
+def gateway():
+    with ShdlcTcpGateway() as gateway:
+        yield gateway
+
+
+def _wait_until(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_transceive(gateway):
+    """
+    Test if requests are executed on the port and the responses are returned
+    to the client, including payloads which need byte-stuffing.
+    """
+    port = _FakePort()
+    ip, tcp_port = gateway.add_port(port)
+    with ShdlcTcpPort(ip, tcp_port) as client:
+        assert client.transceive(0x01, 0xD1, b"\x7E\x11\x7D", 0.1) == \
+            (0x01, 0xD1, 0x42, b"\x7E\x11\x7D")
+        assert client.transceive(0x02, 0x00, b"", 0.1) == \
+            (0x02, 0x00, 0x42, b"")
+    assert port.requests == [(0x01, 0xD1, b"\x7E\x11\x7D"), (0x02, 0x00, b"")]
+
+
+def test_no_response(gateway):
+    """
+    Test if requests without response from the device are not answered, so
+    the client runs into a timeout but keeps the connection.
+    """
+    port = _FakePort()
+    port.silent_addresses = (1,)
+    ip, tcp_port = gateway.add_port(port)
+    with ShdlcTcpPort(ip, tcp_port, socket_timeout=0.1) as client:
+        with pytest.raises(ShdlcTimeoutError) as exc_info:
+            client.transceive(0x01, 0x00, b"", 0.0)
+        assert type(exc_info.value) is ShdlcTimeoutError
+        assert client.transceive(0x02, 0x00, b"", 0.1)[0] == 0x02
+
+
+def test_fair_scheduling(gateway):
+    """
+    Test if the requests of multiple clients are executed round-robin, and
+    the requests of each client in order.
+    """
+    port = _FakePort()
+    port.gate.clear()
+    ip, tcp_port = gateway.add_port(port)
+    with ShdlcTcpPort(ip, tcp_port) as client_a, \
+            ShdlcTcpPort(ip, tcp_port) as client_b:
+        client_a.send_frames([(i, 0x00, b"") for i in (1, 2, 3, 4)])
+        _wait_until(lambda: port.executing == 1 and
+                    gateway.queue_length == 3)
+        client_b.send_frames([(i, 0x00, b"") for i in (11, 12)])
+        _wait_until(lambda: gateway.queue_length == 5)
+        port.gate.set()
+        _wait_until(lambda: len(port.requests) == 6)
+    assert [r[0] for r in port.requests] == [1, 2, 11, 3, 12, 4]
+
+
+def test_pipelined_with_backpressure():
+    """
+    Test if a client sending more requests than the gateway queues still
+    gets all responses in order.
+    """
+    with ShdlcTcpGateway(max_pending=2) as gateway:
+        ip, tcp_port = gateway.add_port(_FakePort())
+        with ShdlcTcpPort(ip, tcp_port, max_outstanding=20) as client:
+            results = client.transceive_pipelined(
+                [(1, 0x00, bytes([i]), 1.0, None) for i in range(50)])
+    assert results == [(1, 0x00, 0x42, bytes([i])) for i in range(50)]
+
+
+def test_multiple_ports(gateway):
+    """
+    Test if multiple ports are served on their own TCP ports.
+    """
+    ports = [_FakePort('a'), _FakePort('b')]
+    addresses = [gateway.add_port(port) for port in ports]
+    assert gateway.addresses == addresses
+    for index, (ip, tcp_port) in enumerate(addresses):
+        with ShdlcTcpPort(ip, tcp_port) as client:
+            client.transceive(index, 0x00, b"", 0.1)
+    assert [p.requests for p in ports] == [[(0, 0x00, b"")],
+                                           [(1, 0x00, b"")]]
+
+
+def test_broadcast(gateway):
+    """
+    Test if broadcast frames are sent without waiting for a response.
+    """
+    port = _FakePort()
+    ip, tcp_port = gateway.add_port(port)
+    with ShdlcTcpPort(ip, tcp_port) as client:
+        client.send_frames([(0xFF, 0x91, b"\x00\x00\x4B\x00")])
+        _wait_until(lambda: len(port.sent_frames) == 1)
+    assert port.sent_frames == [(0xFF, 0x91, b"\x00\x00\x4B\x00")]
+    assert port.requests == []
+
+
+def test_invalid_frames_discarded(gateway):
+    """
+    Test if rubbish and frames with a wrong checksum are discarded.
+    """
+    port = _FakePort()
+    address = gateway.add_port(port)
+    sock = socket.create_connection(address, timeout=2.0)
+    try:
+        sock.sendall(b"\x11\x22\x7E\x7E\x01\x00\x00\x00\x7E" +
+                     ShdlcSerialMosiFrameBuilder(0x02, 0x03, b"").to_bytes())
+        response = sock.recv(1024)
+    finally:
+        sock.close()
+    assert response == b"\x7E\x02\x03\x42\x00\xB8\x7E"
+    assert port.requests == [(0x02, 0x03, b"")]
+
+
+def test_resync_after_junk(gateway):
+    """
+    Test if a request directly following rubbish which contains a start/stop
+    byte is answered, i.e. the last start/stop byte of the rubbish is used as
+    start byte of the request.
+    """
+    port = _FakePort()
+    address = gateway.add_port(port)
+    sock = socket.create_connection(address, timeout=2.0)
+    try:
+        sock.sendall(b"\x11\x7E\x22\x33" +
+                     ShdlcSerialMosiFrameBuilder(0x02, 0x03, b"").to_bytes())
+        response = sock.recv(1024)
+    finally:
+        sock.close()
+    assert response == b"\x7E\x02\x03\x42\x00\xB8\x7E"
+    assert port.requests == [(0x02, 0x03, b"")]
+
+
+def test_stop():
+    """
+    Test if stopping the gateway disconnects the clients.
+    """
+    gateway = ShdlcTcpGateway()
+    ip, tcp_port = gateway.add_port(_FakePort())
+    client = ShdlcTcpPort(ip, tcp_port)
+    client.transceive(0x00, 0x00, b"", 0.1)
+    _wait_until(lambda: gateway.client_count == 1)
+    gateway.stop()
+    assert gateway.client_count == 0
+    with pytest.raises(ShdlcConnectionLostError):
+        client.transceive(0x00, 0x00, b"", 0.1)
+    client.close()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.multiplexer import ShdlcMultiplexer, \
+    ShdlcMultiplexerPort
+from sensirion_shdlc_driver.port import ShdlcPort
+from sensirion_shdlc_driver.errors import ShdlcConnectionLostError, \
+    ShdlcError, ShdlcResponseError, ShdlcTimeoutError
+from threading import Event, RLock, Thread
+import socket
+import time
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                                reason="requires Unix domain sockets")
+
+
+class _FakePort(ShdlcPort):
+    """
+    Port which echoes the request payload and records all requests.
+    """
+
+    def __init__(self):
+        super(_FakePort, self).__init__()
+        self._lock = RLock()
+        self.requests = []
+        self.sent_frames = []
+        self.gate = Event()
+        self.gate.set()
+        self.executing = 0
+        self.bitrate_value = 115200
+        self.error = None
+
+    @property
+    def description(self):
+        return 'fake'
+
+    @property
+    def bitrate(self):
+        return self.bitrate_value
+
+    @bitrate.setter
+    def bitrate(self, bitrate):
+        self.bitrate_value = bitrate
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        with self._lock:
+            self.executing += 1
+            self.gate.wait()
+            self.requests.append((slave_address, command_id, bytes(data),
+                                  response_timeout, max_response_length))
+            if self.error is not None:
+                raise self.error
+            return slave_address, command_id, 0x42, bytes(data)
+
+    def send_frames(self, frames):
+        with self._lock:
+            self.sent_frames.extend(frames)
+
+
+@pytest.fixture
+def multiplexer(tmp_path):
+    with ShdlcMultiplexer(_FakePort(), str(tmp_path / "shdlc.sock")) as mux:
+        yield mux
+
+
+def _wait_until(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_transceive(multiplexer):
+    """
+    Test if requests are executed on the shared port and the responses are
+    returned to the client.
+    """
+    with ShdlcMultiplexerPort(multiplexer.path) as port:
+        assert port.transceive(0x01, 0xD1, b"\x7E\x11", 0.1, 3) == \
+            (0x01, 0xD1, 0x42, b"\x7E\x11")
+        assert port.transceive(0x02, 0x00, b"", 0.2) == \
+            (0x02, 0x00, 0x42, b"")
+    assert multiplexer.port.requests == [
+        (0x01, 0xD1, b"\x7E\x11", 0.1, 3),
+        (0x02, 0x00, b"", 0.2, None),
+    ]
+
+
+@pytest.mark.parametrize("error,expected", [
+    (ShdlcTimeoutError(), ShdlcTimeoutError),
+    (ShdlcResponseError("Wrong checksum."), ShdlcResponseError),
+    (ShdlcConnectionLostError("Gateway down."), ShdlcConnectionLostError),
+    (ValueError("Broken port."), ShdlcError),
+])
+def test_transceive_error(multiplexer, error, expected):
+    """
+    Test if errors of the shared port are raised by the client port.
+    """
+    multiplexer.port.error = error
+    with ShdlcMultiplexerPort(multiplexer.path) as port:
+        with pytest.raises(expected) as exc_info:
+            port.transceive(0x00, 0xD1, b"", 0.1)
+    assert str(exc_info.value) == str(error) or expected is ShdlcError
+
+
+def test_send_frames(multiplexer):
+    """
+    Test if frames are sent by the shared port without waiting for
+    responses.
+    """
+    frames = [(0xFF, 0x91, b"\x00\x00\x4B\x00"), (0x00, 0xD1, b""),
+              (0x01, 0x7E, b"\x7E" * 255)]
+    with ShdlcMultiplexerPort(multiplexer.path) as port:
+        port.send_frames(frames)
+        with pytest.raises(ValueError):
+            port.send_frames([(0x00, 0x00, b"\x00" * 256)])
+    assert multiplexer.port.sent_frames == frames
+    assert multiplexer.port.requests == []
+
+
+def test_invalid_priority(multiplexer):
+    """
+    Test if priorities out of the range -128..127 are rejected.
+    """
+    with pytest.raises(ValueError):
+        ShdlcMultiplexerPort(multiplexer.path, priority=128, do_open=False)
+    port = ShdlcMultiplexerPort(multiplexer.path, priority=-128,
+                                do_open=False)
+    port.priority = 127
+    with pytest.raises(ValueError):
+        port.priority = -129
+    assert port.priority == 127
+
+
+def test_priority(multiplexer):
+    """
+    Test if queued requests with higher priority are executed first.
+    """
+    multiplexer.port.gate.clear()
+    threads = []
+    for address, priority in [(1, 0), (2, -5), (3, 0), (4, 10)]:
+        port = ShdlcMultiplexerPort(multiplexer.path, priority=priority)
+        thread = Thread(target=port.transceive, args=(address, 0, b"", 0.1))
+        thread.start()
+        threads.append((thread, port))
+        # Wait until the request is executing (first one) or queued
+        _wait_until(lambda: multiplexer.port.executing == 1 and
+                    multiplexer.queue_length == address - 1)
+    multiplexer.port.gate.set()
+    for thread, port in threads:
+        thread.join()
+        port.close()
+    assert [r[0] for r in multiplexer.port.requests] == [1, 4, 3, 2]
+
+
+def test_multiple_clients(multiplexer):
+    """
+    Test if concurrent clients all get their own responses.
+    """
+    results = dict()
+
+    def client(address):
+        with ShdlcMultiplexerPort(multiplexer.path) as port:
+            results[address] = [port.transceive(address, 0, bytes([i]), 0.1)
+                                for i in range(20)]
+
+    threads = [Thread(target=client, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for address in range(5):
+        assert results[address] == [(address, 0, 0x42, bytes([i]))
+                                    for i in range(20)]
+
+
+def test_description_and_bitrate(multiplexer):
+    """
+    Test if the description and bitrate of the shared port are accessible.
+    """
+    with ShdlcMultiplexerPort(multiplexer.path) as port:
+        assert port.description == 'fake via ' + multiplexer.path
+        assert port.bitrate == 115200
+        port.bitrate = 460800
+        assert port.bitrate == 460800
+    assert multiplexer.port.bitrate_value == 460800
+
+
+def test_open_close(multiplexer):
+    """
+    Test if the client port can be closed and reopened.
+    """
+    port = ShdlcMultiplexerPort(multiplexer.path, do_open=False)
+    assert port.is_open is False
+    with pytest.raises(ShdlcError):
+        port.transceive(0x00, 0x00, b"", 0.1)
+    port.open()
+    assert port.is_open is True
+    _wait_until(lambda: multiplexer.client_count == 1)
+    port.close()
+    assert port.is_open is False
+    _wait_until(lambda: multiplexer.client_count == 0)
+
+
+def test_stop(tmp_path):
+    """
+    Test if stopping disconnects the clients and removes the socket file, and
+    if a stale socket file is replaced.
+    """
+    path = tmp_path / "shdlc.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+    multiplexer = ShdlcMultiplexer(_FakePort(), str(path))
+    port = ShdlcMultiplexerPort(str(path))
+    assert port.transceive(0x00, 0x00, b"", 0.1)[2] == 0x42
+    multiplexer.stop()
+    assert not path.exists()
+    with pytest.raises(ShdlcConnectionLostError):
+        port.transceive(0x00, 0x00, b"", 0.1)
+    assert port.is_open is False
+    port.close()
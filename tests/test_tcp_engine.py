@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.tcp_engine import ShdlcTcpEngine, \
+    _MAX_STALE_TIMERS
+from sensirion_shdlc_driver.gateway import ShdlcTcpGateway
+from sensirion_shdlc_driver.port import ShdlcPort
+from sensirion_shdlc_driver.commands.system_up_time import \
+    ShdlcCmdGetSystemUpTime
+from sensirion_shdlc_driver.errors import ShdlcConnectionLostError, \
+    ShdlcDeviceError, ShdlcError, ShdlcTimeoutError
+from sensirion_shdlc_driver.serial_frame_builder import \
+    ShdlcSerialMisoFrameBuilder
+from threading import Event, RLock, Thread
+import socket
+import time
+import pytest
+
+
+class _FakePort(ShdlcPort):
+    """
+    Port which echoes the request payload, or responds with a fixed payload
+    for the commands in ``responses``.
+    """
+
+    def __init__(self):
+        super(_FakePort, self).__init__()
+        self._lock = RLock()
+        self.gate = Event()
+        self.gate.set()
+        self.state = 0x00
+        self.responses = {}
+        self.silent_addresses = ()
+
+    @property
+    def description(self):
+        return 'fake'
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def transceive(self, slave_address, command_id, data, response_timeout,
+                   max_response_length=None):
+        with self._lock:
+            self.gate.wait()
+            if slave_address in self.silent_addresses:
+                raise ShdlcTimeoutError()
+            return slave_address, command_id, self.state, \
+                self.responses.get(command_id, bytes(data))
+
+
+@pytest.fixture
+def gateway():
+    with ShdlcTcpGateway() as gateway:
+        yield gateway
+
+
+def _wait_until(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def _free_tcp_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_submit(gateway):
+    """
+    Test if requests to multiple endpoints are answered.
+    """
+    addresses = [gateway.add_port(_FakePort()) for _ in range(3)]
+    with ShdlcTcpEngine() as engine:
+        endpoints = [engine.add_endpoint(*a) for a in addresses]
+        assert engine.endpoints == endpoints
+        futures = [engine.submit(e, i, 0xD1, bytes([i, 0x7E]), 0.1)
+                   for i, e in enumerate(endpoints) for _ in range(5)]
+        results = [f.result(2.0) for f in futures]
+    assert results == [(i, 0xD1, 0x00, bytes([i, 0x7E]))
+                       for i in range(3) for _ in range(5)]
+    assert all(e.pending_count == 0 for e in endpoints)
+
+
+def test_many_endpoints(gateway):
+    """
+    Test if many connections are handled by the engine thread.
+    """
+    address = gateway.add_port(_FakePort())
+    with ShdlcTcpEngine() as engine:
+        endpoints = [engine.add_endpoint(*address) for _ in range(100)]
+        futures = [engine.submit(e, 1, 0x00, bytes([i]), 0.1)
+                   for i, e in enumerate(endpoints)]
+        assert [f.result(5.0)[3] for f in futures] == \
+            [bytes([i]) for i in range(100)]
+        assert all(e.is_connected for e in endpoints)
+
+
+def test_execute(gateway):
+    """
+    Test if commands are validated and interpreted.
+    """
+    port = _FakePort()
+    port.responses[0x93] = b"\x00\x00\x00\x2A"
+    address = gateway.add_port(port)
+    with ShdlcTcpEngine() as engine:
+        endpoint = engine.add_endpoint(*address)
+        future = engine.execute(endpoint, 0, ShdlcCmdGetSystemUpTime())
+        assert future.result(2.0) == (42, False)
+        port.state = 0x80 | 0x04
+        future = engine.execute(endpoint, 0, ShdlcCmdGetSystemUpTime())
+        with pytest.raises(ShdlcDeviceError):
+            future.result(2.0)
+
+
+def test_callback(gateway):
+    """
+    Test if callbacks added to the futures are called with the result.
+    """
+    address = gateway.add_port(_FakePort())
+    results = []
+    done = Event()
+    with ShdlcTcpEngine() as engine:
+        endpoint = engine.add_endpoint(*address)
+        future = engine.submit(endpoint, 1, 0x00, b"\x01", 0.1)
+        future.add_done_callback(lambda f: (results.append(f.result()),
+                                            done.set()))
+        assert done.wait(2.0)
+    assert results == [(1, 0x00, 0x00, b"\x01")]
+
+
+def test_timeout(gateway):
+    """
+    Test if a request without response fails with a timeout, and the
+    endpoint continues with the next request.
+    """
+    port = _FakePort()
+    port.silent_addresses = (1,)
+    address = gateway.add_port(port)
+    with ShdlcTcpEngine(socket_timeout=0.1) as engine:
+        endpoint = engine.add_endpoint(*address)
+        timed_out = engine.submit(endpoint, 1, 0x00, b"", 0.0)
+        answered = engine.submit(endpoint, 2, 0x00, b"", 0.0)
+        with pytest.raises(ShdlcTimeoutError) as exc_info:
+            timed_out.result(2.0)
+        assert type(exc_info.value) is ShdlcTimeoutError
+        assert answered.result(2.0)[0] == 2
+        assert endpoint.is_connected is True
+
+
+def test_timers_bounded(gateway):
+    """
+    Test if the replaced timers of answered requests don't accumulate.
+    """
+    address = gateway.add_port(_FakePort())
+    with ShdlcTcpEngine() as engine:
+        endpoint = engine.add_endpoint(*address)
+        for _ in range(10):
+            futures = [engine.submit(endpoint, 1, 0x00, b"", 1.0)
+                       for _ in range(50)]
+            for future in futures:
+                future.result(2.0)
+        assert len(engine._timers) <= 2 * _MAX_STALE_TIMERS + 1
+
+
+def test_invalid_frames_discarded():
+    """
+    Test if invalid frames (e.g. line noise) are discarded instead of
+    failing the request on the wire.
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+
+    def serve():
+        sock, _ = server.accept()
+        sock.recv(1024)
+        sock.sendall(b"\x7E\x01\x02\x7E" + ShdlcSerialMisoFrameBuilder
+                     .encode(0x01, 0x00, 0x00, b"\x2A"))
+        sock.recv(1024)  # Wait until the client disconnects
+        sock.close()
+
+    thread = Thread(target=serve)
+    thread.start()
+    try:
+        with ShdlcTcpEngine() as engine:
+            endpoint = engine.add_endpoint(*server.getsockname())
+            assert engine.submit(endpoint, 1, 0x00, b"", 0.1).result(2.0) == \
+                (1, 0x00, 0x00, b"\x2A")
+    finally:
+        thread.join(2.0)
+        server.close()
+
+
+def test_connect_failed():
+    """
+    Test if requests to an unreachable endpoint fail, and further connection
+    attempts are delayed.
+    """
+    with ShdlcTcpEngine(reconnect_delay=10.0) as engine:
+        endpoint = engine.add_endpoint('127.0.0.1', _free_tcp_port())
+        for _ in range(2):
+            with pytest.raises(ShdlcConnectionLostError):
+                engine.submit(endpoint, 1, 0x00, b"", 0.1).result(2.0)
+        assert endpoint.connection_stats['failed_connect_count'] == 1
+        assert endpoint.is_connected is False
+
+
+def test_reconnect():
+    """
+    Test if the endpoint reconnects after the connection was lost.
+    """
+    tcp_port = _free_tcp_port()
+    with ShdlcTcpEngine(reconnect_delay=0.0) as engine:
+        endpoint = engine.add_endpoint('127.0.0.1', tcp_port)
+        with ShdlcTcpGateway() as gateway:
+            gateway.add_port(_FakePort(), '127.0.0.1', tcp_port)
+            engine.submit(endpoint, 1, 0x00, b"", 0.1).result(2.0)
+        _wait_until(lambda: not endpoint.is_connected)
+        with pytest.raises(ShdlcConnectionLostError):
+            engine.submit(endpoint, 1, 0x00, b"", 0.1).result(2.0)
+        with ShdlcTcpGateway() as gateway:
+            gateway.add_port(_FakePort(), '127.0.0.1', tcp_port)
+            assert engine.submit(endpoint, 1, 0x00, b"\x02", 0.1) \
+                .result(2.0) == (1, 0x00, 0x00, b"\x02")
+            assert endpoint.connection_stats == dict(
+                connection_lost_count=1, reconnect_count=1,
+                failed_connect_count=1)
+
+
+def test_max_pending(gateway):
+    """
+    Test if no more than max_pending requests are accepted per endpoint.
+    """
+    port = _FakePort()
+    port.gate.clear()
+    address = gateway.add_port(port)
+    with ShdlcTcpEngine(max_pending=2) as engine:
+        endpoint = engine.add_endpoint(*address)
+        futures = [engine.submit(endpoint, 1, 0x00, b"", 1.0)
+                   for _ in range(2)]
+        with pytest.raises(ShdlcError):
+            engine.submit(endpoint, 1, 0x00, b"", 1.0)
+        port.gate.set()
+        for future in futures:
+            future.result(2.0)
+        engine.submit(endpoint, 1, 0x00, b"", 1.0).result(2.0)
+
+
+def test_stop_fails_pending(gateway):
+    """
+    Test if stopping the engine fails all pending requests, and rejects new
+    requests.
+    """
+    port = _FakePort()
+    port.gate.clear()
+    address = gateway.add_port(port)
+    engine = ShdlcTcpEngine()
+    endpoint = engine.add_endpoint(*address)
+    futures = [engine.submit(endpoint, 1, 0x00, b"", 1.0) for _ in range(3)]
+    engine.stop()
+    port.gate.set()
+    for future in futures:
+        with pytest.raises(ShdlcError):
+            future.result(2.0)
+    with pytest.raises(ShdlcError):
+        engine.submit(endpoint, 1, 0x00, b"", 1.0)
+
+
+def test_remove_endpoint(gateway):
+    """
+    Test if removing an endpoint rejects new requests.
+    """
+    address = gateway.add_port(_FakePort())
+    with ShdlcTcpEngine() as engine:
+        endpoint = engine.add_endpoint(*address)
+        engine.submit(endpoint, 1, 0x00, b"", 0.1).result(2.0)
+        engine.remove_endpoint(endpoint)
+        assert engine.endpoints == []
+        with pytest.raises(ShdlcError):
+            engine.submit(endpoint, 1, 0x00, b"", 0.1)
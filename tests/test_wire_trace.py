@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# (c) Copyright 2019 Sensirion AG, Switzerland
+
+from __future__ import absolute_import, division, print_function
+from sensirion_shdlc_driver.wire_trace import ShdlcWireTrace, \
+    ShdlcWireTraceBuffer
+from sensirion_shdlc_driver.port import ShdlcSerialPort
+from mock import Mock, PropertyMock
+import pytest
+
+
+def _create_port():
+    """
+    Create a ShdlcSerialPort with mocked serial port, responding to the
+    "get version" command.
+    """
+    port = ShdlcSerialPort('/non/existing/port', 115200, do_open=False)
+    port._serial = Mock()
+    port._serial.name = '/non/existing/port'
+    type(port._serial).baudrate = PropertyMock(return_value=115200)
+    port._serial.inWaiting.return_value = 1
+    port._serial.read.return_value = \
+        b"\x7E\x00\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7E"
+    return port
+
+
+def test_interface_not_implemented():
+    """
+    Test if the "on_frame()" method of the interface raises.
+    """
+    with pytest.raises(NotImplementedError):
+        ShdlcWireTrace().on_frame(None, ShdlcWireTrace.MOSI, b"", 0.0)
+
+
+def test_buffer_keeps_last_frames():
+    """
+    Test if the ring buffer only keeps the last N frames.
+    """
+    buffer = ShdlcWireTraceBuffer(max_frames=2)
+    for i in range(3):
+        buffer.on_frame(None, ShdlcWireTrace.MOSI, bytearray([i]), float(i))
+    frames = buffer.frames
+    assert [(f[0], f[3]) for f in frames] == [(1.0, b"\x01"), (2.0, b"\x02")]
+    assert type(frames[0][3]) is bytes
+    buffer.clear()
+    assert buffer.frames == []
+
+
+def test_port_notifies_subscribers():
+    """
+    Test if the port notifies registered subscribers about sent and received
+    frames, and stops notifying them after they are removed.
+    """
+    port = _create_port()
+    buffer = ShdlcWireTraceBuffer()
+    port.add_wire_trace(buffer)
+    assert port.wire_traces == (buffer,)
+    port.transceive(0, 0xD1, b"", 1.0)
+    frames = buffer.frames
+    assert [(f[1], f[2], f[3]) for f in frames] == [
+        (port, ShdlcWireTrace.MOSI, b"\x7E\x00\xD1\x00\x2E\x7E"),
+        (port, ShdlcWireTrace.MISO,
+         b"\x7E\x00\xD1\x00\x07\x05\x08\x00\x03\x00\x01\x00\x16\x7E"),
+    ]
+    assert frames[0][0] <= frames[1][0]
+    port.remove_wire_trace(buffer)
+    assert port.wire_traces == ()
+    port.transceive(0, 0xD1, b"", 1.0)
+    assert len(buffer.frames) == 2
+
+
+def test_dump():
+    """
+    Test if "dump()" formats the frames as text.
+    """
+    port = _create_port()
+    buffer = ShdlcWireTraceBuffer()
+    port.add_wire_trace(buffer)
+    port.transceive(0, 0xD1, b"", 1.0)
+    lines = buffer.dump().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith(
+        " /non/existing/port@115200 MOSI: [0x7E, 0x00, 0xD1, 0x00, 0x2E, 0x7E]")
+    assert " MISO: [0x7E, 0x00, 0xD1, " in lines[1]